@@ -14,10 +14,15 @@ CREATE TABLE IF NOT EXISTS uservice_dynconf.configs (
     config_mode uservice_dynconf.mode NOT NULL DEFAULT 'dynamic_config',
     created_at timestamptz DEFAULT NOW(),
     updated_at timestamptz DEFAULT NOW(),
+    deleted_at timestamptz DEFAULT NULL,
 
     PRIMARY KEY (service, config_name)
 );
 
+-- Tables created before soft deletes have no deleted_at
+ALTER TABLE uservice_dynconf.configs
+ADD COLUMN IF NOT EXISTS deleted_at timestamptz DEFAULT NULL;
+
 CREATE INDEX IF NOT EXISTS idx__created_at__configs
 ON uservice_dynconf.configs USING btree (created_at);
 
@@ -26,3 +31,31 @@ ON uservice_dynconf.configs USING btree (updated_at);
 
 CREATE UNIQUE INDEX IF NOT EXISTS idx__pair_service_and_connfig
 ON uservice_dynconf.configs USING btree (service, config_name);
+
+CREATE OR REPLACE FUNCTION uservice_dynconf.notify_configs_changed()
+RETURNS trigger AS $$
+BEGIN
+    -- Upserts that leave every row untouched change nothing to notify about
+    IF EXISTS (SELECT 1 FROM changed_configs) THEN
+        PERFORM pg_notify('uservice_dynconf_configs', TG_OP);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need a trigger per event
+DROP TRIGGER IF EXISTS trigger__notify__configs ON uservice_dynconf.configs;
+
+DROP TRIGGER IF EXISTS trigger__notify__configs__insert
+ON uservice_dynconf.configs;
+CREATE TRIGGER trigger__notify__configs__insert
+AFTER INSERT ON uservice_dynconf.configs
+REFERENCING NEW TABLE AS changed_configs
+FOR EACH STATEMENT EXECUTE FUNCTION uservice_dynconf.notify_configs_changed();
+
+DROP TRIGGER IF EXISTS trigger__notify__configs__update
+ON uservice_dynconf.configs;
+CREATE TRIGGER trigger__notify__configs__update
+AFTER UPDATE ON uservice_dynconf.configs
+REFERENCING NEW TABLE AS changed_configs
+FOR EACH STATEMENT EXECUTE FUNCTION uservice_dynconf.notify_configs_changed();
@@ -3,67 +3,809 @@
 #include "userver/storages/postgres/query.hpp"
 
 #include "sql/sql_query.hpp"
+#include "userver/cache/update_type.hpp"
+#include "userver/dump/common.hpp"
+#include "userver/engine/task/current_task.hpp"
+#include "userver/engine/wait_all_checked.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/storages/postgres/cluster.hpp"
+#include "userver/storages/postgres/component.hpp"
 #include "userver/utils/algo.hpp"
+#include "userver/utils/async.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+#include "utils/etag.hpp"
+#include "utils/make_configs_response.hpp"
+#include <algorithm>
+#include <atomic>
+#include <boost/functional/hash.hpp>
+#include <cstdint>
+#include <fmt/format.h>
 #include <string_view>
+#include <utility>
 
 namespace uservice_dynconf::cache::settings_cache {
 
 namespace {
-constexpr static const char *kDefaultService = "__default__";
+constexpr std::string_view kDefaultService = "__default__";
+// Bump on any change of the dump layout, older dumps are discarded then
+constexpr std::uint32_t kDumpVersion = 2;
+// Snapshots are built by parallel tasks only if there are enough of them to
+// pay for the tasks, i.e. on full updates and `__default__` changes
+constexpr std::size_t kMinSnapshotsPerTask = 16;
+
+const userver::storages::postgres::Query kSelectAllConfigs{
+    std::string{uservice_dynconf::sql::kSelectSettingsForCache},
+    userver::storages::postgres::Query::Name{"select_configs_for_cache"}};
+const userver::storages::postgres::Query kSelectChangedConfigs{
+    std::string{uservice_dynconf::sql::kSelectSettingsForCache} +
+        "WHERE updated_at >= $1",
+    userver::storages::postgres::Query::Name{
+        "select_changed_configs_for_cache"}};
+
+using Config = ConfigCacheContainer::Config;
+using ConfigPtr = ConfigCacheContainer::ConfigPtr;
+using ServiceConfigs = ConfigCacheContainer::ServiceConfigs;
+using ServiceSnapshotPtr =
+    std::shared_ptr<const ConfigCacheContainer::ServiceSnapshot>;
+// Service name and its own configs
+using ServiceToBuild = std::pair<const std::string *, const ServiceConfigs *>;
+
+ConfigPtr FindEntry(const ServiceConfigs *configs, std::string_view name) {
+  return configs ? userver::utils::FindOrDefault(*configs, name, nullptr)
+                 : nullptr;
 }
 
-userver::storages::postgres::Query ConfigCachePolicy::kQuery =
-    userver::storages::postgres::Query(
-        uservice_dynconf::sql::kSelectSettingsForCache.data());
+bool IsAlive(const ConfigPtr &config) { return config && !config->deleted_at; }
 
-void ConfigCacheContainer::insert_or_assign(Key &&key, Config &&config) {
-  auto config_ptr = std::make_shared<const Config>(std::move(config));
-  configs_to_key_.insert_or_assign(key, config_ptr);
-  configs_by_service_[key.service].push_back(std::move(config_ptr));
+std::optional<std::chrono::system_clock::time_point>
+GetDeletedAt(const std::optional<userver::storages::postgres::TimePointTz>
+                 &deleted_at) {
+  if (!deleted_at) {
+    return std::nullopt;
+  }
+  return deleted_at->GetUnderlying();
 }
 
-std::vector<ConfigCacheContainer::ConfigPtr>
-ConfigCacheContainer::FindConfigsByService(std::string_view service) const {
-  if (auto it = configs_by_service_.find(service.data());
-      it != configs_by_service_.end()) {
+// Whether the row is the same as the config it would replace
+bool IsSameRow(const ConfigPtr &config, const ConfigCacheContainer::Row &row) {
+  return config &&
+         config->updated_at.GetUnderlying() == row.updated_at.GetUnderlying() &&
+         GetDeletedAt(config->deleted_at) == GetDeletedAt(row.deleted_at) &&
+         config->mode == row.mode &&
+         config->config_value.GetJson() == row.config_value;
+}
+
+// Picks the effective entry out of the service own one and the
+// `__default__` one. Either of them may be a tombstone.
+ConfigPtr ResolveConfig(ConfigPtr own, ConfigPtr by_default) {
+  if (IsAlive(own) || !by_default) {
+    return own;
+  }
+  if (!own) {
+    return by_default;
+  }
+  // A change of either entry may change the effective one, so it gets the
+  // later revision of the two
+  const auto revision = std::max(own->revision, by_default->revision);
+  const auto deleted_at = own->updated_at.GetUnderlying();
+  ConfigPtr result;
+  if (IsAlive(by_default)) {
+    if (by_default->updated_at.GetUnderlying() < deleted_at) {
+      // The default value became effective when the override was deleted
+      auto config = *by_default;
+      config.updated_at = own->updated_at;
+      config.revision = revision;
+      return std::make_shared<const Config>(std::move(config));
+    }
+    result = by_default;
+  } else {
+    result =
+        by_default->updated_at.GetUnderlying() > deleted_at ? by_default : own;
+  }
+  if (result->revision < revision) {
+    auto config = *result;
+    config.revision = revision;
+    return std::make_shared<const Config>(std::move(config));
+  }
+  return result;
+}
+
+std::vector<ConfigPtr>::const_iterator
+FindByName(const std::vector<ConfigPtr> &configs, std::string_view name) {
+  const auto it = std::lower_bound(
+      configs.begin(), configs.end(), name,
+      [](const ConfigPtr &config, std::string_view name) {
+        return config->key.config_name.Get() < name;
+      });
+  return it != configs.end() && (*it)->key.config_name.Get() == name
+             ? it
+             : configs.end();
+}
+
+std::shared_ptr<const ConfigCacheContainer::ServiceSnapshot>
+BuildServiceSnapshot(const std::string &service,
+                     const ServiceConfigs &service_configs,
+                     const ServiceConfigs *default_configs) {
+  ConfigCacheContainer::ServiceSnapshot snapshot;
+  snapshot.service = service;
+  for (const auto &[name, config] : service_configs) {
+    snapshot.configs.push_back(
+        ResolveConfig(config, FindEntry(default_configs, name)));
+  }
+  if (default_configs && default_configs != &service_configs) {
+    for (const auto &[name, config] : *default_configs) {
+      if (!service_configs.count(name)) {
+        snapshot.configs.push_back(config);
+      }
+    }
+  }
+  std::sort(snapshot.configs.begin(), snapshot.configs.end(),
+            [](const ConfigPtr &lhs, const ConfigPtr &rhs) {
+              return lhs->key.config_name.Get() < rhs->key.config_name.Get();
+            });
+  snapshot.configs_view.reserve(snapshot.configs.size());
+  snapshot.configs_by_name.reserve(snapshot.configs.size());
+  for (const auto &config : snapshot.configs) {
+    snapshot.configs_view.push_back(config.get());
+    snapshot.configs_by_name.emplace(config->key.config_name.Get(),
+                                     config.get());
+    snapshot.revision = std::max(snapshot.revision, config->revision);
+    if (IsAlive(config)) {
+      snapshot.updated_at =
+          std::max(snapshot.updated_at, config->updated_at.GetUnderlying());
+    }
+  }
+  auto &kill_switches = snapshot.kill_switches;
+  for (const auto *config : snapshot.configs_view) {
+    if (config->deleted_at) {
+      continue;
+    }
+    switch (config->mode) {
+    case uservice_dynconf::models::Mode::kKillSwitchEnabled:
+      kill_switches.enabled.push_back(config->key.config_name.Get());
+      break;
+    case uservice_dynconf::models::Mode::kKillSwitchDisabled:
+      kill_switches.disabled.push_back(config->key.config_name.Get());
+      break;
+    case uservice_dynconf::models::Mode::kDynamicConfig:
+      break;
+    }
+  }
+  kill_switches.body = uservice_dynconf::utils::MakeKillSwitchesResponse(
+      kill_switches.enabled, kill_switches.disabled);
+  kill_switches.etag = uservice_dynconf::utils::MakeETag(kill_switches.body);
+  snapshot.changelog = snapshot.configs_view;
+  std::stable_sort(snapshot.changelog.begin(), snapshot.changelog.end(),
+                   [](const Config *lhs, const Config *rhs) {
+                     return lhs->revision < rhs->revision;
+                   });
+  snapshot.body = uservice_dynconf::utils::MakeConfigsResponse(
+      snapshot.configs_view);
+  snapshot.etag = uservice_dynconf::utils::MakeETag(snapshot.body);
+  snapshot.memory_usage =
+      sizeof(snapshot) + snapshot.service.capacity() +
+      snapshot.body.capacity() + snapshot.etag.capacity() +
+      kill_switches.body.capacity() + kill_switches.etag.capacity() +
+      (kill_switches.enabled.capacity() + kill_switches.disabled.capacity()) *
+          sizeof(std::string_view) +
+      snapshot.configs.capacity() * sizeof(ConfigPtr) +
+      (snapshot.configs_view.capacity() + snapshot.changelog.capacity()) *
+          sizeof(const Config *) +
+      snapshot.configs_by_name.bucket_count() * sizeof(void *) +
+      snapshot.configs_by_name.size() *
+          (sizeof(decltype(snapshot.configs_by_name)::value_type) +
+           sizeof(void *));
+  return std::make_shared<const ConfigCacheContainer::ServiceSnapshot>(
+      std::move(snapshot));
+}
+
+// Snapshots are independent of each other, so with many of them they are
+// built by several tasks, see SnapshotBuildSettings. Tasks take services one
+// by one, as sizes of services differ a lot.
+std::vector<ServiceSnapshotPtr>
+BuildServiceSnapshots(const std::vector<ServiceToBuild> &services,
+                      const ServiceConfigs *default_configs,
+                      const SnapshotBuildSettings &settings) {
+  std::vector<ServiceSnapshotPtr> result(services.size());
+  std::atomic<std::size_t> next{0};
+  const auto build = [&] {
+    for (auto i = next++; i < services.size(); i = next++) {
+      const auto &[service, service_configs] = services[i];
+      result[i] =
+          BuildServiceSnapshot(*service, *service_configs, default_configs);
+    }
+  };
+
+  const auto tasks_count =
+      std::min(services.size() / kMinSnapshotsPerTask, settings.max_tasks);
+  auto *task_processor = settings.task_processor;
+  // Benchmarks and tools may run outside of the coroutine engine
+  if (tasks_count <= 1 ||
+      !userver::engine::current_task::IsTaskProcessorThread()) {
+    build();
+    return result;
+  }
+  std::vector<userver::engine::TaskWithResult<void>> tasks;
+  tasks.reserve(tasks_count - 1);
+  for (std::size_t i = 1; i < tasks_count; ++i) {
+    tasks.push_back(
+        task_processor
+            ? userver::utils::Async(*task_processor,
+                                    "configs-cache-build-snapshots", build)
+            : userver::utils::Async("configs-cache-build-snapshots", build));
+  }
+  build();
+  userver::engine::WaitAllChecked(tasks);
+  return result;
+}
+
+std::chrono::system_clock::time_point FromRevision(std::int64_t revision) {
+  return std::chrono::system_clock::time_point{
+      std::chrono::microseconds{revision}};
+}
+
+void HashDumpEntry(std::size_t &seed, std::string_view service,
+                   std::string_view config_name, std::string_view value,
+                   uservice_dynconf::models::Mode mode,
+                   std::chrono::system_clock::time_point updated_at,
+                   const std::optional<userver::storages::postgres::TimePointTz>
+                       &deleted_at,
+                   std::chrono::system_clock::time_point revision) {
+  const std::hash<std::string_view> hash;
+  boost::hash_combine(seed, hash(service));
+  boost::hash_combine(seed, hash(config_name));
+  boost::hash_combine(seed, hash(value));
+  boost::hash_combine(seed, static_cast<int>(mode));
+  boost::hash_combine(seed, uservice_dynconf::utils::ToRevision(updated_at));
+  if (deleted_at) {
+    boost::hash_combine(seed, uservice_dynconf::utils::ToRevision(
+                                  deleted_at->GetUnderlying()));
+  }
+  boost::hash_combine(seed, uservice_dynconf::utils::ToRevision(revision));
+}
+} // namespace
+
+void WriteDump(userver::dump::Writer &writer,
+               const ConfigCacheContainer &container) {
+  std::uint64_t count = 0;
+  for (const auto &[service, service_configs] :
+       container.configs_by_service_) {
+    count += service_configs->size();
+  }
+  writer.Write(kDumpVersion);
+  writer.Write(uservice_dynconf::utils::ToRevision(container.GetRevision()));
+  writer.Write(count);
+
+  std::size_t checksum = 0;
+  for (const auto &[service, service_configs] :
+       container.configs_by_service_) {
+    for (const auto &[name, config] : *service_configs) {
+      const auto &value = config->config_value.GetJson();
+      writer.Write(config->key.service.Get());
+      writer.Write(config->key.config_name.Get());
+      writer.Write(value);
+      writer.Write(static_cast<std::int32_t>(config->mode));
+      writer.Write(uservice_dynconf::utils::ToRevision(
+          config->updated_at.GetUnderlying()));
+      writer.Write(config->deleted_at.has_value());
+      if (config->deleted_at) {
+        writer.Write(uservice_dynconf::utils::ToRevision(
+            config->deleted_at->GetUnderlying()));
+      }
+      writer.Write(uservice_dynconf::utils::ToRevision(config->revision));
+      HashDumpEntry(checksum, config->key.service.Get(),
+                    config->key.config_name.Get(), value, config->mode,
+                    config->updated_at.GetUnderlying(), config->deleted_at,
+                    config->revision);
+    }
+  }
+  writer.Write(static_cast<std::uint64_t>(checksum));
+}
+
+ConfigCacheContainer ReadDump(userver::dump::Reader &reader,
+                              const SnapshotBuildSettings &settings) {
+  const auto version = reader.Read<std::uint32_t>();
+  if (version != kDumpVersion) {
+    throw userver::dump::Error(
+        fmt::format("Unsupported configs dump version {}, expected {}",
+                    version, kDumpVersion));
+  }
+  const auto revision = reader.Read<std::int64_t>();
+  const auto count = reader.Read<std::uint64_t>();
+
+  ConfigCacheContainer container;
+  std::size_t checksum = 0;
+  for (std::uint64_t i = 0; i < count; ++i) {
+    ConfigCacheContainer::Row row;
+    row.key.service = reader.Read<std::string>();
+    row.key.config_name = reader.Read<std::string>();
+    row.config_value = reader.Read<std::string>();
+    row.mode = static_cast<uservice_dynconf::models::Mode>(
+        reader.Read<std::int32_t>());
+    row.updated_at = userver::storages::postgres::TimePointTz{
+        FromRevision(reader.Read<std::int64_t>())};
+    if (reader.Read<bool>()) {
+      row.deleted_at = userver::storages::postgres::TimePointTz{
+          FromRevision(reader.Read<std::int64_t>())};
+    }
+    const auto config_revision = FromRevision(reader.Read<std::int64_t>());
+    HashDumpEntry(checksum, row.key.service, row.key.config_name,
+                  row.config_value, row.mode, row.updated_at.GetUnderlying(),
+                  row.deleted_at, config_revision);
+    auto key = row.key;
+    container.Apply(std::move(key), std::move(row), config_revision);
+  }
+  if (reader.Read<std::uint64_t>() != checksum) {
+    throw userver::dump::Error("Configs dump checksum mismatch");
+  }
+  if (uservice_dynconf::utils::ToRevision(container.GetRevision()) !=
+      revision) {
+    throw userver::dump::Error("Configs dump revision mismatch");
+  }
+  container.OnWritesDone(settings);
+  return container;
+}
+
+void DumpMetric(userver::utils::statistics::Writer &writer,
+                const ConfigCacheContainer &container) {
+  const auto &stats = container.GetUpdateStatistics();
+  writer["configs"] = container.size();
+  writer["services"] = container.GetServicesCount();
+  writer["last-update"]["rows-applied"] = stats.rows_applied;
+  writer["last-update"]["services-rebuilt"] = stats.services_rebuilt;
+  writer["last-update"]["build-time-us"] = stats.build_time.count();
+
+  const auto &memory = container.GetMemoryStatistics();
+  writer["memory-bytes"]["names"] = memory.names;
+  writer["memory-bytes"]["values"] = memory.values;
+  writer["memory-bytes"]["configs"] = memory.configs;
+  writer["memory-bytes"]["snapshots"] = memory.snapshots;
+}
+
+void ConfigCacheContainer::insert_or_assign(Key &&key, Row &&row) {
+  if (!update_base_revision_) {
+    update_base_revision_ =
+        previous_ ? std::max(revision_, previous_->revision_) : revision_;
+  }
+  const auto find_entry = [&key](const ConfigCacheContainer &container) {
+    const auto it = container.configs_by_service_.find(key.service);
+    return it != container.configs_by_service_.end()
+               ? FindEntry(it->second.get(), key.config_name)
+               : nullptr;
+  };
+  if (IsSameRow(find_entry(*this), row)) {
+    return;
+  }
+  // A row committed after an update that already read later ones may have
+  // an earlier `updated_at` than revisions served since then
+  auto revision = std::max(row.updated_at.GetUnderlying(),
+                           *update_base_revision_ +
+                               std::chrono::microseconds{1});
+  if (previous_) {
+    if (const auto previous = find_entry(*previous_);
+        IsSameRow(previous, row)) {
+      revision = previous->revision;
+    }
+  }
+  Apply(std::move(key), std::move(row), revision);
+}
+
+void ConfigCacheContainer::Apply(
+    Key &&key, Row &&row, std::chrono::system_clock::time_point revision) {
+  auto &bucket = configs_by_service_[key.service];
+  if (touched_services_.insert(key.service).second) {
+    // The bucket may be shared with older containers
+    bucket = bucket ? std::make_shared<ServiceConfigs>(*bucket)
+                    : std::make_shared<ServiceConfigs>();
+  }
+  ++pending_rows_;
+  revision_ = std::max(revision_, revision);
+  auto config = std::make_shared<const Config>(
+      Config{{InternName(key.service), InternName(key.config_name)},
+             InternValue(std::move(row.config_value)),
+             row.mode,
+             row.updated_at,
+             row.deleted_at,
+             revision});
+
+  auto &service_configs = *bucket;
+  // The key points into the name of the replaced config, so the entry is
+  // replaced too
+  if (auto it = service_configs.find(key.config_name);
+      it != service_configs.end()) {
+    if (IsAlive(it->second)) {
+      --size_;
+    }
+    service_configs.erase(it);
+    --entries_;
+  }
+  if (IsAlive(config)) {
+    ++size_;
+  }
+  service_configs.emplace(config->key.config_name.Get(), std::move(config));
+  ++entries_;
+}
+
+uservice_dynconf::models::SharedString
+ConfigCacheContainer::InternName(std::string_view name) {
+  if (auto it = pool_->names.find(name); it != pool_->names.end()) {
+    return it->second;
+  }
+  uservice_dynconf::models::SharedString interned{std::string{name}};
+  pool_->names_size += interned.Get().capacity();
+  pool_->names.emplace(interned.Get(), interned);
+  return interned;
+}
+
+uservice_dynconf::models::ConfigValue
+ConfigCacheContainer::InternValue(std::string &&json) {
+  if (auto it = pool_->values.find(json); it != pool_->values.end()) {
     return it->second;
   }
+  uservice_dynconf::models::ConfigValue interned{std::move(json)};
+  pool_->values_size += interned.GetJson().capacity();
+  pool_->values.emplace(interned.GetJson(), interned);
+  return interned;
+}
+
+void ConfigCacheContainer::InheritRevisions(
+    const ConfigCacheContainer &previous) {
+  previous_ = &previous;
+}
+
+bool ConfigCacheContainer::HasPendingRows() const { return pending_rows_ > 0; }
+
+void ConfigCacheContainer::OnWritesDone(
+    const SnapshotBuildSettings &settings) {
+  const auto start = std::chrono::steady_clock::now();
+  size_t services_rebuilt = 0;
+  const auto *default_configs = FindServiceConfigs(kDefaultService);
+  // Every effective config depends on `__default__` ones
+  const bool rebuild_all =
+      snapshots_.empty() ||
+      touched_services_.count(std::string{kDefaultService}) > 0;
+  std::vector<ServiceToBuild> to_build;
+  if (rebuild_all) {
+    to_build.reserve(configs_by_service_.size());
+    for (const auto &[service, service_configs] : configs_by_service_) {
+      to_build.emplace_back(&service, service_configs.get());
+    }
+  } else {
+    to_build.reserve(touched_services_.size());
+    for (const auto &service : touched_services_) {
+      const auto it = configs_by_service_.find(service);
+      to_build.emplace_back(&it->first, it->second.get());
+    }
+  }
+
+  for (auto &snapshot :
+       BuildServiceSnapshots(to_build, default_configs, settings)) {
+    // The key points into the old snapshot, so it is replaced too
+    if (auto it = snapshots_.find(snapshot->service); it != snapshots_.end()) {
+      snapshots_memory_ -= it->second->memory_usage;
+      snapshots_.erase(it);
+    }
+    snapshots_memory_ += snapshot->memory_usage;
+    snapshots_.emplace(snapshot->service, std::move(snapshot));
+    ++services_rebuilt;
+  }
+  touched_services_.clear();
+  previous_ = nullptr;
+  update_base_revision_.reset();
+  default_snapshot_ =
+      userver::utils::FindOrDefault(snapshots_, kDefaultService, nullptr);
+
+  update_statistics_.rows_applied = pending_rows_;
+  update_statistics_.services_rebuilt = services_rebuilt;
+  update_statistics_.build_time =
+      std::chrono::duration_cast<std::chrono::microseconds>(
+          std::chrono::steady_clock::now() - start);
+  pending_rows_ = 0;
+
+  // Pool sizes are copied, as the pool is shared with newer containers
+  memory_statistics_.names = pool_->names_size;
+  memory_statistics_.values = pool_->values_size;
+  memory_statistics_.configs =
+      entries_ * (sizeof(Config) + sizeof(ServiceConfigs::value_type) +
+                  // shared_ptr control block and hash map node
+                  4 * sizeof(void *));
+  memory_statistics_.snapshots = snapshots_memory_;
+}
+
+const ConfigCacheContainer::ServiceSnapshot *
+ConfigCacheContainer::FindServiceSnapshot(std::string_view service) const {
+  if (auto it = snapshots_.find(service); it != snapshots_.end()) {
+    return it->second.get();
+  }
+  return nullptr;
+}
+
+const ConfigCacheContainer::KillSwitches *
+ConfigCacheContainer::FindKillSwitches(std::string_view service) const {
+  const auto *snapshot = FindEffectiveSnapshot(service);
+  return snapshot ? &snapshot->kill_switches : nullptr;
+}
+
+ConfigCacheContainer::ConfigsSpan
+ConfigCacheContainer::FindConfigsByService(std::string_view service) const {
+  if (const auto *snapshot = FindEffectiveSnapshot(service); snapshot) {
+    return snapshot->configs_view;
+  }
   return {};
 }
 
-size_t ConfigCacheContainer::size() const { return configs_to_key_.size(); }
+ConfigCacheContainer::ConfigsSpan ConfigCacheContainer::FindChangedConfigs(
+    std::string_view service,
+    std::chrono::system_clock::time_point updated_since) const {
+  const auto *snapshot = FindEffectiveSnapshot(service);
+  if (!snapshot) {
+    return {};
+  }
+  const auto &changelog = snapshot->changelog;
+  const auto it = std::lower_bound(
+      changelog.begin(), changelog.end(), updated_since,
+      [](const Config *config, std::chrono::system_clock::time_point time) {
+        return config->revision < time;
+      });
+  return {changelog.data() + (it - changelog.begin()),
+          changelog.data() + changelog.size()};
+}
+
+size_t ConfigCacheContainer::size() const { return size_; }
+
+std::chrono::system_clock::time_point
+ConfigCacheContainer::GetRevision() const {
+  return revision_;
+}
+
+std::vector<const ConfigCacheContainer::Config *>
+ConfigCacheContainer::GetAllConfigs() const {
+  std::vector<const Config *> result;
+  result.reserve(size_);
+  for (const auto &[service, service_configs] : configs_by_service_) {
+    for (const auto &[name, config] : *service_configs) {
+      if (IsAlive(config)) {
+        result.push_back(config.get());
+      }
+    }
+  }
+  return result;
+}
+
+size_t ConfigCacheContainer::GetServicesCount() const {
+  return configs_by_service_.size();
+}
+
+const ConfigCacheContainer::UpdateStatistics &
+ConfigCacheContainer::GetUpdateStatistics() const {
+  return update_statistics_;
+}
+
+const ConfigCacheContainer::MemoryStatistics &
+ConfigCacheContainer::GetMemoryStatistics() const {
+  return memory_statistics_;
+}
+
+const ConfigCacheContainer::ServiceConfigs *
+ConfigCacheContainer::FindServiceConfigs(std::string_view service) const {
+  if (auto it = configs_by_service_.find(std::string{service});
+      it != configs_by_service_.end()) {
+    return it->second.get();
+  }
+  return nullptr;
+}
+
+const ConfigCacheContainer::ServiceSnapshot *
+ConfigCacheContainer::FindEffectiveSnapshot(std::string_view service) const {
+  if (const auto *snapshot = FindServiceSnapshot(service); snapshot) {
+    return snapshot;
+  }
+  return default_snapshot_.get();
+}
 
 ConfigCacheContainer::ConfigPtr
 ConfigCacheContainer::FindConfig(const ConfigCacheContainer::Key &key) const {
-  if (auto c_ptr = userver::utils::FindOrDefault(configs_to_key_, key, nullptr);
-      c_ptr) {
-    return c_ptr;
+  const auto *snapshot = FindEffectiveSnapshot(key.service);
+  if (!snapshot) {
+    return nullptr;
   }
-  return userver::utils::FindOrDefault(
-      configs_to_key_,
-      ConfigCacheContainer::Key{{kDefaultService}, key.config_name}, nullptr);
+  const auto it = FindByName(snapshot->configs, key.config_name);
+  return it != snapshot->configs.end() && IsAlive(*it) ? *it : nullptr;
 }
 
-std::vector<ConfigCacheContainer::ConfigPtr>
+std::vector<const ConfigCacheContainer::Config *>
 ConfigCacheContainer::FindConfigs(std::string_view service,
                                   const std::vector<std::string> &ids) const {
-  std::vector<ConfigCacheContainer::ConfigPtr> result{};
+  const auto *snapshot = FindEffectiveSnapshot(service);
+  if (!snapshot) {
+    return {};
+  }
+  std::vector<const Config *> result{};
   result.reserve(ids.size());
   for (const auto &id : ids) {
-    if (auto c_ptr = userver::utils::FindOrDefault(
-            configs_to_key_, Key{service.data(), id}, nullptr);
-        c_ptr) {
-      result.emplace_back(c_ptr);
-      continue;
-    }
-    if (auto c_ptr = userver::utils::FindOrDefault(
-            configs_to_key_, ConfigCacheContainer::Key{{kDefaultService}, id},
-            nullptr);
-        c_ptr) {
-      result.emplace_back(c_ptr);
+    if (const auto *config = userver::utils::FindOrDefault(
+            snapshot->configs_by_name, id, nullptr);
+        config) {
+      result.push_back(config);
     }
   }
+  std::sort(result.begin(), result.end(),
+            [](const Config *lhs, const Config *rhs) {
+              return lhs->key.config_name.Get() < rhs->key.config_name.Get();
+            });
+  result.erase(std::unique(result.begin(), result.end()), result.end());
   return result;
 }
 
+void ConfigCacheContainer::AppendConfigsByPrefixes(
+    std::string_view service, const std::vector<std::string> &prefixes,
+    std::vector<const Config *> &configs) const {
+  const auto *snapshot = FindEffectiveSnapshot(service);
+  if (!snapshot || prefixes.empty()) {
+    return;
+  }
+  // Prefixes covered by shorter ones are dropped, so that the ranges do
+  // not overlap
+  std::vector<std::string_view> sorted_prefixes(prefixes.begin(),
+                                                prefixes.end());
+  std::sort(sorted_prefixes.begin(), sorted_prefixes.end());
+  std::vector<std::string_view> unique_prefixes;
+  for (const auto prefix : sorted_prefixes) {
+    if (unique_prefixes.empty() ||
+        prefix.substr(0, unique_prefixes.back().size()) !=
+            unique_prefixes.back()) {
+      unique_prefixes.push_back(prefix);
+    }
+  }
+
+  const std::unordered_set<const Config *> requested(configs.begin(),
+                                                     configs.end());
+  const auto &view = snapshot->configs_view;
+  for (const auto prefix : unique_prefixes) {
+    auto it = std::lower_bound(view.begin(), view.end(), prefix,
+                               [](const Config *config, std::string_view name) {
+                                 return config->key.config_name.Get() < name;
+                               });
+    for (; it != view.end(); ++it) {
+      const std::string_view name = (*it)->key.config_name.Get();
+      if (name.substr(0, prefix.size()) != prefix) {
+        break;
+      }
+      if (!requested.count(*it)) {
+        configs.push_back(*it);
+      }
+    }
+  }
+}
+
+ConfigsCache::ConfigsCache(
+    const userver::components::ComponentConfig &config,
+    const userver::components::ComponentContext &context)
+    : CachingComponentBase(config, context),
+      cluster_(context
+                   .FindComponent<userver::components::Postgres>(
+                       config["pgcomponent"].As<std::string>())
+                   .GetCluster()),
+      update_correction_(
+          config["update-correction"].As<std::chrono::milliseconds>(
+              std::chrono::milliseconds{0})),
+      chunk_size_(config["chunk-size"].As<std::size_t>(1000)),
+      full_update_timeout_(
+          config["full-update-op-timeout"].As<std::chrono::milliseconds>(
+              std::chrono::minutes{1})),
+      incremental_update_timeout_(
+          config["incremental-update-op-timeout"]
+              .As<std::chrono::milliseconds>(std::chrono::seconds{1})) {
+  build_settings_.max_tasks = std::max<std::size_t>(
+      config["snapshot-build-max-tasks"].As<std::size_t>(4), 1);
+  if (const auto task_processor =
+          config["snapshot-build-task-processor"].As<std::string>({});
+      !task_processor.empty()) {
+    build_settings_.task_processor = &context.GetTaskProcessor(task_processor);
+  }
+  StartPeriodicUpdates();
+}
+
+ConfigsCache::~ConfigsCache() { StopPeriodicUpdates(); }
+
+void ConfigsCache::Update(
+    userver::cache::UpdateType type,
+    const std::chrono::system_clock::time_point &last_update,
+    const std::chrono::system_clock::time_point & /*now*/,
+    userver::cache::UpdateStatisticsScope &stats_scope) {
+  namespace pg = userver::storages::postgres;
+  const auto full = type == userver::cache::UpdateType::kFull;
+  const auto current = GetUnsafe();
+  // Incremental updates apply rows to a copy sharing unchanged services
+  auto data = full || !current
+                  ? std::make_unique<ConfigCacheContainer>()
+                  : std::make_unique<ConfigCacheContainer>(*current);
+  if (full && current) {
+    data->InheritRevisions(*current);
+  }
+
+  const auto timeout =
+      full ? full_update_timeout_ : incremental_update_timeout_;
+  auto trx = cluster_->Begin(pg::ClusterHostType::kSlave, pg::Transaction::RO,
+                             pg::CommandControl{timeout, timeout});
+  auto portal =
+      full || !current
+          ? trx.MakePortal(kSelectAllConfigs)
+          : trx.MakePortal(kSelectChangedConfigs,
+                           pg::TimePointTz{last_update - update_correction_});
+  while (portal) {
+    auto result = portal.Fetch(chunk_size_);
+    stats_scope.IncreaseDocumentsReadCount(result.Size());
+    for (auto row : result.AsSetOf<ConfigCacheContainer::Row>(pg::kRowTag)) {
+      auto key = row.key;
+      data->insert_or_assign(std::move(key), std::move(row));
+    }
+  }
+  trx.Commit();
+
+  if (!full && current && !data->HasPendingRows()) {
+    stats_scope.FinishNoChanges();
+    return;
+  }
+  data->OnWritesDone(build_settings_);
+  stats_scope.Finish(data->size());
+  Set(std::move(data));
+}
+
+void ConfigsCache::WriteContents(userver::dump::Writer &writer,
+                                 const ConfigCacheContainer &contents) const {
+  WriteDump(writer, contents);
+}
+
+std::unique_ptr<const ConfigCacheContainer>
+ConfigsCache::ReadContents(userver::dump::Reader &reader) const {
+  return std::make_unique<const ConfigCacheContainer>(
+      ReadDump(reader, build_settings_));
+}
+
+userver::yaml_config::Schema ConfigsCache::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::components::CachingComponentBase<ConfigCacheContainer>>(R"(
+type: object
+description: configs of all services read from PostgreSQL
+additionalProperties: false
+properties:
+    pgcomponent:
+        type: string
+        description: name of the PostgreSQL component to read configs from
+    update-correction:
+        type: string
+        description: |
+            how much earlier than the previous update incremental updates
+            start reading, covers transactions committed after it with an
+            earlier `updated_at`
+        defaultDescription: 0s
+    chunk-size:
+        type: integer
+        description: rows per fetch of an update
+        defaultDescription: 1000
+        minimum: 1
+    full-update-op-timeout:
+        type: string
+        description: timeout of the queries of a full update
+        defaultDescription: 1m
+    incremental-update-op-timeout:
+        type: string
+        description: timeout of the queries of an incremental update
+        defaultDescription: 1s
+    snapshot-build-task-processor:
+        type: string
+        description: |
+            task processor to build snapshots on besides the update task,
+            the one of the update if not set
+    snapshot-build-max-tasks:
+        type: integer
+        description: |
+            max number of tasks building snapshots at once, including the
+            update task
+        defaultDescription: 4
+        minimum: 1
+)");
+}
+
 } // namespace uservice_dynconf::cache::settings_cache
@@ -1,42 +1,248 @@
 #pragma once
 
+#include <chrono>
 #include <memory>
+#include <optional>
+#include <string>
 #include <unordered_map>
-#include <userver/cache/base_postgres_cache.hpp>
+#include <unordered_set>
+#include <userver/cache/caching_component_base.hpp>
+#include <userver/components/component_config.hpp>
+#include <userver/components/component_context.hpp>
+#include <userver/dump/operations.hpp>
+#include <userver/engine/task/task_processor_fwd.hpp>
 #include <userver/storages/postgres/io/chrono.hpp>
+#include <userver/storages/postgres/postgres_fwd.hpp>
+#include <userver/utils/span.hpp>
+#include <userver/utils/statistics/writer.hpp>
+#include <userver/yaml_config/schema.hpp>
+#include <vector>
 
 #include "models/config.hpp"
 
 namespace uservice_dynconf::cache::settings_cache {
 
+// How prebuilt service snapshots are built on cache updates. With many
+// services they are built by up to `max_tasks` tasks at once: the update
+// itself and the rest on `task_processor`, or on the task processor of the
+// update if it is not set.
+struct SnapshotBuildSettings {
+  std::size_t max_tasks = 1;
+  userver::engine::TaskProcessor *task_processor = nullptr;
+};
+
 class ConfigCacheContainer {
 public:
   using Key = uservice_dynconf::models::Key;
+  using Row = uservice_dynconf::models::ConfigRow;
   using Config = uservice_dynconf::models::Config;
   using ConfigPtr = std::shared_ptr<const Config>;
+  // Keys point to names of the configs
+  using ServiceConfigs = std::unordered_map<std::string_view, ConfigPtr>;
+  // Borrowed from a container, valid while the container is alive
+  using ConfigsSpan = userver::utils::span<const Config *const>;
+
+  // Names of alive kill switches of a service, sorted, and the response for
+  // all of them
+  struct KillSwitches {
+    std::vector<std::string_view> enabled;
+    std::vector<std::string_view> disabled;
+    std::string body;
+    std::string etag;
+  };
+
+  // Effective configs of a service (own configs merged over `__default__`,
+  // including tombstones of deleted ones) and the response for them.
+  // Rebuilt only for services changed by a cache update, or for all of them
+  // if `__default__` changed. Configs are sorted by name.
+  struct ServiceSnapshot {
+    std::string service;
+    std::vector<ConfigPtr> configs;
+    std::vector<const Config *> configs_view;
+    std::unordered_map<std::string_view, const Config *> configs_by_name;
+    // Same configs ordered by revision
+    std::vector<const Config *> changelog;
+    std::string body;
+    std::string etag;
+    std::chrono::system_clock::time_point updated_at;
+    // Max revision including tombstones
+    std::chrono::system_clock::time_point revision;
+    KillSwitches kill_switches;
+    // Approximate memory taken by the snapshot itself, configs are shared
+    // with the container
+    size_t memory_usage = 0;
+  };
 
-  void insert_or_assign(Key &&key, Config &&config);
+  // Stats of the last cache update applied to the container
+  struct UpdateStatistics {
+    size_t rows_applied = 0;
+    size_t services_rebuilt = 0;
+    std::chrono::microseconds build_time{0};
+  };
+
+  // Approximate memory taken by the container in bytes
+  struct MemoryStatistics {
+    size_t names = 0;
+    size_t values = 0;
+    size_t configs = 0;
+    size_t snapshots = 0;
+  };
+
+  // Rows equal to the current configs, e.g. ones read again because of the
+  // update correction, are skipped. Other rows get a revision after
+  // everything the container had before the update, unless their
+  // `updated_at` is later.
+  void insert_or_assign(Key &&key, Row &&row);
   size_t size() const;
 
+  // Called by a full update before applying rows, so that configs unchanged
+  // since `previous` keep their revisions. `previous` must stay alive until
+  // OnWritesDone().
+  void InheritRevisions(const ConfigCacheContainer &previous);
+  // Whether rows were applied since the last OnWritesDone()
+  bool HasPendingRows() const;
+  // Called by the cache after all rows of an update are applied.
+  void OnWritesDone(const SnapshotBuildSettings &settings);
+
+  // Services without own configs get the `__default__` ones from all the
+  // lookups below, as if all their overrides were deleted.
+
+  // Snapshot of the service own configs merged over `__default__` ones,
+  // nullptr for services without own configs
+  const ServiceSnapshot *FindServiceSnapshot(std::string_view service) const;
+  // Snapshot of the service, or of `__default__` for unknown services.
+  // nullptr if there are no configs at all.
+  const ServiceSnapshot *FindEffectiveSnapshot(std::string_view service) const;
+  const KillSwitches *FindKillSwitches(std::string_view service) const;
+
+  // Returns the effective config, nullptr if it is missing or deleted.
   ConfigPtr FindConfig(const Key &key) const;
-  std::vector<ConfigPtr> FindConfigsByService(std::string_view service) const;
-  std::vector<ConfigPtr> FindConfigs(std::string_view service,
-                                     const std::vector<std::string> &ids) const;
+  // Return effective configs including tombstones (configs with
+  // `deleted_at`), so that deletions are visible to revision checks.
+  ConfigsSpan FindConfigsByService(std::string_view service) const;
+  // Configs of the service with `revision >= updated_since`, in
+  // O(log n + changes)
+  ConfigsSpan
+  FindChangedConfigs(std::string_view service,
+                     std::chrono::system_clock::time_point updated_since) const;
+  // Configs with the ids sorted by name, each one once however many times
+  // it is requested, so that queries differing only in the order or
+  // repeats of ids get the same response
+  std::vector<const Config *>
+  FindConfigs(std::string_view service,
+              const std::vector<std::string> &ids) const;
+  // Appends configs of the service with names starting with any of the
+  // prefixes, skipping ones already in `configs`. Each prefix costs
+  // O(log n + matches) over the sorted configs of the snapshot.
+  void AppendConfigsByPrefixes(std::string_view service,
+                               const std::vector<std::string> &prefixes,
+                               std::vector<const Config *> &configs) const;
+
+  // Max revision of all configs including tombstones
+  std::chrono::system_clock::time_point GetRevision() const;
+  // Own (not merged) configs of all services, without tombstones
+  std::vector<const Config *> GetAllConfigs() const;
+  size_t GetServicesCount() const;
+  const UpdateStatistics &GetUpdateStatistics() const;
+  const MemoryStatistics &GetMemoryStatistics() const;
 
 private:
-  std::unordered_map<Key, ConfigPtr> configs_to_key_;
-  std::unordered_map<std::string, std::vector<ConfigPtr>> configs_by_service_;
-};
+  friend void WriteDump(userver::dump::Writer &writer,
+                        const ConfigCacheContainer &container);
+  friend ConfigCacheContainer ReadDump(userver::dump::Reader &reader,
+                                       const SnapshotBuildSettings &settings);
+
+  void Apply(Key &&key, Row &&row,
+             std::chrono::system_clock::time_point revision);
+
+  const ServiceConfigs *FindServiceConfigs(std::string_view service) const;
 
-struct ConfigCachePolicy {
-  static constexpr auto kName = "configs-cache";
-  using ValueType = uservice_dynconf::models::Config;
-  using CacheContainer = ConfigCacheContainer;
-  static constexpr auto kKeyMember = &uservice_dynconf::models::Config::key;
-  static userver::storages::postgres::Query kQuery;
-  static constexpr auto kUpdatedField = "updated_at";
-  using UpdatedFieldType = userver::storages::postgres::TimePointTz;
+  using ServiceSnapshotPtr = std::shared_ptr<const ServiceSnapshot>;
+
+  // Distinct names and values of configs. Shared by the copies made for
+  // incremental updates, a full update starts with an empty pool.
+  struct InternPool {
+    std::unordered_map<std::string_view, uservice_dynconf::models::SharedString>
+        names;
+    std::unordered_map<std::string_view, uservice_dynconf::models::ConfigValue>
+        values;
+    size_t names_size = 0;
+    size_t values_size = 0;
+  };
+
+  uservice_dynconf::models::SharedString InternName(std::string_view name);
+  uservice_dynconf::models::ConfigValue InternValue(std::string &&json);
+
+  std::shared_ptr<InternPool> pool_ = std::make_shared<InternPool>();
+  // Buckets are shared with the container copies made for incremental
+  // updates and are copied on the first write of an update, so an update
+  // costs O(services + configs of changed services) instead of O(configs).
+  std::unordered_map<std::string, std::shared_ptr<ServiceConfigs>>
+      configs_by_service_;
+  // Keys point to `ServiceSnapshot::service` of the values, so lookups by
+  // std::string_view do not allocate.
+  std::unordered_map<std::string_view, ServiceSnapshotPtr> snapshots_;
+  ServiceSnapshotPtr default_snapshot_;
+  // Services changed since the last OnWritesDone(), their buckets are
+  // owned by this container
+  std::unordered_set<std::string> touched_services_;
+  std::chrono::system_clock::time_point revision_;
+  // Set by InheritRevisions() for the time of a full update
+  const ConfigCacheContainer *previous_ = nullptr;
+  // Revision before the current update, set by its first row
+  std::optional<std::chrono::system_clock::time_point> update_base_revision_;
+  size_t size_ = 0;
+  // Rows applied since the last OnWritesDone()
+  size_t pending_rows_ = 0;
+  // Entries in configs_by_service_ including tombstones
+  size_t entries_ = 0;
+  size_t snapshots_memory_ = 0;
+  UpdateStatistics update_statistics_;
+  MemoryStatistics memory_statistics_;
 };
 
-using ConfigsCache = ::userver::components::PostgreCache<ConfigCachePolicy>;
+// Cache dump of all configs including tombstones, so that a restarted
+// service can serve configs and catch up incrementally without a full read
+// of the database.
+void WriteDump(userver::dump::Writer &writer,
+               const ConfigCacheContainer &container);
+ConfigCacheContainer ReadDump(userver::dump::Reader &reader,
+                              const SnapshotBuildSettings &settings);
+
+// Size of the container and stats of the last update
+void DumpMetric(userver::utils::statistics::Writer &writer,
+                const ConfigCacheContainer &container);
+
+// Configs of all services read from PostgreSQL, see ConfigCacheContainer.
+// Incremental updates read rows with `updated_at` since the previous update
+// minus `update-correction`, the same way PostgreCache does.
+class ConfigsCache final
+    : public userver::components::CachingComponentBase<ConfigCacheContainer> {
+public:
+  static constexpr std::string_view kName = "configs-cache";
+
+  ConfigsCache(const userver::components::ComponentConfig &config,
+               const userver::components::ComponentContext &context);
+  ~ConfigsCache() override;
+
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+private:
+  void Update(userver::cache::UpdateType type,
+              const std::chrono::system_clock::time_point &last_update,
+              const std::chrono::system_clock::time_point &now,
+              userver::cache::UpdateStatisticsScope &stats_scope) override;
+
+  void WriteContents(userver::dump::Writer &writer,
+                     const ConfigCacheContainer &contents) const override;
+  std::unique_ptr<const ConfigCacheContainer>
+  ReadContents(userver::dump::Reader &reader) const override;
+
+  userver::storages::postgres::ClusterPtr cluster_;
+  const std::chrono::milliseconds update_correction_;
+  const std::size_t chunk_size_;
+  const std::chrono::milliseconds full_update_timeout_;
+  const std::chrono::milliseconds incremental_update_timeout_;
+  SnapshotBuildSettings build_settings_;
+};
 } // namespace uservice_dynconf::cache::settings_cache
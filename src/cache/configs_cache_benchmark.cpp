@@ -0,0 +1,278 @@
+#include "cache/configs_cache.hpp"
+
+#include <benchmark/benchmark.h>
+#include <fmt/format.h>
+#include <fmt/ranges.h>
+#include <userver/engine/run_standalone.hpp>
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstdlib>
+#include <memory>
+#include <new>
+#include <string>
+#include <vector>
+
+namespace {
+// Heap allocations made by the current thread, see operator new below
+thread_local std::size_t allocations_count = 0;
+} // namespace
+
+// All replaceable forms are counted, so that no allocation is missed and
+// memory is always freed by the function matching the allocating one
+void *operator new(std::size_t size, const std::nothrow_t &) noexcept {
+  ++allocations_count;
+  return std::malloc(size ? size : 1);
+}
+
+void *operator new(std::size_t size) {
+  if (void *ptr = operator new(size, std::nothrow)) {
+    return ptr;
+  }
+  throw std::bad_alloc{};
+}
+
+void *operator new[](std::size_t size) { return operator new(size); }
+
+void *operator new[](std::size_t size, const std::nothrow_t &) noexcept {
+  return operator new(size, std::nothrow);
+}
+
+void *operator new(std::size_t size, std::align_val_t alignment,
+                   const std::nothrow_t &) noexcept {
+  ++allocations_count;
+  const auto align = static_cast<std::size_t>(alignment);
+  // aligned_alloc needs a size that is a multiple of the alignment
+  const auto aligned_size =
+      (std::max<std::size_t>(size, 1) + align - 1) / align * align;
+  return std::aligned_alloc(align, aligned_size);
+}
+
+void *operator new(std::size_t size, std::align_val_t alignment) {
+  if (void *ptr = operator new(size, alignment, std::nothrow)) {
+    return ptr;
+  }
+  throw std::bad_alloc{};
+}
+
+void *operator new[](std::size_t size, std::align_val_t alignment) {
+  return operator new(size, alignment);
+}
+
+void *operator new[](std::size_t size, std::align_val_t alignment,
+                     const std::nothrow_t &) noexcept {
+  return operator new(size, alignment, std::nothrow);
+}
+
+void operator delete(void *ptr) noexcept { std::free(ptr); }
+void operator delete(void *ptr, std::size_t) noexcept { std::free(ptr); }
+void operator delete(void *ptr, const std::nothrow_t &) noexcept {
+  std::free(ptr);
+}
+void operator delete[](void *ptr) noexcept { std::free(ptr); }
+void operator delete[](void *ptr, std::size_t) noexcept { std::free(ptr); }
+void operator delete[](void *ptr, const std::nothrow_t &) noexcept {
+  std::free(ptr);
+}
+
+void operator delete(void *ptr, std::align_val_t) noexcept { std::free(ptr); }
+void operator delete(void *ptr, std::size_t, std::align_val_t) noexcept {
+  std::free(ptr);
+}
+void operator delete(void *ptr, std::align_val_t,
+                     const std::nothrow_t &) noexcept {
+  std::free(ptr);
+}
+void operator delete[](void *ptr, std::align_val_t) noexcept {
+  std::free(ptr);
+}
+void operator delete[](void *ptr, std::size_t, std::align_val_t) noexcept {
+  std::free(ptr);
+}
+void operator delete[](void *ptr, std::align_val_t,
+                       const std::nothrow_t &) noexcept {
+  std::free(ptr);
+}
+
+namespace uservice_dynconf::cache::settings_cache {
+
+namespace {
+constexpr std::size_t kServices = 100;
+constexpr std::size_t kConfigsPerService = 500;
+const std::string kHotService = "service-42";
+
+void AddConfig(ConfigCacheContainer &container, const std::string &service,
+               std::size_t index, std::string value) {
+  uservice_dynconf::models::Key key{service, fmt::format("CONFIG_{}", index)};
+  auto key_copy = key;
+  container.insert_or_assign(
+      std::move(key_copy),
+      {std::move(key), std::move(value),
+       uservice_dynconf::models::Mode::kDynamicConfig,
+       userver::storages::postgres::TimePointTz{
+           std::chrono::system_clock::now()},
+       std::nullopt});
+}
+
+ConfigCacheContainer MakeContainer(std::size_t services,
+                                   std::size_t configs_per_service) {
+  ConfigCacheContainer container;
+  const auto add = [&](const std::string &service, std::size_t index) {
+    AddConfig(container, service, index, std::to_string(index));
+  };
+  for (std::size_t i = 0; i < configs_per_service; ++i) {
+    add("__default__", i);
+  }
+  for (std::size_t s = 0; s < services; ++s) {
+    // Every service overrides a tenth of the defaults
+    for (std::size_t i = 0; i < configs_per_service; i += 10) {
+      add(fmt::format("service-{}", s), i);
+    }
+  }
+  container.OnWritesDone({});
+  return container;
+}
+
+// Rows of a full update: services with kReloadConfigsPerService configs
+// each, values range from scalars to objects of a few KB
+constexpr std::size_t kReloadConfigsPerService = 100;
+
+std::vector<uservice_dynconf::models::ConfigRow> MakeRows(std::size_t count) {
+  std::vector<uservice_dynconf::models::ConfigRow> rows;
+  rows.reserve(count);
+  const userver::storages::postgres::TimePointTz updated_at{
+      std::chrono::system_clock::now()};
+  for (std::size_t i = 0; i < count; ++i) {
+    const auto service =
+        i < kReloadConfigsPerService
+            ? std::string{"__default__"}
+            : fmt::format("service-{}", i / kReloadConfigsPerService);
+    std::string value = std::to_string(i);
+    if (i % 100 == 0) {
+      value = fmt::format("{{\"blob\": \"{}\"}}", std::string(4096, 'x'));
+    } else if (i % 10 == 0) {
+      value = fmt::format("{{\"enabled\": true, \"items\": [{}]}}",
+                          fmt::join(std::vector<std::size_t>(100, i), ", "));
+    }
+    rows.push_back({{service, fmt::format("CONFIG_{}", i % 1000)},
+                    std::move(value),
+                    uservice_dynconf::models::Mode::kDynamicConfig,
+                    updated_at,
+                    std::nullopt});
+  }
+  return rows;
+}
+
+const ConfigCacheContainer &GetContainer() {
+  static const auto container = MakeContainer(kServices, kConfigsPerService);
+  return container;
+}
+} // namespace
+
+// Reference point: what every request paid when the lookup returned
+// a copy of `std::vector<std::shared_ptr<const Config>>`
+void FindConfigsByServiceCopy(benchmark::State &state) {
+  const auto &container = GetContainer();
+  for (auto _ : state) {
+    const auto copy = container.FindServiceSnapshot(kHotService)->configs;
+    std::size_t total = 0;
+    for (const auto &config : copy) {
+      total += config->key.config_name.Get().size();
+    }
+    benchmark::DoNotOptimize(total);
+  }
+}
+BENCHMARK(FindConfigsByServiceCopy)->ThreadRange(8, 64)->UseRealTime();
+
+void FindConfigsByService(benchmark::State &state) {
+  const auto &container = GetContainer();
+  for (auto _ : state) {
+    std::size_t total = 0;
+    for (const auto *config : container.FindConfigsByService(kHotService)) {
+      total += config->key.config_name.Get().size();
+    }
+    benchmark::DoNotOptimize(total);
+  }
+}
+BENCHMARK(FindConfigsByService)->ThreadRange(8, 64)->UseRealTime();
+
+void FindConfigs(benchmark::State &state) {
+  const auto &container = GetContainer();
+  std::vector<std::string> ids;
+  for (std::int64_t i = 0; i < state.range(0); ++i) {
+    // Ids past kConfigsPerService are missing, like unknown ids in requests
+    ids.push_back(fmt::format("CONFIG_{}", i * 2));
+  }
+  const auto allocations_before = allocations_count;
+  for (auto _ : state) {
+    benchmark::DoNotOptimize(container.FindConfigs(kHotService, ids));
+  }
+  state.counters["allocations"] =
+      benchmark::Counter(allocations_count - allocations_before,
+                         benchmark::Counter::kAvgIterations);
+}
+BENCHMARK(FindConfigs)->Arg(10)->Arg(100)->Arg(1000);
+
+void FindConfigsByPrefix(benchmark::State &state) {
+  const auto &container = GetContainer();
+  // Matches CONFIG_1, CONFIG_10..CONFIG_19 and CONFIG_100..CONFIG_199
+  const std::vector<std::string> prefixes{"CONFIG_1"};
+  for (auto _ : state) {
+    std::vector<const uservice_dynconf::models::Config *> configs;
+    container.AppendConfigsByPrefixes(kHotService, prefixes, configs);
+    benchmark::DoNotOptimize(configs);
+  }
+}
+BENCHMARK(FindConfigsByPrefix);
+
+// Incremental update with a single changed row, as done by ConfigsCache:
+// the current container is copied and the row is applied to the copy
+void IncrementalUpdate(benchmark::State &state) {
+  const auto services = static_cast<std::size_t>(state.range(0));
+  const auto container = MakeContainer(services, kConfigsPerService);
+  std::size_t iteration = 0;
+  for (auto _ : state) {
+    auto updated = std::make_unique<ConfigCacheContainer>(container);
+    AddConfig(*updated, "service-1", 0, std::to_string(++iteration));
+    updated->OnWritesDone({});
+    benchmark::DoNotOptimize(updated);
+  }
+  state.counters["rows"] = container.size();
+}
+BENCHMARK(IncrementalUpdate)
+    ->RangeMultiplier(10)
+    ->Range(10, 1000)
+    ->Unit(benchmark::kMicrosecond);
+
+// Full update as done by ConfigsCache: all rows are applied to an empty
+// container, then snapshots of all services are built. Snapshots are built
+// in parallel by up to `threads` tasks.
+void FullReload(benchmark::State &state) {
+  const auto rows = MakeRows(state.range(0));
+  SnapshotBuildSettings settings;
+  settings.max_tasks = state.range(1);
+  userver::engine::RunStandalone(state.range(1), [&] {
+    for (auto _ : state) {
+      state.PauseTiming();
+      auto rows_copy = rows;
+      state.ResumeTiming();
+
+      ConfigCacheContainer container;
+      for (auto &row : rows_copy) {
+        auto key = row.key;
+        container.insert_or_assign(std::move(key), std::move(row));
+      }
+      container.OnWritesDone(settings);
+      benchmark::DoNotOptimize(container);
+    }
+  });
+  state.counters["rows"] = rows.size();
+}
+BENCHMARK(FullReload)
+    ->ArgsProduct({{10'000, 100'000, 1'000'000}, {1, 4, 8}})
+    ->ArgNames({"rows", "threads"})
+    ->Unit(benchmark::kMillisecond)
+    ->UseRealTime();
+
+} // namespace uservice_dynconf::cache::settings_cache
@@ -0,0 +1,72 @@
+#include "configs_cache_notifier.hpp"
+#include "userver/engine/sleep.hpp"
+#include "userver/engine/task/cancel.hpp"
+#include "userver/logging/log.hpp"
+#include "userver/storages/postgres/cluster.hpp"
+#include "userver/storages/postgres/component.hpp"
+#include "userver/storages/postgres/exceptions.hpp"
+#include "userver/utils/async.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+
+namespace uservice_dynconf::cache::settings_cache {
+
+ConfigsCacheNotifier::ConfigsCacheNotifier(
+    const userver::components::ComponentConfig &config,
+    const userver::components::ComponentContext &context)
+    : LoggableComponentBase(config, context),
+      cache_(context.FindComponent<ConfigsCache>()),
+      cluster_(context
+                   .FindComponent<userver::components::Postgres>(
+                       config["pgcomponent"].As<std::string>())
+                   .GetCluster()),
+      channel_(config["channel"].As<std::string>()),
+      retry_interval_(config["retry-interval"].As<std::chrono::milliseconds>(
+          std::chrono::seconds{1})) {
+  listen_task_ =
+      userver::utils::CriticalAsync(std::string{kName}, [this] { Listen(); });
+}
+
+ConfigsCacheNotifier::~ConfigsCacheNotifier() { listen_task_.SyncCancel(); }
+
+void ConfigsCacheNotifier::Listen() {
+  while (!userver::engine::current_task::ShouldCancel()) {
+    try {
+      auto scope = cluster_->Listen(channel_);
+      // Changes made while we were not listening
+      cache_.InvalidateAsync(userver::cache::UpdateType::kIncremental);
+      while (!userver::engine::current_task::ShouldCancel()) {
+        scope.WaitNotify(userver::engine::Deadline{});
+        cache_.InvalidateAsync(userver::cache::UpdateType::kIncremental);
+      }
+    } catch (const userver::storages::postgres::Error &e) {
+      if (userver::engine::current_task::ShouldCancel()) {
+        break;
+      }
+      LOG_WARNING() << "Failed to listen for notifications on '" << channel_
+                    << "', retrying: " << e;
+      userver::engine::InterruptibleSleepFor(retry_interval_);
+    }
+  }
+}
+
+userver::yaml_config::Schema ConfigsCacheNotifier::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::components::LoggableComponentBase>(R"(
+type: object
+description: requests configs-cache updates on PostgreSQL notifications
+additionalProperties: false
+properties:
+    pgcomponent:
+        type: string
+        description: name of the PostgreSQL component to listen on
+    channel:
+        type: string
+        description: notification channel
+    retry-interval:
+        type: string
+        description: delay before listening again after an error
+        defaultDescription: 1s
+)");
+}
+
+} // namespace uservice_dynconf::cache::settings_cache
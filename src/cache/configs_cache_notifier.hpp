@@ -0,0 +1,40 @@
+#pragma once
+
+#include "cache/configs_cache.hpp"
+#include "userver/components/component_config.hpp"
+#include "userver/components/component_context.hpp"
+#include "userver/components/loggable_component_base.hpp"
+#include "userver/engine/task/task_with_result.hpp"
+#include "userver/storages/postgres/postgres_fwd.hpp"
+#include "userver/yaml_config/schema.hpp"
+#include <chrono>
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::cache::settings_cache {
+
+// Listens for NOTIFY sent by the trigger on uservice_dynconf.configs and
+// requests an immediate configs-cache update, so changes are picked up
+// without waiting for the periodic update.
+class ConfigsCacheNotifier final
+    : public userver::components::LoggableComponentBase {
+public:
+  static constexpr std::string_view kName = "configs-cache-notifier";
+
+  ConfigsCacheNotifier(const userver::components::ComponentConfig &config,
+                       const userver::components::ComponentContext &context);
+  ~ConfigsCacheNotifier() override;
+
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+private:
+  void Listen();
+
+  ConfigsCache &cache_;
+  const userver::storages::postgres::ClusterPtr cluster_;
+  const std::string channel_;
+  const std::chrono::milliseconds retry_interval_;
+  userver::engine::TaskWithResult<void> listen_task_;
+};
+
+} // namespace uservice_dynconf::cache::settings_cache
@@ -1,5 +1,6 @@
 #pragma once
 
+#include "storage/configs_write_coalescer.hpp"
 #include "userver/components/component_config.hpp"
 #include "userver/components/component_context.hpp"
 #include "userver/formats/json/value.hpp"
@@ -24,6 +25,7 @@ public:
 
 private:
   const userver::storages::postgres::ClusterPtr cluster_;
+  uservice_dynconf::storage::ConfigsWriteCoalescer &coalescer_;
 };
 
 } // namespace uservice_dynconf::handlers::admin_v1_configs::post
@@ -0,0 +1,192 @@
+#include "admin_v1_configs_bulk.hpp"
+#include "userver/formats/common/items.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/formats/json/value.hpp"
+#include "userver/formats/json/value_builder.hpp"
+#include "userver/server/http/http_status.hpp"
+#include "userver/storages/postgres/cluster.hpp"
+#include "userver/storages/postgres/component.hpp"
+#include "userver/storages/postgres/result_set.hpp"
+#include "userver/storages/postgres/transaction.hpp"
+
+#include "models/config.hpp"
+#include "sql/sql_query.hpp"
+#include "utils/configs_request.hpp"
+#include "utils/make_error.hpp"
+#include <algorithm>
+#include <fmt/format.h>
+#include <set>
+#include <string>
+#include <tuple>
+#include <vector>
+
+namespace uservice_dynconf::handlers::admin_v1_configs_bulk::post {
+
+namespace {
+
+struct RequestData {
+  std::vector<uservice_dynconf::utils::ConfigsUpsert> upsert{};
+  std::vector<uservice_dynconf::utils::ConfigsDelete> remove{};
+};
+
+RequestData ParseRequest(const userver::formats::json::Value &request) {
+  RequestData result;
+  for (const auto &item :
+       request["upsert"].As<std::vector<userver::formats::json::Value>>({})) {
+    result.upsert.push_back(uservice_dynconf::utils::ParseConfigsUpsert(item));
+  }
+  for (const auto &item :
+       request["delete"].As<std::vector<userver::formats::json::Value>>({})) {
+    result.remove.push_back(uservice_dynconf::utils::ParseConfigsDelete(item));
+  }
+  return result;
+}
+
+// Parallel arrays for the batch queries
+struct ConfigRows {
+  std::vector<std::string> services;
+  std::vector<std::string> config_names;
+  std::vector<std::string> config_values;
+  std::vector<std::string> config_modes;
+};
+
+class ErrorsBuilder {
+public:
+  void Add(std::string_view operation, size_t index, std::string_view message) {
+    userver::formats::json::ValueBuilder error;
+    error["operation"] = operation;
+    error["index"] = index;
+    error["message"] = message;
+    errors_.PushBack(error.ExtractValue());
+  }
+
+  bool IsEmpty() const { return errors_.IsEmpty(); }
+
+  userver::formats::json::Value Extract() { return errors_.ExtractValue(); }
+
+private:
+  userver::formats::json::ValueBuilder errors_{
+      userver::formats::common::Type::kArray};
+};
+
+using ConfigKeys = std::vector<std::tuple<std::string, std::string>>;
+
+userver::formats::json::Value MakeKeysList(ConfigKeys keys) {
+  std::sort(keys.begin(), keys.end());
+  userver::formats::json::ValueBuilder builder{
+      userver::formats::common::Type::kArray};
+  for (const auto &[service, config_name] : keys) {
+    userver::formats::json::ValueBuilder key;
+    key["service"] = service;
+    key["id"] = config_name;
+    builder.PushBack(key.ExtractValue());
+  }
+  return builder.ExtractValue();
+}
+
+} // namespace
+
+Handler::Handler(const userver::components::ComponentConfig &config,
+                 const userver::components::ComponentContext &context)
+    : HttpHandlerJsonBase(config, context),
+      cluster_(
+          context
+              .FindComponent<userver::components::Postgres>("settings-database")
+              .GetCluster()) {}
+
+userver::formats::json::Value Handler::HandleRequestJsonThrow(
+    const userver::server::http::HttpRequest &request,
+    const userver::formats::json::Value &request_json,
+    userver::server::request::RequestContext &) const {
+  auto &http_response = request.GetHttpResponse();
+  const auto request_data = ParseRequest(request_json);
+  if (request_data.upsert.empty() && request_data.remove.empty()) {
+    http_response.SetStatus(userver::server::http::HttpStatus::kBadRequest);
+    return uservice_dynconf::utils::MakeError(
+        "400", "At least one of fields 'upsert' and 'delete' is required");
+  }
+
+  ErrorsBuilder errors;
+  ConfigRows upserted;
+  std::set<std::tuple<std::string, std::string>> upserted_keys;
+  for (size_t index = 0; index < request_data.upsert.size(); ++index) {
+    const auto &upsert = request_data.upsert[index];
+    if (const auto error =
+            uservice_dynconf::utils::ValidateConfigsUpsert(upsert);
+        error) {
+      errors.Add("upsert", index, *error);
+      continue;
+    }
+    for (const auto &[config_name, config_value] : Items(upsert.configs)) {
+      if (!upserted_keys.emplace(upsert.service, config_name).second) {
+        errors.Add("upsert", index,
+                   fmt::format("Config '{}' is updated more than once",
+                               config_name));
+        continue;
+      }
+      upserted.services.push_back(upsert.service);
+      upserted.config_names.push_back(config_name);
+      upserted.config_values.push_back(
+          userver::formats::json::ToString(config_value));
+      upserted.config_modes.push_back(uservice_dynconf::models::ToString(
+          uservice_dynconf::utils::GetConfigMode(upsert, config_name)));
+    }
+  }
+
+  ConfigRows removed;
+  for (size_t index = 0; index < request_data.remove.size(); ++index) {
+    const auto &remove = request_data.remove[index];
+    if (const auto error =
+            uservice_dynconf::utils::ValidateConfigsDelete(remove);
+        error) {
+      errors.Add("delete", index, *error);
+      continue;
+    }
+    for (const auto &id : remove.ids) {
+      if (upserted_keys.count({remove.service, id}) > 0) {
+        errors.Add("delete", index,
+                   fmt::format("Config '{}' is both updated and deleted", id));
+        continue;
+      }
+      removed.services.push_back(remove.service);
+      removed.config_names.push_back(id);
+    }
+  }
+
+  if (!errors.IsEmpty()) {
+    http_response.SetStatus(userver::server::http::HttpStatus::kBadRequest);
+    userver::formats::json::ValueBuilder response{
+        uservice_dynconf::utils::MakeError("400", "Invalid operations")};
+    response["errors"] = errors.Extract();
+    return response.ExtractValue();
+  }
+
+  auto transaction =
+      cluster_->Begin(userver::storages::postgres::ClusterHostType::kMaster,
+                      userver::storages::postgres::TransactionOptions{});
+  ConfigKeys changed;
+  if (!upserted.services.empty()) {
+    changed =
+        transaction
+            .Execute(uservice_dynconf::sql::kInsertConfigValues.data(),
+                     upserted.services, upserted.config_names,
+                     upserted.config_values, upserted.config_modes)
+            .AsContainer<ConfigKeys>(userver::storages::postgres::kRowTag);
+  }
+  ConfigKeys deleted;
+  if (!removed.services.empty()) {
+    deleted =
+        transaction
+            .Execute(uservice_dynconf::sql::kDeleteConfigValuesBatch.data(),
+                     removed.services, removed.config_names)
+            .AsContainer<ConfigKeys>(userver::storages::postgres::kRowTag);
+  }
+  transaction.Commit();
+
+  userver::formats::json::ValueBuilder response;
+  response["changed"] = MakeKeysList(std::move(changed));
+  response["deleted"] = MakeKeysList(std::move(deleted));
+  return response.ExtractValue();
+}
+
+} // namespace uservice_dynconf::handlers::admin_v1_configs_bulk::post
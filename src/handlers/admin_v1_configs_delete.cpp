@@ -5,49 +5,42 @@
 #include "userver/storages/postgres/component.hpp"
 
 #include "sql/sql_query.hpp"
+#include "utils/configs_request.hpp"
 #include "utils/make_error.hpp"
 
 namespace uservice_dynconf::handlers::admin_v1_configs_delete::post {
 
-namespace {
-
-struct RequestData {
-  std::vector<std::string> ids{};
-  std::string service{};
-};
-
-RequestData ParseRequest(const userver::formats::json::Value &request) {
-  RequestData result;
-  result.ids = request["ids"].As<std::vector<std::string>>({});
-  result.service = request["service"].As<std::string>({});
-  return result;
-}
-
-} // namespace
-
 Handler::Handler(const userver::components::ComponentConfig &config,
                  const userver::components::ComponentContext &context)
     : HttpHandlerJsonBase(config, context),
       cluster_(
           context
               .FindComponent<userver::components::Postgres>("settings-database")
-              .GetCluster()) {}
+              .GetCluster()),
+      coalescer_(context.FindComponent<
+                 uservice_dynconf::storage::ConfigsWriteCoalescer>()) {}
 
 userver::formats::json::Value Handler::HandleRequestJsonThrow(
     const userver::server::http::HttpRequest &request,
     const userver::formats::json::Value &request_json,
     userver::server::request::RequestContext &) const {
-  const auto request_data = ParseRequest(request_json);
+  const auto request_data =
+      uservice_dynconf::utils::ParseConfigsDelete(request_json);
   auto &http_response = request.GetHttpResponse();
-  if (request_data.ids.empty() || request_data.service.empty()) {
+  if (const auto error =
+          uservice_dynconf::utils::ValidateConfigsDelete(request_data);
+      error) {
     http_response.SetStatus(userver::server::http::HttpStatus::kBadRequest);
-    return uservice_dynconf::utils::MakeError(
-        "400", "Fields 'ids' and 'service' are required");
+    return uservice_dynconf::utils::MakeError("400", *error);
   }
 
-  cluster_->Execute(userver::storages::postgres::ClusterHostType::kMaster,
-                    uservice_dynconf::sql::kDeleteConfigValues.data(),
-                    request_data.service, request_data.ids);
+  if (coalescer_.IsEnabled()) {
+    coalescer_.Delete(request_data);
+  } else {
+    cluster_->Execute(userver::storages::postgres::ClusterHostType::kMaster,
+                      uservice_dynconf::sql::kDeleteConfigValues.data(),
+                      request_data.service, request_data.ids);
+  }
 
   http_response.SetStatus(userver::server::http::HttpStatus::kNoContent);
   return {};
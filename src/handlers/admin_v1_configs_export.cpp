@@ -0,0 +1,156 @@
+#include "admin_v1_configs_export.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/formats/json/string_builder.hpp"
+#include "userver/formats/json/value_builder.hpp"
+#include "userver/engine/deadline.hpp"
+#include "userver/http/content_type.hpp"
+#include "userver/utils/datetime.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+#include "utils/gzip.hpp"
+#include "utils/parse_request_body.hpp"
+#include <mutex>
+
+namespace uservice_dynconf::handlers::admin_v1_configs_export::post {
+
+namespace {
+constexpr const char *kNdjsonContentType = "application/x-ndjson";
+constexpr std::string_view kContentTypeHeader = "Content-Type";
+constexpr std::string_view kAcceptEncodingHeader = "Accept-Encoding";
+constexpr std::string_view kContentEncodingHeader = "Content-Encoding";
+constexpr std::string_view kVaryHeader = "Vary";
+
+struct RequestData {
+  std::string service{};
+};
+
+RequestData ParseRequest(const userver::formats::json::Value &request) {
+  RequestData result;
+  result.service = request["service"].As<std::string>({});
+  return result;
+}
+
+// One JSON object per line, tombstones are skipped
+std::string MakeNdjson(
+    userver::utils::span<const uservice_dynconf::models::Config *const>
+        configs) {
+  std::string result;
+  for (const auto *config : configs) {
+    if (config->deleted_at) {
+      continue;
+    }
+    userver::formats::json::StringBuilder builder;
+    {
+      userver::formats::json::StringBuilder::ObjectGuard guard{builder};
+      builder.Key("service");
+      builder.WriteString(config->key.service.Get());
+      builder.Key("id");
+      builder.WriteString(config->key.config_name.Get());
+      builder.Key("value");
+      builder.WriteRawString(config->config_value.GetJson());
+      builder.Key("mode");
+      builder.WriteString(uservice_dynconf::models::ToString(config->mode));
+      builder.Key("updated_at");
+      builder.WriteValue(userver::formats::json::ValueBuilder(
+                             config->updated_at.GetUnderlying())
+                             .ExtractValue());
+    }
+    result += builder.GetString();
+    result += '\n';
+  }
+  return result;
+}
+} // namespace
+
+Handler::Handler(const userver::components::ComponentConfig &config,
+                 const userver::components::ComponentContext &context)
+    : HttpHandlerBase(config, context),
+      cache_(context.FindComponent<
+             uservice_dynconf::cache::settings_cache::ConfigsCache>()),
+      chunk_size_(config["chunk-size"].As<std::size_t>(64 * 1024)),
+      exports_(config["cache-size"].As<std::size_t>(16)) {}
+
+std::shared_ptr<const std::string>
+Handler::GetExport(const std::shared_ptr<const ConfigCacheContainer> &data,
+                   const std::string &service, bool gzip) const {
+  const auto encode = [gzip](std::string body) {
+    return std::make_shared<const std::string>(
+        gzip ? uservice_dynconf::utils::GzipCompress(body) : std::move(body));
+  };
+  const auto *snapshot =
+      service.empty() ? nullptr : data->FindEffectiveSnapshot(service);
+  if (!service.empty() && !snapshot) {
+    // No configs at all, not worth caching
+    return encode({});
+  }
+  const auto key =
+      (gzip ? "gzip:" : "identity:") + (snapshot ? snapshot->service : "");
+
+  std::lock_guard lock(mutex_);
+  if (const auto *exported = exports_.Get(key);
+      exported && exported->data.lock() == data) {
+    return exported->body;
+  }
+
+  auto result = encode(snapshot ? MakeNdjson(snapshot->configs_view)
+                                : MakeNdjson(data->GetAllConfigs()));
+  exports_.Put(key, Export{data, result});
+  return result;
+}
+
+void Handler::HandleStreamRequest(
+    userver::server::http::HttpRequest &request,
+    userver::server::request::RequestContext &,
+    userver::server::http::ResponseBodyStream &response_body_stream) const {
+  const auto request_data =
+      ParseRequest(uservice_dynconf::utils::ParseRequestBody(request));
+  const bool gzip = uservice_dynconf::utils::AcceptsGzip(
+      request.GetHeader(kAcceptEncodingHeader));
+
+  const auto data = cache_.Get();
+  // The shared body is written chunk by chunk, so a response never holds
+  // a copy of the whole export
+  const auto body = GetExport(data, request_data.service, gzip);
+
+  response_body_stream.SetStatusCode(userver::server::http::HttpStatus::kOk);
+  response_body_stream.SetHeader(
+      std::string{kContentTypeHeader},
+      userver::http::ContentType{kNdjsonContentType}.ToString());
+  response_body_stream.SetHeader(std::string{kVaryHeader},
+                                 std::string{kAcceptEncodingHeader});
+  if (gzip) {
+    response_body_stream.SetHeader(std::string{kContentEncodingHeader},
+                                   "gzip");
+  }
+  response_body_stream.SetEndOfHeaders();
+
+  const std::string_view view = *body;
+  for (std::size_t pos = 0; pos < view.size(); pos += chunk_size_) {
+    response_body_stream.PushBodyChunk(
+        std::string{view.substr(pos, chunk_size_)},
+        userver::engine::Deadline{});
+  }
+}
+
+userver::yaml_config::Schema Handler::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::server::handlers::HttpHandlerBase>(R"(
+type: object
+description: handler that exports configs as NDJSON
+additionalProperties: false
+properties:
+    chunk-size:
+        type: integer
+        description: max size in bytes of a chunk of the streamed body
+        defaultDescription: 65536
+        minimum: 1
+    cache-size:
+        type: integer
+        description: |
+            max number of encoded exports reused while the cache snapshot
+            stays the same, least recently used ones are evicted
+        defaultDescription: 16
+        minimum: 1
+)");
+}
+
+} // namespace uservice_dynconf::handlers::admin_v1_configs_export::post
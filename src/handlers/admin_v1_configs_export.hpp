@@ -0,0 +1,57 @@
+#pragma once
+
+#include "cache/configs_cache.hpp"
+#include "userver/cache/lru_map.hpp"
+#include "userver/components/component_config.hpp"
+#include "userver/components/component_context.hpp"
+#include "userver/engine/mutex.hpp"
+#include "userver/server/handlers/http_handler_base.hpp"
+#include "userver/server/http/http_response_body_stream.hpp"
+#include "userver/yaml_config/schema.hpp"
+#include <memory>
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::handlers::admin_v1_configs_export::post {
+
+class Handler final : public userver::server::handlers::HttpHandlerBase {
+public:
+  static constexpr std::string_view kName = "handler-admin-v1-configs-export";
+
+  Handler(const userver::components::ComponentConfig &config,
+          const userver::components::ComponentContext &context);
+
+  void HandleStreamRequest(
+      userver::server::http::HttpRequest &request,
+      userver::server::request::RequestContext &context,
+      userver::server::http::ResponseBodyStream &response_body_stream)
+      const override final;
+
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+private:
+  using ConfigCacheContainer =
+      uservice_dynconf::cache::settings_cache::ConfigCacheContainer;
+
+  struct Export {
+    // Cache snapshot the export is made of
+    std::weak_ptr<const ConfigCacheContainer> data;
+    std::shared_ptr<const std::string> body;
+  };
+
+  std::shared_ptr<const std::string>
+  GetExport(const std::shared_ptr<const ConfigCacheContainer> &data,
+            const std::string &service, bool gzip) const;
+
+  const uservice_dynconf::cache::settings_cache::ConfigsCache &cache_;
+  const std::size_t chunk_size_;
+
+  // Encoded exports by encoding and service with configs, reused while the
+  // cache snapshot stays the same. Unknown services share the `__default__`
+  // ones. Encoding is done under the mutex, so concurrent requests for a new
+  // snapshot wait for a single encode.
+  mutable userver::engine::Mutex mutex_;
+  mutable userver::cache::LruMap<std::string, Export> exports_;
+};
+
+} // namespace uservice_dynconf::handlers::admin_v1_configs_export::post
@@ -1,94 +1,413 @@
 #include "configs_values.hpp"
 #include "cache/configs_cache.hpp"
-#include "userver/formats/json/inline.hpp"
+#include "userver/components/statistics_storage.hpp"
+#include "userver/formats/json/serialize.hpp"
 #include "userver/formats/json/value.hpp"
-#include "userver/formats/json/value_builder.hpp"
-#include "userver/utils/datetime.hpp"
+#include "userver/http/content_type.hpp"
+#include "userver/server/http/http_status.hpp"
+#include "userver/utils/statistics/writer.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+#include "utils/configs_request.hpp"
+#include "utils/etag.hpp"
+#include "utils/gzip.hpp"
+#include "utils/make_configs_response.hpp"
+#include "utils/msgpack.hpp"
+#include "utils/parse_request_body.hpp"
+#include <algorithm>
 #include <chrono>
+#include <cstdint>
 #include <ctime>
+#include <mutex>
+#include <string_view>
+#include <unordered_set>
+#include <vector>
 
 namespace uservice_dynconf::handlers::configs_values::post {
 
 namespace {
-struct RequestData {
-  std::vector<std::string> ids{};
-  std::optional<std::chrono::time_point<std::chrono::system_clock>>
-      update_since{};
-  std::string service{};
-};
-
-RequestData ParseRequest(const userver::formats::json::Value &request) {
-  RequestData result;
-  result.ids = request["ids"].As<std::vector<std::string>>({});
-  result.service = request["service"].As<std::string>({});
-  if (auto str_time = request["updated_since"].As<std::string>({});
-      !str_time.empty()) {
-    result.update_since = {userver::utils::datetime::Stringtime(
-        str_time, userver::utils::datetime::kDefaultTimezone,
-        userver::utils::datetime::kRfc3339Format)};
+using uservice_dynconf::cache::settings_cache::ConfigCacheContainer;
+using uservice_dynconf::cache::settings_cache::ConfigsCache;
+
+constexpr std::string_view kAcceptHeader = "Accept";
+constexpr std::string_view kETagHeader = "ETag";
+constexpr std::string_view kIfNoneMatchHeader = "If-None-Match";
+constexpr std::string_view kAcceptEncodingHeader = "Accept-Encoding";
+constexpr std::string_view kContentEncodingHeader = "Content-Encoding";
+constexpr std::string_view kVaryHeader = "Vary";
+// Responses differ by format and encoding
+constexpr std::string_view kVaryValue = "Accept, Accept-Encoding";
+// Compressed and identity bodies share the ETag of the identity body, so
+// the compressed one is marked weak
+constexpr std::string_view kWeakETagPrefix = "W/";
+constexpr std::string_view kUnknownService = "__unknown__";
+
+// Ways of the memo LRU, each one is locked separately
+constexpr std::size_t kMemoWays = 16;
+
+constexpr double kTimeBucketsUs[] = {10,   50,    100,   500,
+                                     1000, 5000,  10000, 50000};
+constexpr double kIdsBuckets[] = {0, 1, 5, 10, 50, 100, 500, 1000};
+constexpr double kBytesBuckets[] = {1 << 10, 16 << 10, 128 << 10, 1 << 20,
+                                    8 << 20};
+
+// Queries that differ only in the order or repeats of ids and prefixes get
+// the same key
+std::string MakeMemoKey(const uservice_dynconf::utils::ConfigsQuery &query,
+                        bool msgpack) {
+  const auto append_sorted = [](std::string &key,
+                                std::vector<std::string> names) {
+    std::sort(names.begin(), names.end());
+    names.erase(std::unique(names.begin(), names.end()), names.end());
+    key += std::to_string(names.size());
+    for (const auto &name : names) {
+      key += '\0';
+      key += name;
+    }
+    key += '\0';
+  };
+
+  std::string key{msgpack ? "msgpack" : "json"};
+  key += '\0';
+  key += query.service;
+  key += '\0';
+  append_sorted(key, query.ids);
+  append_sorted(key, query.prefixes);
+  if (query.update_since) {
+    key += std::to_string(
+        uservice_dynconf::utils::ToRevision(*query.update_since));
+  } else if (query.resync) {
+    key += "resync";
   }
-  return result;
+  return key;
+}
+
+double ElapsedUs(std::chrono::steady_clock::time_point start) {
+  return std::chrono::duration_cast<std::chrono::microseconds>(
+             std::chrono::steady_clock::now() - start)
+      .count();
 }
+
 } // namespace
 
+Handler::Statistics::Statistics()
+    : cache_get_time(kTimeBucketsUs), lookup_time(kTimeBucketsUs),
+      serialize_time(kTimeBucketsUs), ids_per_request(kIdsBuckets),
+      response_bytes(kBytesBuckets) {}
+
+void DumpMetric(userver::utils::statistics::Writer &writer,
+                const Handler::Statistics &stats) {
+  writer["time-us"]["cache-get"] = stats.cache_get_time;
+  writer["time-us"]["lookup"] = stats.lookup_time;
+  writer["time-us"]["serialize"] = stats.serialize_time;
+  writer["ids-per-request"] = stats.ids_per_request;
+  writer["response-bytes"] = stats.response_bytes;
+  writer["requests"] = stats.requests;
+  writer["not-modified"] = stats.not_modified;
+  writer["compressed"] = stats.compressed;
+  writer["msgpack"] = stats.msgpack;
+  writer["encoded-cache-hits"] = stats.encoded_cache_hits;
+  writer["snapshot-hits"] = stats.snapshot_hits;
+  writer["unknown-services"] = stats.unknown_services;
+  writer["default-fallbacks"] = stats.default_fallbacks;
+  writer["missing-ids"] = stats.missing_ids;
+  writer["memo"]["hits"] = stats.memo_hits;
+  writer["memo"]["misses"] = stats.memo_misses;
+  for (const auto &[service, requests] : stats.requests_by_service) {
+    writer["requests-by-service"].ValueWithLabels(*requests,
+                                                  {"service", service});
+  }
+}
+
 Handler::Handler(const userver::components::ComponentConfig &config,
                  const userver::components::ComponentContext &context)
-    : HttpHandlerJsonBase(config, context),
+    : HttpHandlerBase(config, context),
       cache_(context.FindComponent<
-             uservice_dynconf::cache::settings_cache::ConfigsCache>()) {}
+             uservice_dynconf::cache::settings_cache::ConfigsCache>()),
+      compression_min_size_(
+          config["compression-min-size"].As<std::size_t>(1024)),
+      memo_max_response_size_(
+          config["memo-max-response-size"].As<std::size_t>(64 * 1024)),
+      memo_size_(config["memo-size"].As<std::size_t>(256)) {
+  statistics_entry_ =
+      context.FindComponent<userver::components::StatisticsStorage>()
+          .GetStorage()
+          .RegisterWriter(
+              "uservice-dynconf",
+              [this](userver::utils::statistics::Writer &writer) {
+                writer["configs-values"] = statistics_;
+                if (const auto data = cache_.GetUnsafe(); data) {
+                  writer["configs-cache"] = *data;
+                }
+              });
+  subscription_ = context.FindComponent<ConfigsCache>().UpdateAndListen(
+      this, kName, &Handler::OnCacheUpdate);
+}
+
+Handler::~Handler() {
+  subscription_.Unsubscribe();
+  statistics_entry_.Unregister();
+}
+
+Handler::Memo::Memo(const std::shared_ptr<const ConfigCacheContainer> &data,
+                    std::size_t size)
+    : data(data),
+      bodies(kMemoWays, std::max<std::size_t>(size / kMemoWays, 1)) {}
+
+void Handler::OnCacheUpdate(
+    const std::shared_ptr<const ConfigCacheContainer> &data) {
+  // Updates come in order, so the memo never goes back to an older snapshot
+  memo_.Assign(std::make_shared<Memo>(data, memo_size_));
+
+  std::vector<std::string> removed;
+  for (const auto &[service, bodies] : encoded_bodies_) {
+    if (!data->FindServiceSnapshot(service)) {
+      removed.push_back(service);
+    }
+  }
+  for (const auto &service : removed) {
+    encoded_bodies_.Erase(service);
+  }
+}
 
-userver::formats::json::Value Handler::HandleRequestJsonThrow(
-    const userver::server::http::HttpRequest &,
-    const userver::formats::json::Value &request_json,
-    userver::server::request::RequestContext &) const {
+std::shared_ptr<const Handler::EncodedBody>
+Handler::GetEncodedBody(const ServiceSnapshot &snapshot, Encoding encoding,
+                        const std::function<EncodedBody()> &encode) const {
+  const auto bodies = encoded_bodies_[snapshot.service];
+  auto &stored = bodies->bodies[static_cast<std::size_t>(encoding)];
+  const auto find = [&] {
+    auto body = stored.ReadCopy();
+    return body && body->snapshot_etag == snapshot.etag ? body : nullptr;
+  };
+  if (auto body = find(); body) {
+    ++statistics_.encoded_cache_hits;
+    return body;
+  }
+
+  std::lock_guard lock(bodies->mutex);
+  // Encoded by another request while this one waited
+  if (auto body = find(); body) {
+    ++statistics_.encoded_cache_hits;
+    return body;
+  }
+  auto result = std::make_shared<const EncodedBody>(encode());
+  stored.Assign(result);
+  return result;
+}
+
+std::shared_ptr<const Handler::MemoizedBody> Handler::FindMemoizedBody(
+    const std::shared_ptr<const ConfigCacheContainer> &data,
+    const std::string &key) const {
+  const auto memo = memo_.ReadCopy();
+  if (!memo || memo->data.lock() != data) {
+    return nullptr;
+  }
+  return memo->bodies.Get(key).value_or(nullptr);
+}
+
+void Handler::StoreMemoizedBody(
+    const std::shared_ptr<const ConfigCacheContainer> &data,
+    const std::string &key, std::shared_ptr<const MemoizedBody> body) const {
+  if (body->body.size() > memo_max_response_size_) {
+    return;
+  }
+  // The snapshot may have changed while the response was made
+  const auto memo = memo_.ReadCopy();
+  if (memo && memo->data.lock() == data) {
+    memo->bodies.Put(key, std::move(body));
+  }
+}
 
-  const auto request_data = ParseRequest(request_json);
+std::string
+Handler::HandleRequestThrow(const userver::server::http::HttpRequest &request,
+                            userver::server::request::RequestContext &) const {
+  const auto request_data = uservice_dynconf::utils::ParseConfigsQuery(
+      uservice_dynconf::utils::ParseRequestBody(request));
+  const bool msgpack =
+      uservice_dynconf::utils::AcceptsMsgpack(request.GetHeader(kAcceptHeader));
+  auto &http_response = request.GetHttpResponse();
+  http_response.SetContentType(
+      msgpack
+          ? userver::http::ContentType{uservice_dynconf::utils::
+                                           kMsgpackContentType}
+          : userver::http::content_type::kApplicationJson);
+  ++statistics_.requests;
+  if (msgpack) {
+    ++statistics_.msgpack;
+  }
+  statistics_.ids_per_request.Account(request_data.ids.size());
+
+  auto start = std::chrono::steady_clock::now();
   const auto data = cache_.Get();
+  statistics_.cache_get_time.Account(ElapsedUs(start));
+
+  if (data->FindServiceSnapshot(request_data.service)) {
+    ++*statistics_.requests_by_service[request_data.service];
+  } else {
+    ++statistics_.unknown_services;
+    ++*statistics_.requests_by_service[std::string{kUnknownService}];
+  }
 
-  userver::formats::json::ValueBuilder result =
-      userver::formats::json::MakeObject();
-
-  constexpr std::chrono::time_point<std::chrono::system_clock> kMinTime(
-      std::chrono::milliseconds(0));
-  std::chrono::time_point<std::chrono::system_clock> updated_at(
-      std::chrono::milliseconds(0));
-
-  const auto configs =
-      request_data.ids.empty()
-          ? data->FindConfigsByService(request_data.service)
-          : data->FindConfigs(request_data.service, request_data.ids);
-
-  userver::formats::json::ValueBuilder kill_switches_enabled;
-  userver::formats::json::ValueBuilder kill_switches_disabled;
-  for (const auto &config : configs) {
-    if (config && request_data.update_since.value_or(kMinTime) <=
-                      config->updated_at.GetUnderlying()) {
-      result[config->key.config_name] = config->config_value;
-      switch (config->mode) {
-      case uservice_dynconf::models::Mode::kKillSwitchEnabled:
-        kill_switches_enabled.PushBack(config->key.config_name);
-        break;
-      case uservice_dynconf::models::Mode::kKillSwitchDisabled:
-        kill_switches_disabled.PushBack(config->key.config_name);
-        break;
-      case uservice_dynconf::models::Mode::kDynamicConfig:
-        break;
+  std::string etag;
+  // Snapshot body in MessagePack
+  std::shared_ptr<const EncodedBody> encoded;
+  // Response to an id, prefix or delta query
+  std::shared_ptr<const MemoizedBody> memoized;
+  const bool all_configs =
+      request_data.ids.empty() && request_data.prefixes.empty();
+  // Unknown services share the `__default__` snapshot. Resyncs are marked,
+  // so they do not match the snapshot body.
+  const auto *snapshot =
+      all_configs && !request_data.update_since && !request_data.resync
+          ? data->FindEffectiveSnapshot(request_data.service)
+          : nullptr;
+  const auto memo_key =
+      snapshot ? std::string{} : MakeMemoKey(request_data, msgpack);
+  if (snapshot && msgpack) {
+    ++statistics_.snapshot_hits;
+    const auto encode = [snapshot] {
+      auto body = uservice_dynconf::utils::MakeConfigsMsgpackResponse(
+          snapshot->configs_view);
+      auto etag = uservice_dynconf::utils::MakeETag(body);
+      return EncodedBody{snapshot->etag, std::move(etag), std::move(body)};
+    };
+    encoded = GetEncodedBody(*snapshot, Encoding::kMsgpack, encode);
+    etag = encoded->etag;
+  } else if (snapshot) {
+    ++statistics_.snapshot_hits;
+    etag = snapshot->etag;
+  } else if (memoized = FindMemoizedBody(data, memo_key); memoized) {
+    ++statistics_.memo_hits;
+    etag = memoized->etag;
+  } else {
+    ++statistics_.memo_misses;
+    start = std::chrono::steady_clock::now();
+    std::vector<const uservice_dynconf::models::Config *> found;
+    ConfigCacheContainer::ConfigsSpan configs;
+    if (all_configs && request_data.update_since) {
+      configs = data->FindChangedConfigs(request_data.service,
+                                         *request_data.update_since);
+    } else if (all_configs) {
+      configs = data->FindConfigsByService(request_data.service);
+    } else {
+      found = data->FindConfigs(request_data.service, request_data.ids);
+      size_t alive = 0;
+      for (const auto *config : found) {
+        if (config->deleted_at) {
+          continue;
+        }
+        ++alive;
+        if (config->key.service.Get() != request_data.service) {
+          ++statistics_.default_fallbacks;
+        }
       }
-      updated_at = std::max(updated_at, config->updated_at.GetUnderlying());
+      // Found configs are deduplicated, so are the requested ids
+      const std::unordered_set<std::string_view> requested(
+          request_data.ids.begin(), request_data.ids.end());
+      statistics_.missing_ids.Add({requested.size() - alive});
+      data->AppendConfigsByPrefixes(request_data.service,
+                                    request_data.prefixes, found);
+      configs = found;
     }
+    statistics_.lookup_time.Account(ElapsedUs(start));
+
+    start = std::chrono::steady_clock::now();
+    const auto options =
+        uservice_dynconf::utils::MakeResponseOptions(request_data);
+    auto body = msgpack
+                    ? uservice_dynconf::utils::MakeConfigsMsgpackResponse(
+                          configs, options)
+                    : uservice_dynconf::utils::MakeConfigsResponse(configs,
+                                                                   options);
+    etag = uservice_dynconf::utils::MakeETag(body);
+    statistics_.serialize_time.Account(ElapsedUs(start));
+    memoized = std::make_shared<const MemoizedBody>(
+        MemoizedBody{etag, std::move(body), {}});
+    StoreMemoizedBody(data, memo_key, memoized);
   }
 
-  userver::formats::json::ValueBuilder builder;
-  builder["configs"] = result.ExtractValue();
-  if (!kill_switches_enabled.IsEmpty()) {
-    builder["kill_switches_enabled"] = kill_switches_enabled.ExtractValue();
+  const auto &identity_body =
+      encoded ? encoded->body : (snapshot ? snapshot->body : memoized->body);
+  const bool compress =
+      identity_body.size() >= compression_min_size_ &&
+      uservice_dynconf::utils::AcceptsGzip(
+          request.GetHeader(kAcceptEncodingHeader));
+  http_response.SetHeader(std::string{kVaryHeader}, std::string{kVaryValue});
+
+  std::string_view if_none_match = request.GetHeader(kIfNoneMatchHeader);
+  if (if_none_match.substr(0, kWeakETagPrefix.size()) == kWeakETagPrefix) {
+    if_none_match.remove_prefix(kWeakETagPrefix.size());
   }
-  if (!kill_switches_disabled.IsEmpty()) {
-    builder["kill_switches_disabled"] = kill_switches_disabled.ExtractValue();
+  const bool not_modified = if_none_match == etag;
+  http_response.SetHeader(
+      std::string{kETagHeader},
+      compress ? std::string{kWeakETagPrefix} + etag : etag);
+  if (not_modified) {
+    ++statistics_.not_modified;
+    http_response.SetStatus(userver::server::http::HttpStatus::kNotModified);
+    return {};
   }
-  builder["updated_at"] =
-      updated_at == kMinTime ? userver::utils::datetime::Now() : updated_at;
-  return builder.ExtractValue();
+
+  std::string response;
+  if (compress) {
+    ++statistics_.compressed;
+    http_response.SetHeader(std::string{kContentEncodingHeader}, "gzip");
+    if (snapshot) {
+      const auto encode = [&] {
+        return EncodedBody{
+            snapshot->etag, etag,
+            uservice_dynconf::utils::GzipCompress(identity_body)};
+      };
+      response = GetEncodedBody(*snapshot,
+                                msgpack ? Encoding::kMsgpackGzip
+                                        : Encoding::kJsonGzip,
+                                encode)
+                     ->body;
+    } else if (!memoized->gzip_body.empty()) {
+      response = memoized->gzip_body;
+    } else {
+      response = uservice_dynconf::utils::GzipCompress(memoized->body);
+      // Memoized with the identity body, so it is compressed once per query
+      // and snapshot
+      if (memoized->body.size() <= memo_max_response_size_) {
+        StoreMemoizedBody(data, memo_key,
+                          std::make_shared<const MemoizedBody>(MemoizedBody{
+                              memoized->etag, memoized->body, response}));
+      }
+    }
+  } else {
+    response = identity_body;
+  }
+  statistics_.response_bytes.Account(response.size());
+  return response;
+}
+
+userver::yaml_config::Schema Handler::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::server::handlers::HttpHandlerBase>(R"(
+type: object
+description: handler that returns configs of a service
+additionalProperties: false
+properties:
+    compression-min-size:
+        type: integer
+        description: |
+            min size of a response in bytes to be gzip-compressed for clients
+            that accept it
+        defaultDescription: 1024
+    memo-size:
+        type: integer
+        description: |
+            max number of memoized responses to id and prefix queries, split
+            evenly between 16 ways with least recently used ones evicted in
+            each way
+        defaultDescription: 256
+        minimum: 1
+    memo-max-response-size:
+        type: integer
+        description: |
+            max size of a memoized response in bytes, 0 disables memoization
+        defaultDescription: 65536
+)");
 }
 
 } // namespace uservice_dynconf::handlers::configs_values::post
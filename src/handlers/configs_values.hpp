@@ -1,29 +1,162 @@
 #pragma once
 
 #include "cache/configs_cache.hpp"
+#include "userver/cache/nway_lru_cache.hpp"
 #include "userver/components/component_config.hpp"
 #include "userver/components/component_context.hpp"
-#include "userver/formats/json/value.hpp"
+#include "userver/concurrent/async_event_source.hpp"
+#include "userver/engine/mutex.hpp"
+#include "userver/rcu/rcu.hpp"
+#include "userver/rcu/rcu_map.hpp"
 #include "userver/server/handlers/http_handler_base.hpp"
-#include "userver/server/handlers/http_handler_json_base.hpp"
+#include "userver/utils/statistics/entry.hpp"
+#include "userver/utils/statistics/histogram.hpp"
+#include "userver/utils/statistics/rate_counter.hpp"
+#include "userver/utils/statistics/writer.hpp"
+#include "userver/yaml_config/schema.hpp"
+#include <array>
+#include <cstddef>
+#include <functional>
+#include <memory>
+#include <string>
 #include <string_view>
 
 namespace uservice_dynconf::handlers::configs_values::post {
 
-class Handler final : public userver::server::handlers::HttpHandlerJsonBase {
+class Handler final : public userver::server::handlers::HttpHandlerBase {
 public:
   static constexpr std::string_view kName = "handler-configs-values";
 
   Handler(const userver::components::ComponentConfig &config,
           const userver::components::ComponentContext &context);
+  ~Handler() override;
 
-  userver::formats::json::Value HandleRequestJsonThrow(
+  std::string HandleRequestThrow(
       const userver::server::http::HttpRequest &request,
-      const userver::formats::json::Value &request_json,
       userver::server::request::RequestContext &context) const override final;
 
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+  // Exported as `uservice-dynconf.configs-values`
+  struct Statistics {
+    Statistics();
+
+    // Time of request phases in microseconds
+    userver::utils::statistics::Histogram cache_get_time;
+    userver::utils::statistics::Histogram lookup_time;
+    userver::utils::statistics::Histogram serialize_time;
+    userver::utils::statistics::Histogram ids_per_request;
+    userver::utils::statistics::Histogram response_bytes;
+
+    userver::utils::statistics::RateCounter requests;
+    userver::utils::statistics::RateCounter not_modified;
+    // Responses sent gzip-compressed
+    userver::utils::statistics::RateCounter compressed;
+    // Responses sent in MessagePack
+    userver::utils::statistics::RateCounter msgpack;
+    // Encoded full service responses reused for the same revision
+    userver::utils::statistics::RateCounter encoded_cache_hits;
+    // Full service responses served from a prebuilt snapshot
+    userver::utils::statistics::RateCounter snapshot_hits;
+    // Requests for services without own configs
+    userver::utils::statistics::RateCounter unknown_services;
+    // Requested ids resolved to `__default__` configs
+    userver::utils::statistics::RateCounter default_fallbacks;
+    // Requested ids missing for the service
+    userver::utils::statistics::RateCounter missing_ids;
+    // Lookups of responses to id and prefix queries in the memo
+    userver::utils::statistics::RateCounter memo_hits;
+    userver::utils::statistics::RateCounter memo_misses;
+    // Only services with own configs are labeled, so that the number of
+    // labels does not depend on clients
+    userver::rcu::RcuMap<std::string, userver::utils::statistics::RateCounter>
+        requests_by_service;
+  };
+
 private:
+  using ConfigCacheContainer =
+      uservice_dynconf::cache::settings_cache::ConfigCacheContainer;
+  using ServiceSnapshot = ConfigCacheContainer::ServiceSnapshot;
+
+  struct EncodedBody {
+    // ETag of the snapshot the body is made of
+    std::string snapshot_etag;
+    std::string etag;
+    std::string body;
+  };
+
+  // Full service responses that differ from the prebuilt snapshot body
+  enum class Encoding { kMsgpack, kJsonGzip, kMsgpackGzip, kCount };
+
+  // Encoded bodies of a service snapshot, reused while the snapshot stays
+  // the same. Readers only load the pointers, the mutex is taken to encode
+  // a new snapshot, so concurrent requests for it wait for a single encode
+  // of this service only.
+  struct ServiceEncodedBodies {
+    userver::engine::Mutex mutex;
+    std::array<userver::rcu::Variable<std::shared_ptr<const EncodedBody>>,
+               static_cast<std::size_t>(Encoding::kCount)>
+        bodies;
+  };
+
+  // Returns the stored body if it is made of the same snapshot, otherwise
+  // stores the result of `encode`
+  std::shared_ptr<const EncodedBody>
+  GetEncodedBody(const ServiceSnapshot &snapshot, Encoding encoding,
+                 const std::function<EncodedBody()> &encode) const;
+
+  struct MemoizedBody {
+    std::string etag;
+    std::string body;
+    // Made on the first request that accepts gzip, empty before it
+    std::string gzip_body;
+  };
+
+  // Responses to repeated id and prefix queries by the normalized query,
+  // made of a single cache snapshot. A new empty memo replaces it on every
+  // cache update, requests that see another snapshot skip it.
+  struct Memo {
+    Memo(const std::shared_ptr<const ConfigCacheContainer> &data,
+         std::size_t size);
+
+    const std::weak_ptr<const ConfigCacheContainer> data;
+    // Split into independently locked ways, so concurrent requests rarely
+    // wait for each other
+    userver::cache::NWayLRU<std::string, std::shared_ptr<const MemoizedBody>>
+        bodies;
+  };
+
+  void OnCacheUpdate(const std::shared_ptr<const ConfigCacheContainer> &data);
+
+  // Returns the memoized response for the key if it is made of `data`
+  std::shared_ptr<const MemoizedBody>
+  FindMemoizedBody(const std::shared_ptr<const ConfigCacheContainer> &data,
+                   const std::string &key) const;
+  void
+  StoreMemoizedBody(const std::shared_ptr<const ConfigCacheContainer> &data,
+                    const std::string &key,
+                    std::shared_ptr<const MemoizedBody> body) const;
+
   const uservice_dynconf::cache::settings_cache::ConfigsCache &cache_;
+  // Smaller responses are sent as is
+  const std::size_t compression_min_size_;
+  // Larger responses are not memoized
+  const std::size_t memo_max_response_size_;
+  const std::size_t memo_size_;
+
+  // By service of the snapshot, services removed from the cache are
+  // dropped on cache updates
+  mutable userver::rcu::RcuMap<std::string, ServiceEncodedBodies>
+      encoded_bodies_;
+
+  userver::rcu::Variable<std::shared_ptr<Memo>> memo_;
+
+  mutable Statistics statistics_;
+  userver::utils::statistics::Entry statistics_entry_;
+  userver::concurrent::AsyncEventSubscriberScope subscription_;
 };
 
+void DumpMetric(userver::utils::statistics::Writer &writer,
+                const Handler::Statistics &stats);
+
 } // namespace uservice_dynconf::handlers::configs_values::post
@@ -0,0 +1,104 @@
+#include "configs_values_batch.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/formats/json/string_builder.hpp"
+#include "userver/formats/json/value.hpp"
+#include "userver/http/content_type.hpp"
+#include "userver/server/http/http_status.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+#include "utils/configs_request.hpp"
+#include "utils/make_configs_response.hpp"
+#include "utils/make_error.hpp"
+#include "utils/parse_request_body.hpp"
+#include <fmt/format.h>
+#include <vector>
+
+namespace uservice_dynconf::handlers::configs_values_batch::post {
+
+namespace {
+using uservice_dynconf::cache::settings_cache::ConfigCacheContainer;
+
+// Same response as /configs/values gives for the query
+std::string
+MakeQueryResponse(const ConfigCacheContainer &data,
+                  const uservice_dynconf::utils::ConfigsQuery &query) {
+  const bool all_configs = query.ids.empty() && query.prefixes.empty();
+  if (all_configs && !query.update_since && !query.resync) {
+    if (const auto *snapshot = data.FindEffectiveSnapshot(query.service);
+        snapshot) {
+      return snapshot->body;
+    }
+  }
+
+  std::vector<const uservice_dynconf::models::Config *> found;
+  ConfigCacheContainer::ConfigsSpan configs;
+  if (all_configs && query.update_since) {
+    configs = data.FindChangedConfigs(query.service, *query.update_since);
+  } else if (all_configs) {
+    configs = data.FindConfigsByService(query.service);
+  } else {
+    found = data.FindConfigs(query.service, query.ids);
+    data.AppendConfigsByPrefixes(query.service, query.prefixes, found);
+    configs = found;
+  }
+  return uservice_dynconf::utils::MakeConfigsResponse(
+      configs, uservice_dynconf::utils::MakeResponseOptions(query));
+}
+} // namespace
+
+Handler::Handler(const userver::components::ComponentConfig &config,
+                 const userver::components::ComponentContext &context)
+    : HttpHandlerBase(config, context),
+      cache_(context.FindComponent<
+             uservice_dynconf::cache::settings_cache::ConfigsCache>()),
+      max_queries_(config["max-queries"].As<std::size_t>(100)) {}
+
+std::string
+Handler::HandleRequestThrow(const userver::server::http::HttpRequest &request,
+                            userver::server::request::RequestContext &) const {
+  const auto request_json = uservice_dynconf::utils::ParseRequestBody(request);
+  auto &http_response = request.GetHttpResponse();
+  http_response.SetContentType(userver::http::content_type::kApplicationJson);
+
+  const auto &queries_json = request_json["queries"];
+  if (!queries_json.IsArray() || queries_json.IsEmpty() ||
+      queries_json.GetSize() > max_queries_) {
+    http_response.SetStatus(userver::server::http::HttpStatus::kBadRequest);
+    return userver::formats::json::ToString(uservice_dynconf::utils::MakeError(
+        "400", fmt::format("Field 'queries' must be a list of 1 to {} queries",
+                           max_queries_)));
+  }
+  std::vector<uservice_dynconf::utils::ConfigsQuery> queries;
+  queries.reserve(queries_json.GetSize());
+  for (const auto &query : queries_json) {
+    queries.push_back(uservice_dynconf::utils::ParseConfigsQuery(query));
+  }
+
+  // A single snapshot for all queries, so that results are consistent
+  const auto data = cache_.Get();
+  userver::formats::json::StringBuilder builder;
+  {
+    userver::formats::json::StringBuilder::ObjectGuard guard{builder};
+    builder.Key("results");
+    userver::formats::json::StringBuilder::ArrayGuard results_guard{builder};
+    for (const auto &query : queries) {
+      builder.WriteRawString(MakeQueryResponse(*data, query));
+    }
+  }
+  return builder.GetString();
+}
+
+userver::yaml_config::Schema Handler::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::server::handlers::HttpHandlerBase>(R"(
+type: object
+description: handler that returns configs of several services at once
+additionalProperties: false
+properties:
+    max-queries:
+        type: integer
+        description: max number of queries in a request
+        defaultDescription: 100
+)");
+}
+
+} // namespace uservice_dynconf::handlers::configs_values_batch::post
@@ -0,0 +1,34 @@
+#pragma once
+
+#include "cache/configs_cache.hpp"
+#include "userver/components/component_config.hpp"
+#include "userver/components/component_context.hpp"
+#include "userver/server/handlers/http_handler_base.hpp"
+#include "userver/yaml_config/schema.hpp"
+#include <cstddef>
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::handlers::configs_values_batch::post {
+
+// Configs of several services at once, all queries are answered from the
+// same cache snapshot
+class Handler final : public userver::server::handlers::HttpHandlerBase {
+public:
+  static constexpr std::string_view kName = "handler-configs-values-batch";
+
+  Handler(const userver::components::ComponentConfig &config,
+          const userver::components::ComponentContext &context);
+
+  std::string HandleRequestThrow(
+      const userver::server::http::HttpRequest &request,
+      userver::server::request::RequestContext &context) const override final;
+
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+private:
+  const uservice_dynconf::cache::settings_cache::ConfigsCache &cache_;
+  const std::size_t max_queries_;
+};
+
+} // namespace uservice_dynconf::handlers::configs_values_batch::post
@@ -0,0 +1,179 @@
+#include "configs_watch.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/formats/json/value.hpp"
+#include "userver/http/content_type.hpp"
+#include "userver/server/http/http_status.hpp"
+#include "userver/utils/datetime.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+#include "utils/configs_request.hpp"
+#include "utils/make_configs_response.hpp"
+#include "utils/parse_request_body.hpp"
+#include <algorithm>
+#include <mutex>
+
+namespace uservice_dynconf::handlers::configs_watch::post {
+
+namespace {
+using uservice_dynconf::cache::settings_cache::ConfigsCache;
+using TimePoint = std::chrono::system_clock::time_point;
+
+struct RequestData {
+  std::vector<std::string> ids{};
+  TimePoint known_updated_at{};
+  std::optional<std::chrono::milliseconds> timeout{};
+  std::string service{};
+};
+
+RequestData ParseRequest(const userver::formats::json::Value &request) {
+  RequestData result;
+  result.ids = request["ids"].As<std::vector<std::string>>({});
+  result.service = request["service"].As<std::string>({});
+  if (auto revision = request["revision"].As<std::int64_t>(0); revision > 0) {
+    result.known_updated_at = TimePoint{std::chrono::microseconds{revision}};
+  } else if (auto str_time = request["updated_since"].As<std::string>({});
+             !str_time.empty()) {
+    result.known_updated_at = userver::utils::datetime::Stringtime(
+        str_time, userver::utils::datetime::kDefaultTimezone,
+        userver::utils::datetime::kRfc3339Format);
+  }
+  if (auto timeout_ms = request["timeout_ms"].As<std::int64_t>(0);
+      timeout_ms > 0) {
+    result.timeout = std::chrono::milliseconds{timeout_ms};
+  }
+  return result;
+}
+
+using ConfigsSpan =
+    uservice_dynconf::cache::settings_cache::ConfigCacheContainer::ConfigsSpan;
+
+ConfigsSpan FindConfigs(
+    const uservice_dynconf::cache::settings_cache::ConfigCacheContainer &data,
+    const RequestData &request_data,
+    std::vector<const uservice_dynconf::models::Config *> &found) {
+  if (request_data.ids.empty()) {
+    return data.FindChangedConfigs(request_data.service,
+                                   request_data.known_updated_at +
+                                       std::chrono::microseconds{1});
+  }
+  found = data.FindConfigs(request_data.service, request_data.ids);
+  return found;
+}
+
+// Max revision of the effective configs of a service, so that
+// `__default__` changes are seen by all the services
+TimePoint GetRevision(
+    const uservice_dynconf::cache::settings_cache::ConfigCacheContainer &data,
+    std::string_view service) {
+  const auto *snapshot = data.FindEffectiveSnapshot(service);
+  return snapshot ? snapshot->revision : TimePoint{};
+}
+
+bool HasUpdates(ConfigsSpan configs, TimePoint known_updated_at) {
+  return std::any_of(configs.begin(), configs.end(), [&](const auto *config) {
+    return config->revision > known_updated_at;
+  });
+}
+} // namespace
+
+Handler::Handler(const userver::components::ComponentConfig &config,
+                 const userver::components::ComponentContext &context)
+    : HttpHandlerBase(config, context),
+      cache_(context.FindComponent<ConfigsCache>()),
+      max_timeout_(config["max-timeout"].As<std::chrono::milliseconds>(
+          std::chrono::seconds{30})) {
+  subscription_ = context.FindComponent<ConfigsCache>().UpdateAndListen(
+      this, kName, &Handler::OnCacheUpdate);
+}
+
+Handler::~Handler() { subscription_.Unsubscribe(); }
+
+void Handler::OnCacheUpdate(
+    const std::shared_ptr<const ConfigCacheContainer> &data) {
+  for (const auto &[service, watch] : watches_) {
+    if (data_ && GetRevision(*data_, service) == GetRevision(*data, service)) {
+      continue;
+    }
+    {
+      std::lock_guard lock(watch->mutex);
+      ++watch->generation;
+    }
+    watch->updated.NotifyAll();
+  }
+  data_ = data;
+}
+
+std::string
+Handler::HandleRequestThrow(const userver::server::http::HttpRequest &request,
+                            userver::server::request::RequestContext &) const {
+  const auto request_data =
+      ParseRequest(uservice_dynconf::utils::ParseRequestBody(request));
+  auto &http_response = request.GetHttpResponse();
+  http_response.SetContentType(userver::http::content_type::kApplicationJson);
+
+  if (request_data.known_updated_at != TimePoint{} &&
+      request_data.known_updated_at <
+          uservice_dynconf::utils::GetDeltaHorizon()) {
+    // Deletions since then may be purged already, so the client gets all the
+    // configs right away to replace its own with them
+    const auto data = cache_.Get();
+    std::vector<const uservice_dynconf::models::Config *> found;
+    ConfigsSpan configs;
+    if (request_data.ids.empty()) {
+      configs = data->FindConfigsByService(request_data.service);
+    } else {
+      found = data->FindConfigs(request_data.service, request_data.ids);
+      configs = found;
+    }
+    uservice_dynconf::utils::ResponseOptions options;
+    options.resync = true;
+    return uservice_dynconf::utils::MakeConfigsResponse(configs, options);
+  }
+
+  const auto deadline = userver::engine::Deadline::FromDuration(
+      std::min(request_data.timeout.value_or(max_timeout_), max_timeout_));
+
+  // Generation is read before the snapshot, so an update that happens in
+  // between is not missed while waiting.
+  const auto watch = watches_[request_data.service];
+  auto generation = watch->generation.load();
+  auto data = cache_.Get();
+  std::vector<const uservice_dynconf::models::Config *> found;
+  auto configs = FindConfigs(*data, request_data, found);
+  while (!HasUpdates(configs, request_data.known_updated_at)) {
+    {
+      std::unique_lock lock(watch->mutex);
+      if (!watch->updated.WaitUntil(lock, deadline, [&] {
+            return watch->generation.load() != generation;
+          })) {
+        http_response.SetStatus(
+            userver::server::http::HttpStatus::kNotModified);
+        return {};
+      }
+      generation = watch->generation.load();
+    }
+    data = cache_.Get();
+    configs = FindConfigs(*data, request_data, found);
+  }
+
+  uservice_dynconf::utils::ResponseOptions options;
+  options.updated_since =
+      request_data.known_updated_at + std::chrono::microseconds{1};
+  options.min_revision = request_data.known_updated_at;
+  return uservice_dynconf::utils::MakeConfigsResponse(configs, options);
+}
+
+userver::yaml_config::Schema Handler::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::server::handlers::HttpHandlerBase>(R"(
+type: object
+description: long-poll handler that waits for config changes
+additionalProperties: false
+properties:
+    max-timeout:
+        type: string
+        description: max time to wait for config changes
+        defaultDescription: 30s
+)");
+}
+
+} // namespace uservice_dynconf::handlers::configs_watch::post
@@ -0,0 +1,61 @@
+#pragma once
+
+#include "cache/configs_cache.hpp"
+#include "userver/components/component_config.hpp"
+#include "userver/components/component_context.hpp"
+#include "userver/concurrent/async_event_source.hpp"
+#include "userver/engine/condition_variable.hpp"
+#include "userver/engine/mutex.hpp"
+#include "userver/rcu/rcu_map.hpp"
+#include "userver/server/handlers/http_handler_base.hpp"
+#include "userver/yaml_config/schema.hpp"
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::handlers::configs_watch::post {
+
+class Handler final : public userver::server::handlers::HttpHandlerBase {
+public:
+  static constexpr std::string_view kName = "handler-configs-watch";
+
+  Handler(const userver::components::ComponentConfig &config,
+          const userver::components::ComponentContext &context);
+  ~Handler() override;
+
+  std::string HandleRequestThrow(
+      const userver::server::http::HttpRequest &request,
+      userver::server::request::RequestContext &context) const override final;
+
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+private:
+  using ConfigCacheContainer =
+      uservice_dynconf::cache::settings_cache::ConfigCacheContainer;
+
+  // Waiters for changes of a service, keyed by the requested name
+  struct ServiceWatch {
+    userver::engine::Mutex mutex;
+    userver::engine::ConditionVariable updated;
+    std::atomic<std::uint64_t> generation{0};
+  };
+
+  void OnCacheUpdate(const std::shared_ptr<const ConfigCacheContainer> &data);
+
+  const uservice_dynconf::cache::settings_cache::ConfigsCache &cache_;
+  const std::chrono::milliseconds max_timeout_;
+
+  // Only services with changed effective configs are woken up, so that a
+  // change of one service does not wake the watchers of all the others.
+  // `__default__` changes affect all of them.
+  mutable userver::rcu::RcuMap<std::string, ServiceWatch> watches_;
+  // Snapshot of the previous update to compare with, only used by
+  // OnCacheUpdate() that is called for one update at a time
+  std::shared_ptr<const ConfigCacheContainer> data_;
+  userver::concurrent::AsyncEventSubscriberScope subscription_;
+};
+
+} // namespace uservice_dynconf::handlers::configs_watch::post
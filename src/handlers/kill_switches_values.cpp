@@ -0,0 +1,88 @@
+#include "kill_switches_values.hpp"
+#include "userver/formats/json/value.hpp"
+#include "userver/http/content_type.hpp"
+#include "userver/server/http/http_status.hpp"
+#include "utils/etag.hpp"
+#include "utils/make_configs_response.hpp"
+#include "utils/parse_request_body.hpp"
+#include <algorithm>
+#include <vector>
+
+namespace uservice_dynconf::handlers::kill_switches_values::post {
+
+namespace {
+constexpr std::string_view kETagHeader = "ETag";
+constexpr std::string_view kIfNoneMatchHeader = "If-None-Match";
+
+struct RequestData {
+  std::vector<std::string> ids{};
+  std::string service{};
+};
+
+RequestData ParseRequest(const userver::formats::json::Value &request) {
+  RequestData result;
+  result.ids = request["ids"].As<std::vector<std::string>>({});
+  result.service = request["service"].As<std::string>({});
+  return result;
+}
+
+// Requested names out of the sorted ones
+std::vector<std::string_view>
+FilterNames(const std::vector<std::string_view> &names,
+            const std::vector<std::string> &ids) {
+  std::vector<std::string_view> result;
+  for (const auto &id : ids) {
+    const auto it =
+        std::lower_bound(names.begin(), names.end(), std::string_view{id});
+    if (it != names.end() && *it == id) {
+      result.push_back(*it);
+    }
+  }
+  std::sort(result.begin(), result.end());
+  result.erase(std::unique(result.begin(), result.end()), result.end());
+  return result;
+}
+} // namespace
+
+Handler::Handler(const userver::components::ComponentConfig &config,
+                 const userver::components::ComponentContext &context)
+    : HttpHandlerBase(config, context),
+      cache_(context.FindComponent<
+             uservice_dynconf::cache::settings_cache::ConfigsCache>()) {}
+
+std::string
+Handler::HandleRequestThrow(const userver::server::http::HttpRequest &request,
+                            userver::server::request::RequestContext &) const {
+  const auto request_data =
+      ParseRequest(uservice_dynconf::utils::ParseRequestBody(request));
+  auto &http_response = request.GetHttpResponse();
+  http_response.SetContentType(userver::http::content_type::kApplicationJson);
+
+  const auto data = cache_.Get();
+  const auto *kill_switches = data->FindKillSwitches(request_data.service);
+
+  std::string body;
+  std::string etag;
+  if (kill_switches && request_data.ids.empty()) {
+    // The common case is a single lookup and a copy of the prebuilt body
+    body = kill_switches->body;
+    etag = kill_switches->etag;
+  } else {
+    body = kill_switches
+               ? uservice_dynconf::utils::MakeKillSwitchesResponse(
+                     FilterNames(kill_switches->enabled, request_data.ids),
+                     FilterNames(kill_switches->disabled, request_data.ids))
+               : uservice_dynconf::utils::MakeKillSwitchesResponse({}, {});
+    etag = uservice_dynconf::utils::MakeETag(body);
+  }
+
+  const bool not_modified = request.GetHeader(kIfNoneMatchHeader) == etag;
+  http_response.SetHeader(std::string{kETagHeader}, std::move(etag));
+  if (not_modified) {
+    http_response.SetStatus(userver::server::http::HttpStatus::kNotModified);
+    return {};
+  }
+  return body;
+}
+
+} // namespace uservice_dynconf::handlers::kill_switches_values::post
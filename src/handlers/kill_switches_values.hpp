@@ -0,0 +1,29 @@
+#pragma once
+
+#include "cache/configs_cache.hpp"
+#include "userver/components/component_config.hpp"
+#include "userver/components/component_context.hpp"
+#include "userver/server/handlers/http_handler_base.hpp"
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::handlers::kill_switches_values::post {
+
+// Kill switch states of a service, served from the index prebuilt by the
+// configs cache
+class Handler final : public userver::server::handlers::HttpHandlerBase {
+public:
+  static constexpr std::string_view kName = "handler-kill-switches-values";
+
+  Handler(const userver::components::ComponentConfig &config,
+          const userver::components::ComponentContext &context);
+
+  std::string HandleRequestThrow(
+      const userver::server::http::HttpRequest &request,
+      userver::server::request::RequestContext &context) const override final;
+
+private:
+  const uservice_dynconf::cache::settings_cache::ConfigsCache &cache_;
+};
+
+} // namespace uservice_dynconf::handlers::kill_switches_values::post
@@ -1,11 +1,21 @@
+#include <userver/components/dump_configurator.hpp>
 #include <userver/components/minimal_server_component_list.hpp>
 #include <userver/server/handlers/ping.hpp>
+#include <userver/server/handlers/server_monitor.hpp>
 #include <userver/utils/daemon_run.hpp>
+#include <userver/utils/statistics/system_statistics_collector.hpp>
 
 #include "cache/configs_cache.hpp"
+#include "cache/configs_cache_notifier.hpp"
 #include "handlers/admin_v1_configs.hpp"
+#include "handlers/admin_v1_configs_bulk.hpp"
 #include "handlers/admin_v1_configs_delete.hpp"
+#include "handlers/admin_v1_configs_export.hpp"
 #include "handlers/configs_values.hpp"
+#include "handlers/configs_values_batch.hpp"
+#include "handlers/configs_watch.hpp"
+#include "handlers/kill_switches_values.hpp"
+#include "storage/configs_write_coalescer.hpp"
 #include "userver/clients/dns/component.hpp"
 #include "userver/clients/http/component.hpp"
 #include "userver/testsuite/testsuite_support.hpp"
@@ -19,13 +29,24 @@ int main(int argc, char *argv[]) {
   auto component_list =
       userver::components::MinimalServerComponentList()
           .Append<userver::server::handlers::Ping>()
+          .Append<userver::server::handlers::ServerMonitor>()
+          .Append<userver::components::SystemStatisticsCollector>()
           .Append<userver::components::Postgres>("settings-database")
           .Append<userver::clients::dns::Component>()
           .Append<userver::components::TestsuiteSupport>()
+          .Append<userver::components::DumpConfigurator>()
           .Append<uservice_dynconf::cache::settings_cache::ConfigsCache>()
+          .Append<
+              uservice_dynconf::cache::settings_cache::ConfigsCacheNotifier>()
+          .Append<uservice_dynconf::storage::ConfigsWriteCoalescer>()
           .Append<service_handlers::configs_values::post::Handler>()
+          .Append<service_handlers::configs_values_batch::post::Handler>()
+          .Append<service_handlers::configs_watch::post::Handler>()
+          .Append<service_handlers::kill_switches_values::post::Handler>()
           .Append<service_handlers::admin_v1_configs::post::Handler>()
           .Append<service_handlers::admin_v1_configs_delete::post::Handler>()
+          .Append<service_handlers::admin_v1_configs_bulk::post::Handler>()
+          .Append<service_handlers::admin_v1_configs_export::post::Handler>()
           .Append<userver::components::HttpClient>()
           .Append<userver::server::handlers::TestsControl>();
   return userver::utils::DaemonMain(argc, argv, component_list);
@@ -22,4 +22,14 @@ std::string ToString(Mode mode) {
   }
 };
 
+SharedString::SharedString() : SharedString(std::string{}) {}
+
+SharedString::SharedString(std::string value)
+    : value_(std::make_shared<const std::string>(std::move(value))) {}
+
+ConfigValue::ConfigValue() : ConfigValue("null") {}
+
+ConfigValue::ConfigValue(std::string json)
+    : json_(std::make_shared<const std::string>(std::move(json))) {}
+
 }; // namespace uservice_dynconf::models
@@ -6,6 +6,8 @@
 #include <boost/functional/hash.hpp>
 #include <chrono>
 #include <iterator>
+#include <memory>
+#include <optional>
 #include <string>
 #include <userver/storages/postgres/io/enum_types.hpp>
 #include <userver/utils/trivial_map.hpp>
@@ -29,11 +31,61 @@ enum class Mode { kDynamicConfig, kKillSwitchEnabled, kKillSwitchDisabled };
 
 std::string ToString(Mode mode);
 
-struct Config {
+// Row of uservice_dynconf.configs as read by the configs cache. The value
+// is kept serialized, it is not parsed while the cache is updated.
+struct ConfigRow {
   Key key;
-  userver::formats::json::Value config_value;
+  std::string config_value;
+  Mode mode;
+  userver::storages::postgres::TimePointTz updated_at;
+  // Set for tombstones of deleted configs
+  std::optional<userver::storages::postgres::TimePointTz> deleted_at;
+};
+
+// Immutable string shared by copies, used to store each distinct service and
+// config name once.
+class SharedString {
+public:
+  SharedString();
+  explicit SharedString(std::string value);
+
+  const std::string &Get() const { return *value_; }
+
+private:
+  std::shared_ptr<const std::string> value_;
+};
+
+// Serialized JSON value shared by copies, so that identical values of
+// different configs are stored once. It is written to responses as is and
+// never parsed by the service.
+class ConfigValue {
+public:
+  ConfigValue();
+  explicit ConfigValue(std::string json);
+
+  const std::string &GetJson() const { return *json_; }
+
+private:
+  std::shared_ptr<const std::string> json_;
+};
+
+struct ConfigKey {
+  SharedString service;
+  SharedString config_name;
+};
+
+// Config as stored in the configs cache
+struct Config {
+  ConfigKey key;
+  ConfigValue config_value;
   Mode mode;
   userver::storages::postgres::TimePointTz updated_at;
+  // Set for tombstones of deleted configs
+  std::optional<userver::storages::postgres::TimePointTz> deleted_at;
+  // When the cache published the config: `updated_at`, or later if the row
+  // was committed after configs with a later `updated_at` had been served,
+  // so that deltas since any served revision still include it
+  std::chrono::system_clock::time_point revision{};
 };
 } // namespace uservice_dynconf::models
 
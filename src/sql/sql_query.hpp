@@ -3,10 +3,13 @@
 namespace uservice_dynconf::sql {
 
 inline constexpr std::string_view kSelectSettingsForCache = R"~(
-SELECT (service, config_name), config_value, config_mode, updated_at
+SELECT (service, config_name), COALESCE(config_value::text, 'null'),
+config_mode, updated_at, deleted_at
 FROM uservice_dynconf.configs
 )~";
 
+// Rows with the same value and mode are left untouched, so that their
+// `updated_at` does not change. Returns names of changed configs.
 inline constexpr std::string_view kInsertConfigValue = R"~(
 INSERT INTO uservice_dynconf.configs
 (service, config_name, config_value, config_mode)
@@ -17,12 +20,63 @@ ON CONFLICT (service, config_name)
 DO UPDATE SET
 config_value = EXCLUDED.config_value,
 config_mode = EXCLUDED.config_mode,
-updated_at = NOW();
+updated_at = NOW(),
+deleted_at = NULL
+WHERE configs.config_value IS DISTINCT FROM EXCLUDED.config_value
+OR configs.config_mode IS DISTINCT FROM EXCLUDED.config_mode
+OR configs.deleted_at IS NOT NULL
+RETURNING config_name;
 )~";
 
+// Batch version of kInsertConfigValue, takes parallel arrays of services,
+// config names, serialized values and modes. Returns keys of changed
+// configs.
+inline constexpr std::string_view kInsertConfigValues = R"~(
+INSERT INTO uservice_dynconf.configs
+(service, config_name, config_value, config_mode)
+SELECT u.service, u.config_name, u.config_value::jsonb,
+u.config_mode::uservice_dynconf.mode
+FROM unnest($1::text[], $2::text[], $3::text[], $4::text[])
+AS u(service, config_name, config_value, config_mode)
+ON CONFLICT (service, config_name)
+DO UPDATE SET
+config_value = EXCLUDED.config_value,
+config_mode = EXCLUDED.config_mode,
+updated_at = NOW(),
+deleted_at = NULL
+WHERE configs.config_value IS DISTINCT FROM EXCLUDED.config_value
+OR configs.config_mode IS DISTINCT FROM EXCLUDED.config_mode
+OR configs.deleted_at IS NOT NULL
+RETURNING service, config_name;
+)~";
+
+// Configs are soft-deleted, so that incremental cache updates see the
+// deletion. Tombstones are purged once all caches have surely seen them,
+// the interval is utils::kTombstonesRetention.
 inline constexpr std::string_view kDeleteConfigValues = R"~(
-DELETE FROM uservice_dynconf.configs
-WHERE service = $1 and config_name IN (SELECT unnest($2));
+WITH purged AS (
+  DELETE FROM uservice_dynconf.configs
+  WHERE deleted_at < NOW() - INTERVAL '1 day'
+)
+UPDATE uservice_dynconf.configs
+SET deleted_at = NOW(), updated_at = NOW()
+WHERE service = $1 and config_name IN (SELECT unnest($2))
+AND deleted_at IS NULL;
+)~";
+
+// Batch version of kDeleteConfigValues, takes parallel arrays of services
+// and config names. Returns keys of deleted configs.
+inline constexpr std::string_view kDeleteConfigValuesBatch = R"~(
+WITH purged AS (
+  DELETE FROM uservice_dynconf.configs
+  WHERE deleted_at < NOW() - INTERVAL '1 day'
+)
+UPDATE uservice_dynconf.configs AS c
+SET deleted_at = NOW(), updated_at = NOW()
+FROM unnest($1::text[], $2::text[]) AS d(service, config_name)
+WHERE c.service = d.service AND c.config_name = d.config_name
+AND c.deleted_at IS NULL
+RETURNING c.service, c.config_name;
 )~";
 
 } // namespace uservice_dynconf::sql
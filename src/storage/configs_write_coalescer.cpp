@@ -0,0 +1,277 @@
+#include "configs_write_coalescer.hpp"
+#include "userver/components/statistics_storage.hpp"
+#include "userver/engine/sleep.hpp"
+#include "userver/formats/common/items.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/logging/log.hpp"
+#include "userver/storages/postgres/cluster.hpp"
+#include "userver/storages/postgres/component.hpp"
+#include "userver/storages/postgres/result_set.hpp"
+#include "userver/storages/postgres/transaction.hpp"
+#include "userver/testsuite/testpoint.hpp"
+#include "userver/yaml_config/merge_schemas.hpp"
+
+#include "models/config.hpp"
+#include "sql/sql_query.hpp"
+#include <algorithm>
+#include <exception>
+#include <map>
+#include <mutex>
+#include <set>
+#include <tuple>
+#include <utility>
+
+namespace uservice_dynconf::storage {
+
+namespace {
+
+constexpr double kWritesBuckets[] = {1, 2, 5, 10, 20, 50, 100, 500};
+
+using ConfigKeys = std::vector<std::tuple<std::string, std::string>>;
+
+// Parallel arrays for the batch queries
+struct ConfigRows {
+  std::vector<std::string> services;
+  std::vector<std::string> config_names;
+  std::vector<std::string> config_values;
+  std::vector<std::string> config_modes;
+};
+
+} // namespace
+
+ConfigsWriteCoalescer::Statistics::Statistics()
+    : writes_per_batch(kWritesBuckets) {}
+
+void DumpMetric(userver::utils::statistics::Writer &writer,
+                const ConfigsWriteCoalescer::Statistics &stats) {
+  writer["writes-per-batch"] = stats.writes_per_batch;
+  writer["batches"] = stats.batches;
+  writer["writes"] = stats.writes;
+  writer["superseded"] = stats.superseded;
+  writer["failed-batches"] = stats.failed_batches;
+}
+
+ConfigsWriteCoalescer::ConfigsWriteCoalescer(
+    const userver::components::ComponentConfig &config,
+    const userver::components::ComponentContext &context)
+    : LoggableComponentBase(config, context),
+      cluster_(context
+                   .FindComponent<userver::components::Postgres>(
+                       config["pgcomponent"].As<std::string>())
+                   .GetCluster()),
+      enabled_(config["enabled"].As<bool>(false)),
+      window_(config["window"].As<std::chrono::milliseconds>(
+          std::chrono::milliseconds{5})),
+      max_batch_size_(config["max-batch-size"].As<std::size_t>(1000)) {
+  statistics_entry_ =
+      context.FindComponent<userver::components::StatisticsStorage>()
+          .GetStorage()
+          .RegisterWriter(
+              "uservice-dynconf",
+              [this](userver::utils::statistics::Writer &writer) {
+                writer["configs-write-coalescer"] = statistics_;
+              });
+}
+
+ConfigsWriteCoalescer::~ConfigsWriteCoalescer() {
+  statistics_entry_.Unregister();
+  // Writers waiting for a pending batch get an error instead of hanging
+  flush_tasks_.CancelAndWait();
+}
+
+bool ConfigsWriteCoalescer::IsEnabled() const {
+  bool enabled = enabled_;
+  TESTPOINT_CALLBACK("configs-write-coalescer-enabled",
+                     userver::formats::json::Value{},
+                     [&enabled](const userver::formats::json::Value &doc) {
+                       enabled = doc["enabled"].As<bool>(enabled);
+                     });
+  return enabled;
+}
+
+std::vector<std::string> ConfigsWriteCoalescer::Upsert(
+    const uservice_dynconf::utils::ConfigsUpsert &upsert) {
+  std::vector<ConfigWrite> config_writes;
+  for (const auto &[config_name, config_value] : Items(upsert.configs)) {
+    config_writes.push_back(ConfigWrite{
+        upsert.service, config_name,
+        userver::formats::json::ToString(config_value),
+        uservice_dynconf::models::ToString(
+            uservice_dynconf::utils::GetConfigMode(upsert, config_name)),
+        0});
+  }
+  if (config_writes.empty()) {
+    return {};
+  }
+  return Submit(std::move(config_writes)).get();
+}
+
+void ConfigsWriteCoalescer::Delete(
+    const uservice_dynconf::utils::ConfigsDelete &remove) {
+  std::vector<ConfigWrite> config_writes;
+  for (const auto &id : remove.ids) {
+    config_writes.push_back(
+        ConfigWrite{remove.service, id, std::nullopt, {}, 0});
+  }
+  if (config_writes.empty()) {
+    return;
+  }
+  Submit(std::move(config_writes)).get();
+}
+
+userver::engine::Future<ConfigsWriteCoalescer::Changed>
+ConfigsWriteCoalescer::Submit(std::vector<ConfigWrite> config_writes) {
+  userver::engine::Promise<Changed> promise;
+  auto future = promise.get_future();
+  std::shared_ptr<Batch> full_batch;
+  {
+    std::lock_guard lock{mutex_};
+    if (!batch_) {
+      batch_ = std::make_shared<Batch>();
+      flush_tasks_.AsyncDetach(
+          "configs-write-flush",
+          [this, batch = batch_] { FlushAfterWindow(batch); });
+    }
+    const auto writer = batch_->writers.size();
+    for (auto &config_write : config_writes) {
+      config_write.writer = writer;
+      batch_->config_writes.push_back(std::move(config_write));
+    }
+    batch_->writers.push_back(std::move(promise));
+    if (batch_->config_writes.size() >= max_batch_size_) {
+      full_batch = std::move(batch_);
+      batch_ = nullptr;
+    }
+  }
+  // A full batch is committed by the writer that filled it, without waiting
+  // for the window to end
+  if (full_batch) {
+    Commit(*full_batch);
+  }
+  return future;
+}
+
+void ConfigsWriteCoalescer::FlushAfterWindow(std::shared_ptr<Batch> batch) {
+  userver::engine::InterruptibleSleepFor(window_);
+  {
+    std::lock_guard lock{mutex_};
+    if (batch_ != batch) {
+      // Committed once it became full
+      return;
+    }
+    batch_ = nullptr;
+  }
+  Commit(*batch);
+}
+
+void ConfigsWriteCoalescer::Commit(Batch &batch) {
+  ++statistics_.batches;
+  statistics_.writes.Add({batch.writers.size()});
+  statistics_.writes_per_batch.Account(batch.writers.size());
+
+  // The last write of a config in submission order is the one committed
+  std::map<std::pair<std::string_view, std::string_view>, const ConfigWrite *>
+      last_writes;
+  for (const auto &config_write : batch.config_writes) {
+    last_writes[{config_write.service, config_write.config_name}] =
+        &config_write;
+  }
+  statistics_.superseded.Add(
+      {batch.config_writes.size() - last_writes.size()});
+
+  ConfigRows upserted;
+  ConfigRows removed;
+  for (const auto &[key, config_write] : last_writes) {
+    if (config_write->value) {
+      upserted.services.push_back(config_write->service);
+      upserted.config_names.push_back(config_write->config_name);
+      upserted.config_values.push_back(*config_write->value);
+      upserted.config_modes.push_back(config_write->mode);
+    } else {
+      removed.services.push_back(config_write->service);
+      removed.config_names.push_back(config_write->config_name);
+    }
+  }
+
+  std::vector<Changed> changed_by_writer(batch.writers.size());
+  try {
+    auto transaction =
+        cluster_->Begin(userver::storages::postgres::ClusterHostType::kMaster,
+                        userver::storages::postgres::TransactionOptions{});
+    ConfigKeys changed;
+    if (!upserted.services.empty()) {
+      changed =
+          transaction
+              .Execute(uservice_dynconf::sql::kInsertConfigValues.data(),
+                       upserted.services, upserted.config_names,
+                       upserted.config_values, upserted.config_modes)
+              .AsContainer<ConfigKeys>(userver::storages::postgres::kRowTag);
+    }
+    if (!removed.services.empty()) {
+      transaction.Execute(
+          uservice_dynconf::sql::kDeleteConfigValuesBatch.data(),
+          removed.services, removed.config_names);
+    }
+    transaction.Commit();
+
+    // Upserts overwritten within the batch report the config as changed if
+    // the committed write changed it
+    const std::set<std::tuple<std::string, std::string>> changed_keys(
+        changed.begin(), changed.end());
+    for (const auto &config_write : batch.config_writes) {
+      const auto key =
+          std::make_tuple(config_write.service, config_write.config_name);
+      if (config_write.value && changed_keys.count(key) > 0) {
+        changed_by_writer[config_write.writer].push_back(
+            config_write.config_name);
+      }
+    }
+  } catch (const std::exception &e) {
+    ++statistics_.failed_batches;
+    LOG_WARNING() << "Failed to commit " << batch.writers.size()
+                  << " coalesced config writes: " << e;
+    for (auto &writer : batch.writers) {
+      writer.set_exception(std::current_exception());
+    }
+    return;
+  }
+
+  for (std::size_t writer = 0; writer < batch.writers.size(); ++writer) {
+    auto &changed = changed_by_writer[writer];
+    std::sort(changed.begin(), changed.end());
+    batch.writers[writer].set_value(std::move(changed));
+  }
+}
+
+userver::yaml_config::Schema ConfigsWriteCoalescer::GetStaticConfigSchema() {
+  return userver::yaml_config::MergeSchemas<
+      userver::components::LoggableComponentBase>(R"(
+type: object
+description: commits concurrent admin writes of configs together
+additionalProperties: false
+properties:
+    pgcomponent:
+        type: string
+        description: name of the PostgreSQL component to write to
+    enabled:
+        type: boolean
+        description: |
+            whether admin handlers write through the coalescer, otherwise each
+            request commits on its own
+        defaultDescription: false
+    window:
+        type: string
+        description: |
+            time to collect writes after the first one before committing them
+        defaultDescription: 5ms
+    max-batch-size:
+        type: integer
+        description: |
+            number of config writes to commit right away, without waiting for
+            the window to end
+        defaultDescription: 1000
+        minimum: 1
+)");
+}
+
+} // namespace uservice_dynconf::storage
@@ -0,0 +1,103 @@
+#pragma once
+
+#include "userver/components/component_config.hpp"
+#include "userver/components/component_context.hpp"
+#include "userver/components/loggable_component_base.hpp"
+#include "userver/concurrent/background_task_storage.hpp"
+#include "userver/engine/future.hpp"
+#include "userver/engine/mutex.hpp"
+#include "userver/storages/postgres/postgres_fwd.hpp"
+#include "userver/utils/statistics/entry.hpp"
+#include "userver/utils/statistics/histogram.hpp"
+#include "userver/utils/statistics/rate_counter.hpp"
+#include "userver/utils/statistics/writer.hpp"
+#include "userver/yaml_config/schema.hpp"
+#include "utils/configs_request.hpp"
+#include <chrono>
+#include <cstddef>
+#include <memory>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <vector>
+
+namespace uservice_dynconf::storage {
+
+// Collects admin writes that arrive within a short window and commits them
+// in one transaction, so that concurrent writes share a single commit.
+// The last write of a config wins, in the order the writes were submitted.
+class ConfigsWriteCoalescer final
+    : public userver::components::LoggableComponentBase {
+public:
+  static constexpr std::string_view kName = "configs-write-coalescer";
+
+  ConfigsWriteCoalescer(const userver::components::ComponentConfig &config,
+                        const userver::components::ComponentContext &context);
+  ~ConfigsWriteCoalescer() override;
+
+  static userver::yaml_config::Schema GetStaticConfigSchema();
+
+  // Admin handlers write directly if the coalescer is disabled. Tests may
+  // switch it with the `configs-write-coalescer-enabled` testpoint.
+  bool IsEnabled() const;
+
+  // Returns names of configs changed by the commit the upsert was part of
+  std::vector<std::string>
+  Upsert(const uservice_dynconf::utils::ConfigsUpsert &upsert);
+  void Delete(const uservice_dynconf::utils::ConfigsDelete &remove);
+
+  // Exported as `uservice-dynconf.configs-write-coalescer`
+  struct Statistics {
+    Statistics();
+
+    // Writes committed together
+    userver::utils::statistics::Histogram writes_per_batch;
+    userver::utils::statistics::RateCounter batches;
+    userver::utils::statistics::RateCounter writes;
+    // Config writes overwritten by a later write in the same batch
+    userver::utils::statistics::RateCounter superseded;
+    userver::utils::statistics::RateCounter failed_batches;
+  };
+
+private:
+  using Changed = std::vector<std::string>;
+
+  struct ConfigWrite {
+    std::string service;
+    std::string config_name;
+    // Serialized value and mode name, deletes have none
+    std::optional<std::string> value;
+    std::string mode;
+    // Index of the submitting write in the batch
+    std::size_t writer;
+  };
+
+  struct Batch {
+    std::vector<ConfigWrite> config_writes;
+    std::vector<userver::engine::Promise<Changed>> writers;
+  };
+
+  userver::engine::Future<Changed>
+  Submit(std::vector<ConfigWrite> config_writes);
+  void FlushAfterWindow(std::shared_ptr<Batch> batch);
+  void Commit(Batch &batch);
+
+  const userver::storages::postgres::ClusterPtr cluster_;
+  const bool enabled_;
+  const std::chrono::milliseconds window_;
+  const std::size_t max_batch_size_;
+
+  userver::engine::Mutex mutex_;
+  // Batch collecting writes, a flush is scheduled for it
+  std::shared_ptr<Batch> batch_;
+
+  Statistics statistics_;
+  userver::utils::statistics::Entry statistics_entry_;
+  // Flushes use the members above, so they are stopped first
+  userver::concurrent::BackgroundTaskStorage flush_tasks_;
+};
+
+void DumpMetric(userver::utils::statistics::Writer &writer,
+                const ConfigsWriteCoalescer::Statistics &stats);
+
+} // namespace uservice_dynconf::storage
@@ -0,0 +1,73 @@
+#include "accept_header.hpp"
+
+#include <algorithm>
+#include <boost/algorithm/string/predicate.hpp>
+#include <cstddef>
+#include <cstdlib>
+#include <string>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+constexpr std::string_view kWhitespace = " \t";
+
+std::string_view Trim(std::string_view value) {
+  const auto begin = value.find_first_not_of(kWhitespace);
+  if (begin == std::string_view::npos) {
+    return {};
+  }
+  const auto end = value.find_last_not_of(kWhitespace);
+  return value.substr(begin, end - begin + 1);
+}
+
+// Splits off the part before the separator, the rest stays in `value`
+std::string_view SplitOff(std::string_view &value, char separator) {
+  const auto pos = value.find(separator);
+  const auto result = value.substr(0, pos);
+  value.remove_prefix(pos == std::string_view::npos ? value.size() : pos + 1);
+  return result;
+}
+
+// Quality of a list element from its parameters, e.g. `level=1;q=0.5`
+double ParseQuality(std::string_view params) {
+  while (!params.empty()) {
+    const auto param = Trim(SplitOff(params, ';'));
+    if (param.size() < 2 || (param[0] != 'q' && param[0] != 'Q') ||
+        param[1] != '=') {
+      continue;
+    }
+    const std::string value{Trim(param.substr(2))};
+    char *end = nullptr;
+    const auto quality = std::strtod(value.c_str(), &end);
+    if (end == value.c_str() || *end != '\0') {
+      // Malformed values are ignored, as if there were no `q`
+      return 1;
+    }
+    return std::clamp(quality, 0.0, 1.0);
+  }
+  return 1;
+}
+} // namespace
+
+double GetAcceptQuality(std::string_view header,
+                        std::initializer_list<std::string_view> tokens) {
+  // Index of the most specific listed token and its quality
+  std::size_t best = tokens.size();
+  double result = 0;
+  while (!header.empty()) {
+    auto element = SplitOff(header, ',');
+    const auto token = Trim(SplitOff(element, ';'));
+    const auto it = std::find_if(
+        tokens.begin(), tokens.end(), [&](std::string_view candidate) {
+          return boost::algorithm::iequals(token, candidate);
+        });
+    const auto index = static_cast<std::size_t>(it - tokens.begin());
+    if (index < best) {
+      best = index;
+      result = ParseQuality(element);
+    }
+  }
+  return result;
+}
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,15 @@
+#pragma once
+
+#include <initializer_list>
+#include <string_view>
+
+namespace uservice_dynconf::utils {
+
+// Quality (the `q` parameter, 1 by default) of the most specific of the
+// tokens listed in an Accept or Accept-Encoding header value. Tokens go
+// from the most specific one to the least specific one, e.g. a media type,
+// its `type/*` and `*/*`. Returns 0 if none of them is listed.
+double GetAcceptQuality(std::string_view header,
+                        std::initializer_list<std::string_view> tokens);
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,139 @@
+#include "configs_request.hpp"
+
+#include "userver/formats/common/items.hpp"
+#include "userver/formats/json/value_builder.hpp"
+#include "userver/utils/datetime.hpp"
+#include <cstdint>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+
+bool ConsitstsOfIdsFromConfigs(
+    const std::unordered_set<std::string> &kill_switches,
+    const userver::formats::json::Value &configs) {
+  for (const auto &kill_switch : kill_switches) {
+    if (!configs.HasMember(kill_switch)) {
+      return false;
+    }
+  }
+  return true;
+}
+
+bool HasIntersection(const std::unordered_set<std::string> &first,
+                     const std::unordered_set<std::string> &second) {
+  for (const auto &key : first) {
+    if (second.count(key) > 0) {
+      return true;
+    }
+  }
+  return false;
+}
+
+} // namespace
+
+ConfigsUpsert ParseConfigsUpsert(const userver::formats::json::Value &request) {
+  ConfigsUpsert result;
+  if (request["configs"].IsObject()) {
+    result.configs = request["configs"];
+  }
+  result.service = request["service"].As<std::string>({});
+  result.kill_switches_enabled =
+      request["kill_switches_enabled"].As<std::unordered_set<std::string>>({});
+  result.kill_switches_disabled =
+      request["kill_switches_disabled"].As<std::unordered_set<std::string>>({});
+  return result;
+}
+
+ConfigsDelete ParseConfigsDelete(const userver::formats::json::Value &request) {
+  ConfigsDelete result;
+  result.ids = request["ids"].As<std::vector<std::string>>({});
+  result.service = request["service"].As<std::string>({});
+  return result;
+}
+
+ConfigsQuery ParseConfigsQuery(const userver::formats::json::Value &request) {
+  ConfigsQuery result;
+  result.ids = request["ids"].As<std::vector<std::string>>({});
+  result.prefixes = request["prefixes"].As<std::vector<std::string>>({});
+  result.service = request["service"].As<std::string>({});
+  if (auto revision = request["revision"].As<std::int64_t>(0); revision > 0) {
+    // Client already has everything up to the revision
+    result.update_since = std::chrono::system_clock::time_point{
+        std::chrono::microseconds{revision + 1}};
+  } else if (auto str_time = request["updated_since"].As<std::string>({});
+             !str_time.empty()) {
+    result.update_since = {userver::utils::datetime::Stringtime(
+        str_time, userver::utils::datetime::kDefaultTimezone,
+        userver::utils::datetime::kRfc3339Format)};
+  }
+  if (result.update_since && *result.update_since < GetDeltaHorizon()) {
+    result.update_since.reset();
+    result.resync = true;
+  }
+  return result;
+}
+
+std::chrono::system_clock::time_point GetDeltaHorizon() {
+  return userver::utils::datetime::Now() - kTombstonesRetention +
+         std::chrono::hours{1};
+}
+
+ResponseOptions MakeResponseOptions(const ConfigsQuery &query) {
+  ResponseOptions result;
+  result.updated_since = query.update_since;
+  result.resync = query.resync;
+  if (query.update_since) {
+    result.min_revision = *query.update_since - std::chrono::microseconds{1};
+  }
+  return result;
+}
+
+std::optional<std::string> ValidateConfigsUpsert(const ConfigsUpsert &upsert) {
+  if (upsert.configs.IsEmpty() || upsert.service.empty()) {
+    return "Fields 'configs' and 'service' are required";
+  }
+  if (!ConsitstsOfIdsFromConfigs(upsert.kill_switches_enabled,
+                                 upsert.configs) ||
+      !ConsitstsOfIdsFromConfigs(upsert.kill_switches_disabled,
+                                 upsert.configs)) {
+    return "Fields 'kill_switches_enabled' and 'kill_switches_disabled' "
+           "must consist of ids from 'configs' field";
+  }
+  if (HasIntersection(upsert.kill_switches_enabled,
+                      upsert.kill_switches_disabled)) {
+    return "Ids in 'kill_switches_enabled' and 'kill_switches_disabled' "
+           "must not overlap";
+  }
+  return std::nullopt;
+}
+
+std::optional<std::string> ValidateConfigsDelete(const ConfigsDelete &remove) {
+  if (remove.ids.empty() || remove.service.empty()) {
+    return "Fields 'ids' and 'service' are required";
+  }
+  return std::nullopt;
+}
+
+uservice_dynconf::models::Mode GetConfigMode(const ConfigsUpsert &upsert,
+                                             const std::string &config_name) {
+  using Mode = uservice_dynconf::models::Mode;
+  if (upsert.kill_switches_enabled.count(config_name) > 0) {
+    return Mode::kKillSwitchEnabled;
+  }
+  if (upsert.kill_switches_disabled.count(config_name) > 0) {
+    return Mode::kKillSwitchDisabled;
+  }
+  return Mode::kDynamicConfig;
+}
+
+userver::formats::json::Value MakeConfigModeMap(const ConfigsUpsert &upsert) {
+  userver::formats::json::ValueBuilder builder;
+  for (const auto &[config_name, config_value] : Items(upsert.configs)) {
+    builder[config_name] =
+        uservice_dynconf::models::ToString(GetConfigMode(upsert, config_name));
+  }
+  return builder.ExtractValue();
+}
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,71 @@
+#pragma once
+
+#include "models/config.hpp"
+#include "userver/formats/json/value.hpp"
+#include "utils/make_configs_response.hpp"
+#include <chrono>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <unordered_set>
+#include <vector>
+
+namespace uservice_dynconf::utils {
+
+// Configs of one service to insert or update
+struct ConfigsUpsert {
+  userver::formats::json::Value configs;
+  std::unordered_set<std::string> kill_switches_enabled;
+  std::unordered_set<std::string> kill_switches_disabled;
+  std::string service{};
+};
+
+// Ids of one service to delete
+struct ConfigsDelete {
+  std::vector<std::string> ids{};
+  std::string service{};
+};
+
+// Configs of one service to read, as in /configs/values
+struct ConfigsQuery {
+  std::vector<std::string> ids{};
+  // Configs with names starting with any of the prefixes are selected too
+  std::vector<std::string> prefixes{};
+  std::optional<std::chrono::time_point<std::chrono::system_clock>>
+      update_since{};
+  std::string service{};
+  // Set instead of `update_since` for deltas older than the delta horizon,
+  // the client gets all the configs and replaces its own with them
+  bool resync = false;
+};
+
+// Tombstones of deleted configs are purged after this time, see
+// sql::kDeleteConfigValues
+inline constexpr std::chrono::hours kTombstonesRetention{24};
+
+// Deltas since an earlier time may miss deletions whose tombstones are
+// already purged. The hour of margin covers clock differences between the
+// service and the database.
+std::chrono::system_clock::time_point GetDeltaHorizon();
+
+ConfigsUpsert ParseConfigsUpsert(const userver::formats::json::Value &request);
+ConfigsDelete ParseConfigsDelete(const userver::formats::json::Value &request);
+ConfigsQuery ParseConfigsQuery(const userver::formats::json::Value &request);
+
+// Options of the response to the query. A delta keeps at least the revision
+// the client already has: configs of the service at or below it are not in
+// the delta, so without changes the response would have no revision to
+// report.
+ResponseOptions MakeResponseOptions(const ConfigsQuery &query);
+
+// Return the error message if the request is invalid
+std::optional<std::string> ValidateConfigsUpsert(const ConfigsUpsert &upsert);
+std::optional<std::string> ValidateConfigsDelete(const ConfigsDelete &remove);
+
+uservice_dynconf::models::Mode GetConfigMode(const ConfigsUpsert &upsert,
+                                             const std::string &config_name);
+
+// Config name to mode name map for kInsertConfigValue
+userver::formats::json::Value MakeConfigModeMap(const ConfigsUpsert &upsert);
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,12 @@
+#include "etag.hpp"
+
+#include <fmt/format.h>
+#include <functional>
+
+namespace uservice_dynconf::utils {
+
+std::string MakeETag(std::string_view body) {
+  return fmt::format("\"{:016x}\"", std::hash<std::string_view>{}(body));
+}
+
+} // namespace uservice_dynconf::utils
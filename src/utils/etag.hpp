@@ -0,0 +1,10 @@
+#pragma once
+
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::utils {
+
+std::string MakeETag(std::string_view body);
+
+}
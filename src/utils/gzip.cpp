@@ -0,0 +1,42 @@
+#include "gzip.hpp"
+
+#include "utils/accept_header.hpp"
+#include <stdexcept>
+#include <zlib.h>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+// Deflate with a gzip header, see deflateInit2 in zlib.h
+constexpr int kGzipWindowBits = 15 + 16;
+constexpr int kMemLevel = 8;
+} // namespace
+
+bool AcceptsGzip(std::string_view accept_encoding) {
+  return GetAcceptQuality(accept_encoding, {"gzip", "*"}) > 0;
+}
+
+std::string GzipCompress(std::string_view data) {
+  z_stream stream{};
+  if (deflateInit2(&stream, Z_DEFAULT_COMPRESSION, Z_DEFLATED, kGzipWindowBits,
+                   kMemLevel, Z_DEFAULT_STRATEGY) != Z_OK) {
+    throw std::runtime_error("Failed to initialize gzip compression");
+  }
+
+  std::string result(deflateBound(&stream, data.size()), '\0');
+  stream.next_in =
+      reinterpret_cast<Bytef *>(const_cast<char *>(data.data()));
+  stream.avail_in = data.size();
+  stream.next_out = reinterpret_cast<Bytef *>(result.data());
+  stream.avail_out = result.size();
+
+  const auto status = deflate(&stream, Z_FINISH);
+  deflateEnd(&stream);
+  if (status != Z_STREAM_END) {
+    throw std::runtime_error("Failed to gzip data");
+  }
+  result.resize(stream.total_out);
+  return result;
+}
+
+} // namespace uservice_dynconf::utils
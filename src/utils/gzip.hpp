@@ -0,0 +1,14 @@
+#pragma once
+
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::utils {
+
+// Checks whether gzip is allowed by the Accept-Encoding header value, that
+// is listed itself or as `*` with a non-zero quality
+bool AcceptsGzip(std::string_view accept_encoding);
+
+std::string GzipCompress(std::string_view data);
+
+} // namespace uservice_dynconf::utils
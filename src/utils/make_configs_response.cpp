@@ -0,0 +1,189 @@
+#include "make_configs_response.hpp"
+
+#include "userver/formats/json/string_builder.hpp"
+#include "userver/formats/json/value_builder.hpp"
+#include "userver/utils/datetime.hpp"
+#include "utils/msgpack.hpp"
+#include <algorithm>
+#include <string_view>
+#include <vector>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+constexpr std::chrono::system_clock::time_point kMinTime{
+    std::chrono::milliseconds(0)};
+
+// Configs and names of a response, shared by all response formats
+struct ResponseData {
+  std::vector<const uservice_dynconf::models::Config *> configs;
+  std::vector<std::string_view> kill_switches_enabled;
+  std::vector<std::string_view> kill_switches_disabled;
+  std::vector<std::string_view> removed;
+  std::chrono::system_clock::time_point updated_at = kMinTime;
+  std::chrono::system_clock::time_point revision = kMinTime;
+};
+
+ResponseData MakeResponseData(
+    userver::utils::span<const uservice_dynconf::models::Config *const> configs,
+    const ResponseOptions &options) {
+  const auto &updated_since = options.updated_since;
+  ResponseData result;
+  result.revision = std::max(result.revision, options.min_revision);
+  result.configs.reserve(configs.size());
+  for (const auto &config : configs) {
+    if (!config) {
+      continue;
+    }
+    result.revision = std::max(result.revision, config->revision);
+    if (updated_since.value_or(kMinTime) > config->revision) {
+      continue;
+    }
+    const auto &name = config->key.config_name.Get();
+    if (config->deleted_at) {
+      // Only clients that already have some configs need to know about
+      // removed ones
+      if (updated_since) {
+        result.removed.push_back(name);
+      }
+      continue;
+    }
+    result.configs.push_back(config);
+    switch (config->mode) {
+    case uservice_dynconf::models::Mode::kKillSwitchEnabled:
+      result.kill_switches_enabled.push_back(name);
+      break;
+    case uservice_dynconf::models::Mode::kKillSwitchDisabled:
+      result.kill_switches_disabled.push_back(name);
+      break;
+    case uservice_dynconf::models::Mode::kDynamicConfig:
+      break;
+    }
+    result.updated_at =
+        std::max(result.updated_at, config->updated_at.GetUnderlying());
+  }
+  if (result.updated_at == kMinTime) {
+    result.updated_at = userver::utils::datetime::Now();
+  }
+  return result;
+}
+
+void WriteArray(userver::formats::json::StringBuilder &builder,
+                const std::vector<std::string_view> &names) {
+  userver::formats::json::StringBuilder::ArrayGuard guard{builder};
+  for (const auto name : names) {
+    builder.WriteString(name);
+  }
+}
+
+void WriteNames(userver::formats::json::StringBuilder &builder,
+                std::string_view key,
+                const std::vector<std::string_view> &names) {
+  if (names.empty()) {
+    return;
+  }
+  builder.Key(key);
+  WriteArray(builder, names);
+}
+
+void WriteNames(MsgpackWriter &writer, std::string_view key,
+                const std::vector<std::string_view> &names) {
+  if (names.empty()) {
+    return;
+  }
+  writer.WriteString(key);
+  writer.WriteArrayHeader(names.size());
+  for (const auto name : names) {
+    writer.WriteString(name);
+  }
+}
+
+} // namespace
+
+std::int64_t ToRevision(std::chrono::system_clock::time_point updated_at) {
+  return std::chrono::duration_cast<std::chrono::microseconds>(
+             updated_at.time_since_epoch())
+      .count();
+}
+
+std::string MakeConfigsResponse(
+    userver::utils::span<const uservice_dynconf::models::Config *const> configs,
+    const ResponseOptions &options) {
+  const auto data = MakeResponseData(configs, options);
+
+  userver::formats::json::StringBuilder builder;
+  {
+    userver::formats::json::StringBuilder::ObjectGuard response_guard{builder};
+    builder.Key("configs");
+    {
+      userver::formats::json::StringBuilder::ObjectGuard configs_guard{
+          builder};
+      for (const auto *config : data.configs) {
+        // Values are stored serialized, so they are copied as is
+        builder.Key(config->key.config_name.Get());
+        builder.WriteRawString(config->config_value.GetJson());
+      }
+    }
+    WriteNames(builder, "kill_switches_enabled", data.kill_switches_enabled);
+    WriteNames(builder, "kill_switches_disabled", data.kill_switches_disabled);
+    WriteNames(builder, "removed", data.removed);
+    builder.Key("updated_at");
+    builder.WriteValue(
+        userver::formats::json::ValueBuilder(data.updated_at).ExtractValue());
+    builder.Key("revision");
+    builder.WriteInt64(ToRevision(data.revision));
+    if (options.resync) {
+      builder.Key("resync");
+      builder.WriteBool(true);
+    }
+  }
+  return builder.GetString();
+}
+
+std::string MakeConfigsMsgpackResponse(
+    userver::utils::span<const uservice_dynconf::models::Config *const> configs,
+    const ResponseOptions &options) {
+  const auto data = MakeResponseData(configs, options);
+
+  MsgpackWriter writer;
+  writer.WriteMapHeader(3 + !data.kill_switches_enabled.empty() +
+                        !data.kill_switches_disabled.empty() +
+                        !data.removed.empty() + options.resync);
+  writer.WriteString("configs");
+  writer.WriteMapHeader(data.configs.size());
+  for (const auto *config : data.configs) {
+    writer.WriteString(config->key.config_name.Get());
+    writer.WriteJson(config->config_value.GetJson());
+  }
+  WriteNames(writer, "kill_switches_enabled", data.kill_switches_enabled);
+  WriteNames(writer, "kill_switches_disabled", data.kill_switches_disabled);
+  WriteNames(writer, "removed", data.removed);
+  writer.WriteString("updated_at");
+  writer.WriteString(userver::utils::datetime::Timestring(
+      data.updated_at, userver::utils::datetime::kDefaultTimezone,
+      userver::utils::datetime::kRfc3339Format));
+  writer.WriteString("revision");
+  writer.WriteInt(ToRevision(data.revision));
+  if (options.resync) {
+    writer.WriteString("resync");
+    writer.WriteBool(true);
+  }
+  return writer.ExtractString();
+}
+
+std::string
+MakeKillSwitchesResponse(const std::vector<std::string_view> &enabled,
+                         const std::vector<std::string_view> &disabled) {
+  userver::formats::json::StringBuilder builder;
+  {
+    userver::formats::json::StringBuilder::ObjectGuard guard{builder};
+    // Unlike in /configs/values both lists are always present
+    builder.Key("kill_switches_enabled");
+    WriteArray(builder, enabled);
+    builder.Key("kill_switches_disabled");
+    WriteArray(builder, disabled);
+  }
+  return builder.GetString();
+}
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,47 @@
+#pragma once
+
+#include "models/config.hpp"
+#include "userver/utils/span.hpp"
+#include <chrono>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <vector>
+
+namespace uservice_dynconf::utils {
+
+// Revision of a config set is the max revision of its configs in
+// microseconds, see models::Config::revision. It grows with every change of
+// the set.
+std::int64_t ToRevision(std::chrono::system_clock::time_point updated_at);
+
+struct ResponseOptions {
+  // Configs with an earlier revision are skipped, deleted ones are listed in
+  // `removed`
+  std::optional<std::chrono::system_clock::time_point> updated_since;
+  // Lower bound of the response revision, so that a delta without changes
+  // keeps the revision the client already has instead of resetting it
+  std::chrono::system_clock::time_point min_revision{};
+  // Marks a full response to a delta request the client must replace its
+  // configs with
+  bool resync = false;
+};
+
+// Serialized response of /configs/values for the configs
+std::string MakeConfigsResponse(
+    userver::utils::span<const uservice_dynconf::models::Config *const> configs,
+    const ResponseOptions &options = {});
+
+// Same response in MessagePack, config values are transcoded from their
+// serialized JSON without parsing it into a DOM
+std::string MakeConfigsMsgpackResponse(
+    userver::utils::span<const uservice_dynconf::models::Config *const> configs,
+    const ResponseOptions &options = {});
+
+// Serialized response of /kill-switches/values for the names
+std::string
+MakeKillSwitchesResponse(const std::vector<std::string_view> &enabled,
+                         const std::vector<std::string_view> &disabled);
+
+}
@@ -0,0 +1,97 @@
+#include "utils/make_configs_response.hpp"
+
+#include <benchmark/benchmark.h>
+#include <fmt/format.h>
+
+#include <chrono>
+#include <cstddef>
+#include <optional>
+#include <string>
+#include <vector>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+using uservice_dynconf::models::Config;
+
+// Values range from scalars to a large routing map, as in real services
+std::string MakeValue(std::size_t index) {
+  if (index % 100 == 0) {
+    std::string routes;
+    for (std::size_t i = 0; i < 500; ++i) {
+      routes += fmt::format("{}\"/v1/handler-{}\": {{\"url\": "
+                            "\"http://backend-{}.local\", \"timeout_ms\": "
+                            "{}, \"retries\": 3, \"enabled\": true}}",
+                            i ? ", " : "", i, i, 100 + i);
+    }
+    return "{" + routes + "}";
+  }
+  if (index % 10 == 0) {
+    return fmt::format("{{\"min_pool_size\": {}, \"max_pool_size\": {}, "
+                       "\"max_queue_size\": 200, \"ratio\": 0.{}, "
+                       "\"name\": \"pool-{}\"}}",
+                       index % 16, index % 64, index, index);
+  }
+  return std::to_string(index);
+}
+
+std::vector<Config> MakeConfigs(std::size_t count) {
+  std::vector<Config> configs;
+  configs.reserve(count);
+  const userver::storages::postgres::TimePointTz updated_at{
+      std::chrono::system_clock::now()};
+  for (std::size_t i = 0; i < count; ++i) {
+    configs.push_back(Config{
+        {models::SharedString{"service"},
+         models::SharedString{fmt::format("CONFIG_{}", i)}},
+        models::ConfigValue{MakeValue(i)},
+        i % 7 == 0 ? models::Mode::kKillSwitchEnabled
+                   : models::Mode::kDynamicConfig,
+        updated_at,
+        std::nullopt,
+        updated_at.GetUnderlying()});
+  }
+  return configs;
+}
+
+std::vector<const Config *> MakeView(const std::vector<Config> &configs) {
+  std::vector<const Config *> view;
+  view.reserve(configs.size());
+  for (const auto &config : configs) {
+    view.push_back(&config);
+  }
+  return view;
+}
+
+template <typename MakeResponse>
+void MakeResponseBenchmark(benchmark::State &state, MakeResponse make) {
+  const auto configs = MakeConfigs(state.range(0));
+  const auto view = MakeView(configs);
+  std::size_t size = 0;
+  for (auto _ : state) {
+    const auto response = make(view, {});
+    size = response.size();
+    benchmark::DoNotOptimize(response);
+  }
+  state.counters["response_bytes"] = size;
+  state.SetBytesProcessed(state.iterations() * size);
+}
+} // namespace
+
+void MakeJsonResponse(benchmark::State &state) {
+  MakeResponseBenchmark(state, MakeConfigsResponse);
+}
+BENCHMARK(MakeJsonResponse)
+    ->RangeMultiplier(10)
+    ->Range(10, 1000)
+    ->Unit(benchmark::kMicrosecond);
+
+void MakeMsgpackResponse(benchmark::State &state) {
+  MakeResponseBenchmark(state, MakeConfigsMsgpackResponse);
+}
+BENCHMARK(MakeMsgpackResponse)
+    ->RangeMultiplier(10)
+    ->Range(10, 1000)
+    ->Unit(benchmark::kMicrosecond);
+
+} // namespace uservice_dynconf::utils
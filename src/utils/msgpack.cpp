@@ -0,0 +1,405 @@
+#include "msgpack.hpp"
+
+#include "utils/accept_header.hpp"
+#include <algorithm>
+#include <charconv>
+#include <cstdlib>
+#include <cstring>
+#include <limits>
+#include <stdexcept>
+#include <system_error>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+// Containers are written with the largest header first, it is replaced with
+// the shortest one when the number of items is known
+constexpr std::size_t kMaxContainerHeaderSize = 5;
+// Nesting limit of transcoded JSON values, so that malformed input can not
+// exhaust the stack
+constexpr int kMaxDepth = 128;
+
+template <typename T> void AppendBigEndian(std::string &buffer, T value) {
+  char bytes[sizeof(T)];
+  for (std::size_t i = 0; i < sizeof(T); ++i) {
+    bytes[sizeof(T) - 1 - i] = static_cast<char>(value & 0xff);
+    value >>= 8;
+  }
+  buffer.append(bytes, sizeof(T));
+}
+
+void AppendByte(std::string &buffer, unsigned char byte) {
+  buffer.push_back(static_cast<char>(byte));
+}
+
+void AppendHeader(std::string &buffer, std::size_t size, unsigned char fix,
+                  std::size_t fix_max, unsigned char marker16,
+                  unsigned char marker32) {
+  if (size <= fix_max) {
+    AppendByte(buffer, fix | static_cast<unsigned char>(size));
+  } else if (size <= std::numeric_limits<std::uint16_t>::max()) {
+    AppendByte(buffer, marker16);
+    AppendBigEndian(buffer, static_cast<std::uint16_t>(size));
+  } else {
+    AppendByte(buffer, marker32);
+    AppendBigEndian(buffer, static_cast<std::uint32_t>(size));
+  }
+}
+
+void AppendUtf8(std::string &buffer, std::uint32_t code_point) {
+  if (code_point < 0x80) {
+    AppendByte(buffer, code_point);
+  } else if (code_point < 0x800) {
+    AppendByte(buffer, 0xc0 | (code_point >> 6));
+    AppendByte(buffer, 0x80 | (code_point & 0x3f));
+  } else if (code_point < 0x10000) {
+    AppendByte(buffer, 0xe0 | (code_point >> 12));
+    AppendByte(buffer, 0x80 | ((code_point >> 6) & 0x3f));
+    AppendByte(buffer, 0x80 | (code_point & 0x3f));
+  } else {
+    AppendByte(buffer, 0xf0 | (code_point >> 18));
+    AppendByte(buffer, 0x80 | ((code_point >> 12) & 0x3f));
+    AppendByte(buffer, 0x80 | ((code_point >> 6) & 0x3f));
+    AppendByte(buffer, 0x80 | (code_point & 0x3f));
+  }
+}
+
+class JsonTranscoder {
+public:
+  JsonTranscoder(std::string_view json, MsgpackWriter &writer,
+                 std::string &buffer)
+      : json_(json), writer_(writer), buffer_(buffer) {}
+
+  void Transcode() {
+    ParseValue(0);
+    SkipSpaces();
+    if (pos_ != json_.size()) {
+      Fail();
+    }
+  }
+
+private:
+  [[noreturn]] void Fail() const {
+    throw std::runtime_error("Malformed JSON at position " +
+                             std::to_string(pos_));
+  }
+
+  char Peek() const { return pos_ < json_.size() ? json_[pos_] : '\0'; }
+
+  void Expect(char c) {
+    if (Peek() != c) {
+      Fail();
+    }
+    ++pos_;
+  }
+
+  void SkipSpaces() {
+    while (pos_ < json_.size() &&
+           (json_[pos_] == ' ' || json_[pos_] == '\n' || json_[pos_] == '\r' ||
+            json_[pos_] == '\t')) {
+      ++pos_;
+    }
+  }
+
+  void ExpectLiteral(std::string_view literal) {
+    if (json_.substr(pos_, literal.size()) != literal) {
+      Fail();
+    }
+    pos_ += literal.size();
+  }
+
+  void ParseValue(int depth) {
+    if (depth > kMaxDepth) {
+      Fail();
+    }
+    SkipSpaces();
+    switch (Peek()) {
+    case '{':
+      ParseContainer(depth, '}', true);
+      break;
+    case '[':
+      ParseContainer(depth, ']', false);
+      break;
+    case '"':
+      ParseString();
+      break;
+    case 't':
+      ExpectLiteral("true");
+      writer_.WriteBool(true);
+      break;
+    case 'f':
+      ExpectLiteral("false");
+      writer_.WriteBool(false);
+      break;
+    case 'n':
+      ExpectLiteral("null");
+      writer_.WriteNil();
+      break;
+    default:
+      ParseNumber();
+    }
+  }
+
+  void ParseContainer(int depth, char close, bool is_map) {
+    ++pos_;
+    const auto header_pos = buffer_.size();
+    buffer_.append(kMaxContainerHeaderSize, '\0');
+
+    std::size_t size = 0;
+    SkipSpaces();
+    if (Peek() == close) {
+      ++pos_;
+    } else {
+      while (true) {
+        if (is_map) {
+          SkipSpaces();
+          ParseString();
+          SkipSpaces();
+          Expect(':');
+        }
+        ParseValue(depth + 1);
+        ++size;
+        SkipSpaces();
+        if (Peek() != ',') {
+          break;
+        }
+        ++pos_;
+      }
+      Expect(close);
+    }
+
+    MsgpackWriter header;
+    if (is_map) {
+      header.WriteMapHeader(size);
+    } else {
+      header.WriteArrayHeader(size);
+    }
+    buffer_.replace(header_pos, kMaxContainerHeaderSize, header.GetString());
+  }
+
+  std::uint32_t ParseHex4() {
+    if (pos_ + 4 > json_.size()) {
+      Fail();
+    }
+    std::uint32_t result = 0;
+    const auto *begin = json_.data() + pos_;
+    const auto [end, ec] = std::from_chars(begin, begin + 4, result, 16);
+    if (ec != std::errc{} || end != begin + 4) {
+      Fail();
+    }
+    pos_ += 4;
+    return result;
+  }
+
+  void ParseString() {
+    Expect('"');
+    const auto end = json_.find_first_of("\"\\", pos_);
+    if (end == std::string_view::npos) {
+      Fail();
+    }
+    if (json_[end] == '"') {
+      // Fast path for strings without escapes
+      writer_.WriteString(json_.substr(pos_, end - pos_));
+      pos_ = end + 1;
+      return;
+    }
+
+    std::string result{json_.substr(pos_, end - pos_)};
+    pos_ = end;
+    while (true) {
+      if (pos_ >= json_.size()) {
+        Fail();
+      }
+      const char c = json_[pos_++];
+      if (c == '"') {
+        break;
+      }
+      if (c != '\\') {
+        result.push_back(c);
+        continue;
+      }
+      if (pos_ >= json_.size()) {
+        Fail();
+      }
+      switch (json_[pos_++]) {
+      case '"':
+        result.push_back('"');
+        break;
+      case '\\':
+        result.push_back('\\');
+        break;
+      case '/':
+        result.push_back('/');
+        break;
+      case 'b':
+        result.push_back('\b');
+        break;
+      case 'f':
+        result.push_back('\f');
+        break;
+      case 'n':
+        result.push_back('\n');
+        break;
+      case 'r':
+        result.push_back('\r');
+        break;
+      case 't':
+        result.push_back('\t');
+        break;
+      case 'u': {
+        auto code_point = ParseHex4();
+        if (code_point >= 0xd800 && code_point <= 0xdbff) {
+          // Surrogate pair
+          ExpectLiteral("\\u");
+          const auto low = ParseHex4();
+          if (low < 0xdc00 || low > 0xdfff) {
+            Fail();
+          }
+          code_point = 0x10000 + ((code_point - 0xd800) << 10) + (low - 0xdc00);
+        }
+        AppendUtf8(result, code_point);
+        break;
+      }
+      default:
+        Fail();
+      }
+    }
+    writer_.WriteString(result);
+  }
+
+  void ParseNumber() {
+    const auto end = json_.find_first_not_of("+-.0123456789eE", pos_);
+    const auto token =
+        json_.substr(pos_, end == std::string_view::npos ? end : end - pos_);
+    if (token.empty()) {
+      Fail();
+    }
+    pos_ += token.size();
+
+    const auto *begin = token.data();
+    const auto *token_end = token.data() + token.size();
+    if (token.find_first_of(".eE") == std::string_view::npos) {
+      std::int64_t value = 0;
+      if (const auto result = std::from_chars(begin, token_end, value);
+          result.ec == std::errc{} && result.ptr == token_end) {
+        writer_.WriteInt(value);
+        return;
+      }
+      // Integers above the int64 range
+      std::uint64_t unsigned_value = 0;
+      if (const auto result = std::from_chars(begin, token_end, unsigned_value);
+          result.ec == std::errc{} && result.ptr == token_end) {
+        writer_.WriteUInt(unsigned_value);
+        return;
+      }
+    }
+
+    // std::strtod needs a null-terminated string
+    const std::string copy{token};
+    char *parsed_end = nullptr;
+    const double value = std::strtod(copy.c_str(), &parsed_end);
+    if (parsed_end != copy.c_str() + copy.size()) {
+      Fail();
+    }
+    writer_.WriteDouble(value);
+  }
+
+  std::string_view json_;
+  MsgpackWriter &writer_;
+  std::string &buffer_;
+  std::size_t pos_ = 0;
+};
+} // namespace
+
+bool AcceptsMsgpack(std::string_view accept) {
+  const auto msgpack =
+      std::max(GetAcceptQuality(accept, {kMsgpackContentType}),
+               GetAcceptQuality(accept, {"application/x-msgpack"}));
+  return msgpack > 0 &&
+         msgpack >= GetAcceptQuality(
+                        accept, {"application/json", "application/*", "*/*"});
+}
+
+void MsgpackWriter::WriteNil() { AppendByte(buffer_, 0xc0); }
+
+void MsgpackWriter::WriteBool(bool value) {
+  AppendByte(buffer_, value ? 0xc3 : 0xc2);
+}
+
+void MsgpackWriter::WriteInt(std::int64_t value) {
+  if (value >= 0) {
+    WriteUInt(value);
+  } else if (value >= -32) {
+    // Negative fixint
+    AppendByte(buffer_, static_cast<unsigned char>(value));
+  } else if (value >= std::numeric_limits<std::int8_t>::min()) {
+    AppendByte(buffer_, 0xd0);
+    AppendByte(buffer_, static_cast<unsigned char>(value));
+  } else if (value >= std::numeric_limits<std::int16_t>::min()) {
+    AppendByte(buffer_, 0xd1);
+    AppendBigEndian(buffer_, static_cast<std::uint16_t>(value));
+  } else if (value >= std::numeric_limits<std::int32_t>::min()) {
+    AppendByte(buffer_, 0xd2);
+    AppendBigEndian(buffer_, static_cast<std::uint32_t>(value));
+  } else {
+    AppendByte(buffer_, 0xd3);
+    AppendBigEndian(buffer_, static_cast<std::uint64_t>(value));
+  }
+}
+
+void MsgpackWriter::WriteUInt(std::uint64_t value) {
+  if (value <= 0x7f) {
+    // Positive fixint
+    AppendByte(buffer_, value);
+  } else if (value <= std::numeric_limits<std::uint8_t>::max()) {
+    AppendByte(buffer_, 0xcc);
+    AppendByte(buffer_, value);
+  } else if (value <= std::numeric_limits<std::uint16_t>::max()) {
+    AppendByte(buffer_, 0xcd);
+    AppendBigEndian(buffer_, static_cast<std::uint16_t>(value));
+  } else if (value <= std::numeric_limits<std::uint32_t>::max()) {
+    AppendByte(buffer_, 0xce);
+    AppendBigEndian(buffer_, static_cast<std::uint32_t>(value));
+  } else {
+    AppendByte(buffer_, 0xcf);
+    AppendBigEndian(buffer_, value);
+  }
+}
+
+void MsgpackWriter::WriteDouble(double value) {
+  std::uint64_t bits = 0;
+  static_assert(sizeof(bits) == sizeof(value));
+  std::memcpy(&bits, &value, sizeof(value));
+  AppendByte(buffer_, 0xcb);
+  AppendBigEndian(buffer_, bits);
+}
+
+void MsgpackWriter::WriteString(std::string_view value) {
+  if (value.size() < 32) {
+    AppendByte(buffer_, 0xa0 | static_cast<unsigned char>(value.size()));
+  } else if (value.size() <= std::numeric_limits<std::uint8_t>::max()) {
+    AppendByte(buffer_, 0xd9);
+    AppendByte(buffer_, value.size());
+  } else if (value.size() <= std::numeric_limits<std::uint16_t>::max()) {
+    AppendByte(buffer_, 0xda);
+    AppendBigEndian(buffer_, static_cast<std::uint16_t>(value.size()));
+  } else {
+    AppendByte(buffer_, 0xdb);
+    AppendBigEndian(buffer_, static_cast<std::uint32_t>(value.size()));
+  }
+  buffer_.append(value);
+}
+
+void MsgpackWriter::WriteArrayHeader(std::size_t size) {
+  AppendHeader(buffer_, size, 0x90, 15, 0xdc, 0xdd);
+}
+
+void MsgpackWriter::WriteMapHeader(std::size_t size) {
+  AppendHeader(buffer_, size, 0x80, 15, 0xde, 0xdf);
+}
+
+void MsgpackWriter::WriteJson(std::string_view json) {
+  JsonTranscoder{json, *this, buffer_}.Transcode();
+}
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,40 @@
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+#include <string_view>
+
+namespace uservice_dynconf::utils {
+
+inline constexpr const char *kMsgpackContentType = "application/msgpack";
+
+// Checks whether MessagePack is requested by the Accept header value: it
+// must be listed explicitly with a non-zero quality not lower than JSON has
+bool AcceptsMsgpack(std::string_view accept);
+
+// Writes MessagePack values into a buffer, containers are written as a
+// header followed by their items.
+class MsgpackWriter {
+public:
+  void WriteNil();
+  void WriteBool(bool value);
+  void WriteInt(std::int64_t value);
+  void WriteUInt(std::uint64_t value);
+  void WriteDouble(double value);
+  void WriteString(std::string_view value);
+  void WriteArrayHeader(std::size_t size);
+  void WriteMapHeader(std::size_t size);
+
+  // Transcodes serialized JSON straight into MessagePack, without building
+  // a DOM. Throws std::runtime_error on malformed JSON.
+  void WriteJson(std::string_view json);
+
+  const std::string &GetString() const { return buffer_; }
+  std::string ExtractString() { return std::move(buffer_); }
+
+private:
+  std::string buffer_;
+};
+
+} // namespace uservice_dynconf::utils
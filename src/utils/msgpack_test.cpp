@@ -0,0 +1,264 @@
+#include "msgpack.hpp"
+
+#include <cstdint>
+#include <limits>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+
+#include <userver/utest/utest.hpp>
+
+namespace uservice_dynconf::utils {
+
+namespace {
+// Space separated hex bytes, so that mismatches are readable
+std::string Hex(std::string_view bytes) {
+  constexpr std::string_view kDigits = "0123456789abcdef";
+  std::string result;
+  for (const auto byte : bytes) {
+    if (!result.empty()) {
+      result.push_back(' ');
+    }
+    const auto value = static_cast<unsigned char>(byte);
+    result.push_back(kDigits[value >> 4]);
+    result.push_back(kDigits[value & 0xf]);
+  }
+  return result;
+}
+
+// Hex of the first bytes only, for values with long payloads
+std::string HexPrefix(std::string_view bytes, std::size_t size) {
+  return Hex(bytes.substr(0, size));
+}
+
+std::string FromJson(std::string_view json) {
+  MsgpackWriter writer;
+  writer.WriteJson(json);
+  return Hex(writer.GetString());
+}
+
+std::string Int(std::int64_t value) {
+  MsgpackWriter writer;
+  writer.WriteInt(value);
+  return Hex(writer.GetString());
+}
+
+std::string UInt(std::uint64_t value) {
+  MsgpackWriter writer;
+  writer.WriteUInt(value);
+  return Hex(writer.GetString());
+}
+
+// JSON array or object of `size` zeros, keys are distinct numbers
+std::string JsonContainer(std::size_t size, bool is_map) {
+  std::string result{is_map ? '{' : '['};
+  for (std::size_t i = 0; i < size; ++i) {
+    if (i != 0) {
+      result.push_back(',');
+    }
+    if (is_map) {
+      result += '"' + std::to_string(i) + "\":";
+    }
+    result.push_back('0');
+  }
+  result.push_back(is_map ? '}' : ']');
+  return result;
+}
+} // namespace
+
+TEST(Msgpack, Scalars) {
+  MsgpackWriter writer;
+  writer.WriteNil();
+  writer.WriteBool(false);
+  writer.WriteBool(true);
+  writer.WriteDouble(1.5);
+  EXPECT_EQ(Hex(writer.GetString()), "c0 c2 c3 cb 3f f8 00 00 00 00 00 00");
+
+  const auto extracted = writer.ExtractString();
+  EXPECT_EQ(extracted.size(), 12u);
+}
+
+TEST(Msgpack, UnsignedIntegers) {
+  EXPECT_EQ(UInt(0), "00");
+  EXPECT_EQ(UInt(127), "7f");
+  EXPECT_EQ(UInt(128), "cc 80");
+  EXPECT_EQ(UInt(255), "cc ff");
+  EXPECT_EQ(UInt(256), "cd 01 00");
+  EXPECT_EQ(UInt(65535), "cd ff ff");
+  EXPECT_EQ(UInt(65536), "ce 00 01 00 00");
+  EXPECT_EQ(UInt(4294967295), "ce ff ff ff ff");
+  EXPECT_EQ(UInt(4294967296), "cf 00 00 00 01 00 00 00 00");
+  EXPECT_EQ(UInt(std::numeric_limits<std::uint64_t>::max()),
+            "cf ff ff ff ff ff ff ff ff");
+}
+
+TEST(Msgpack, SignedIntegers) {
+  EXPECT_EQ(Int(0), "00");
+  EXPECT_EQ(Int(1000), "cd 03 e8");
+  EXPECT_EQ(Int(-1), "ff");
+  EXPECT_EQ(Int(-32), "e0");
+  EXPECT_EQ(Int(-33), "d0 df");
+  EXPECT_EQ(Int(-128), "d0 80");
+  EXPECT_EQ(Int(-129), "d1 ff 7f");
+  EXPECT_EQ(Int(-32768), "d1 80 00");
+  EXPECT_EQ(Int(-32769), "d2 ff ff 7f ff");
+  EXPECT_EQ(Int(-2147483648), "d2 80 00 00 00");
+  EXPECT_EQ(Int(-2147483649), "d3 ff ff ff ff 7f ff ff ff");
+  EXPECT_EQ(Int(std::numeric_limits<std::int64_t>::min()),
+            "d3 80 00 00 00 00 00 00 00");
+  EXPECT_EQ(Int(std::numeric_limits<std::int64_t>::max()),
+            "cf 7f ff ff ff ff ff ff ff");
+}
+
+TEST(Msgpack, StringHeaders) {
+  const auto header = [](std::size_t size, std::size_t header_size) {
+    MsgpackWriter writer;
+    writer.WriteString(std::string(size, 'x'));
+    EXPECT_EQ(writer.GetString().size(), header_size + size);
+    return HexPrefix(writer.GetString(), header_size);
+  };
+
+  EXPECT_EQ(header(0, 1), "a0");
+  EXPECT_EQ(header(31, 1), "bf");
+  EXPECT_EQ(header(32, 2), "d9 20");
+  EXPECT_EQ(header(255, 2), "d9 ff");
+  EXPECT_EQ(header(256, 3), "da 01 00");
+  EXPECT_EQ(header(65535, 3), "da ff ff");
+  EXPECT_EQ(header(65536, 5), "db 00 01 00 00");
+}
+
+TEST(Msgpack, ContainerHeaders) {
+  const auto array = [](std::size_t size) {
+    MsgpackWriter writer;
+    writer.WriteArrayHeader(size);
+    return Hex(writer.GetString());
+  };
+  const auto map = [](std::size_t size) {
+    MsgpackWriter writer;
+    writer.WriteMapHeader(size);
+    return Hex(writer.GetString());
+  };
+
+  EXPECT_EQ(array(0), "90");
+  EXPECT_EQ(array(15), "9f");
+  EXPECT_EQ(array(16), "dc 00 10");
+  EXPECT_EQ(array(65535), "dc ff ff");
+  EXPECT_EQ(array(65536), "dd 00 01 00 00");
+
+  EXPECT_EQ(map(0), "80");
+  EXPECT_EQ(map(15), "8f");
+  EXPECT_EQ(map(16), "de 00 10");
+  EXPECT_EQ(map(65535), "de ff ff");
+  EXPECT_EQ(map(65536), "df 00 01 00 00");
+}
+
+TEST(Msgpack, JsonScalars) {
+  EXPECT_EQ(FromJson("null"), "c0");
+  EXPECT_EQ(FromJson(" true "), "c3");
+  EXPECT_EQ(FromJson("false"), "c2");
+  EXPECT_EQ(FromJson("\"abc\""), "a3 61 62 63");
+  EXPECT_EQ(FromJson("\"\""), "a0");
+}
+
+TEST(Msgpack, JsonNumbers) {
+  EXPECT_EQ(FromJson("0"), "00");
+  EXPECT_EQ(FromJson("-1"), "ff");
+  EXPECT_EQ(FromJson("-33"), "d0 df");
+  EXPECT_EQ(FromJson("9223372036854775807"), "cf 7f ff ff ff ff ff ff ff");
+  EXPECT_EQ(FromJson("-9223372036854775808"), "d3 80 00 00 00 00 00 00 00");
+  // Above the int64 range, but still fits uint64
+  EXPECT_EQ(FromJson("18446744073709551615"), "cf ff ff ff ff ff ff ff ff");
+  // Above the uint64 range, written as a double
+  EXPECT_EQ(FromJson("18446744073709551616"), "cb 43 f0 00 00 00 00 00 00");
+  EXPECT_EQ(FromJson("-1.5"), "cb bf f8 00 00 00 00 00 00");
+  EXPECT_EQ(FromJson("1e3"), "cb 40 8f 40 00 00 00 00 00");
+  EXPECT_EQ(FromJson("2.5E-1"), "cb 3f d0 00 00 00 00 00 00");
+}
+
+TEST(Msgpack, JsonStringEscapes) {
+  MsgpackWriter expected;
+  expected.WriteString("\"\\/\b\f\n\r\t");
+  EXPECT_EQ(FromJson(R"("\"\\\/\b\f\n\r\t")"), Hex(expected.GetString()));
+
+  // Escapes after a plain prefix keep the prefix
+  EXPECT_EQ(FromJson(R"("ab\n")"), "a3 61 62 0a");
+  EXPECT_EQ(FromJson(R"("\u0041")"), "a1 41");
+  EXPECT_EQ(FromJson(R"("\u00e9")"), "a2 c3 a9");
+  EXPECT_EQ(FromJson(R"("\u20AC")"), "a3 e2 82 ac");
+  // U+1F600 as a surrogate pair
+  EXPECT_EQ(FromJson(R"("\ud83d\ude00")"), "a4 f0 9f 98 80");
+  // Raw UTF-8 is copied as is
+  EXPECT_EQ(FromJson("\"\xc3\xa9\""), "a2 c3 a9");
+}
+
+TEST(Msgpack, JsonNesting) {
+  EXPECT_EQ(FromJson("[]"), "90");
+  EXPECT_EQ(FromJson("{}"), "80");
+  EXPECT_EQ(FromJson(" [ ] "), "90");
+  EXPECT_EQ(FromJson("{ }"), "80");
+  EXPECT_EQ(FromJson("[[],{}]"), "92 90 80");
+  EXPECT_EQ(FromJson(R"({"a": [1, {"b": null}], "c": {}})"),
+            "82 a1 61 92 01 81 a1 62 c0 a1 63 80");
+  EXPECT_EQ(FromJson("[[[[1]]]]"), "91 91 91 91 01");
+
+  std::string deep(128, '[');
+  deep += std::string(128, ']');
+  EXPECT_NO_THROW(FromJson(deep));
+}
+
+TEST(Msgpack, JsonContainerHeaders) {
+  const auto header = [](std::size_t size, bool is_map,
+                         std::size_t header_size) {
+    MsgpackWriter writer;
+    writer.WriteJson(JsonContainer(size, is_map));
+    return HexPrefix(writer.GetString(), header_size);
+  };
+
+  EXPECT_EQ(header(15, false, 2), "9f 00");
+  EXPECT_EQ(header(16, false, 4), "dc 00 10 00");
+  EXPECT_EQ(header(65535, false, 4), "dc ff ff 00");
+  EXPECT_EQ(header(65536, false, 6), "dd 00 01 00 00 00");
+
+  EXPECT_EQ(header(15, true, 3), "8f a1 30");
+  EXPECT_EQ(header(16, true, 5), "de 00 10 a1 30");
+  EXPECT_EQ(header(65536, true, 7), "df 00 01 00 00 a1 30");
+
+  // The reserved header space is shrunk to the actual header size
+  MsgpackWriter writer;
+  writer.WriteJson(JsonContainer(16, false));
+  EXPECT_EQ(writer.GetString().size(), 3u + 16u);
+}
+
+TEST(Msgpack, MalformedJson) {
+  for (const std::string_view json : {
+           "",
+           "[1,",
+           "[1,]",
+           "[1 2]",
+           "{\"a\" 1}",
+           "{\"a\":}",
+           "{1:2}",
+           "tru",
+           "nul",
+           "1 2",
+           "1.2.3",
+           "-",
+           "\"abc",
+           "\"\\x\"",
+           "\"\\u12\"",
+           "\"\\u12g4\"",
+           // Lone and mismatched surrogates
+           "\"\\ud83d\"",
+           "\"\\ud83d\\u0041\"",
+       }) {
+    MsgpackWriter writer;
+    EXPECT_THROW(writer.WriteJson(json), std::runtime_error) << json;
+  }
+
+  std::string too_deep(130, '[');
+  too_deep += std::string(130, ']');
+  MsgpackWriter writer;
+  EXPECT_THROW(writer.WriteJson(too_deep), std::runtime_error);
+}
+
+} // namespace uservice_dynconf::utils
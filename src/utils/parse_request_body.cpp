@@ -0,0 +1,22 @@
+#include "parse_request_body.hpp"
+
+#include "userver/formats/json/exception.hpp"
+#include "userver/formats/json/serialize.hpp"
+#include "userver/server/handlers/exceptions.hpp"
+
+namespace uservice_dynconf::utils {
+
+userver::formats::json::Value
+ParseRequestBody(const userver::server::http::HttpRequest &request) {
+  if (request.RequestBody().empty()) {
+    return {};
+  }
+  try {
+    return userver::formats::json::FromString(request.RequestBody());
+  } catch (const userver::formats::json::Exception &e) {
+    throw userver::server::handlers::ClientError(
+        userver::server::handlers::ExternalBody{e.what()});
+  }
+}
+
+} // namespace uservice_dynconf::utils
@@ -0,0 +1,11 @@
+#pragma once
+
+#include "userver/formats/json/value.hpp"
+#include "userver/server/http/http_request.hpp"
+
+namespace uservice_dynconf::utils {
+
+userver::formats::json::Value
+ParseRequestBody(const userver::server::http::HttpRequest &request);
+
+}
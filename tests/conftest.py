@@ -7,6 +7,30 @@ from testsuite.databases.pgsql import discover
 
 pytest_plugins = ['pytest_userver.plugins.postgresql']
 
+USERVER_CONFIG_HOOKS = ['userver_config_dumps_root']
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('load', 'load benchmarks')
+    group.addoption(
+        '--run-load', action='store_true',
+        help='Run load benchmarks marked with "load"',
+    )
+    group.addoption(
+        '--load-results', type=pathlib.Path,
+        default=pathlib.Path(__file__).parent / 'load' / 'results',
+        help='Directory to store load benchmark results in',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-load'):
+        return
+    skip = pytest.mark.skip(reason='load benchmarks need --run-load')
+    for item in items:
+        if 'load' in item.keywords:
+            item.add_marker(skip)
+
 
 @pytest.fixture(scope='session')
 def service_source_dir():
@@ -24,6 +48,21 @@ def initial_data_path(
     ]
 
 
+@pytest.fixture(scope='session')
+def userver_dumps_root(tmp_path_factory) -> pathlib.Path:
+    """Cache dumps directory of the test run, so that dumps of previous runs
+    are not restored"""
+    return tmp_path_factory.mktemp('cache-dumps')
+
+
+@pytest.fixture(scope='session')
+def userver_config_dumps_root(userver_dumps_root):
+    def patch_config(config_yaml, config_vars):
+        config_vars['userver-dumps-root'] = str(userver_dumps_root)
+
+    return patch_config
+
+
 @pytest.fixture(scope='session')
 def pgsql_local(service_source_dir, pgsql_local_create):
     """Create schemas databases for tests"""
@@ -0,0 +1,59 @@
+"""
+Compare two load benchmark results stored by the load suite:
+
+    python3 tests/load/compare.py tests/load/results/{old,new}.json
+
+Exits with 1 if any latency grew, or RPS or update speed dropped, by more
+than --threshold.
+"""
+import argparse
+import json
+import sys
+
+# Metric name to whether larger values are better
+METRICS = {
+    'rps': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'p999_ms': False,
+    'full_update_s': False,
+    'incremental_update_s': False,
+    'rss_kb': False,
+}
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    regressed = False
+    for name in sorted(new.keys() & old.keys()):
+        for metric, larger_is_better in METRICS.items():
+            before = old[name].get(metric)
+            after = new[name].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            is_regression = (
+                -change if larger_is_better else change
+            ) > threshold
+            regressed = regressed or is_regression
+            print(
+                f'{"!" if is_regression else " "} {name} {metric}: '
+                f'{before:.3f} -> {after:.3f} ({change:+.1%})',
+            )
+    return not regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+    with open(args.old) as old, open(args.new) as new:
+        old_results = json.load(old)['results']
+        new_results = json.load(new)['results']
+    if not compare(old_results, new_results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import typing
+
+import pytest
+
+from tests.load.utils import CACHE_NAME
+from tests.load.utils import Dataset
+from tests.load.utils import GENERATE_DATASET_SQL
+
+
+@pytest.fixture
+def load_dataset(pgsql, service_client):
+    """Fill the table with `services` x `configs` synthetic configs"""
+    async def create(services: int, configs: int) -> Dataset:
+        cursor = pgsql['uservice_dynconf'].cursor()
+        cursor.execute(GENERATE_DATASET_SQL, (services, configs))
+        await service_client.invalidate_caches(
+            clean_update=True, cache_names=[CACHE_NAME],
+        )
+        return Dataset(services, configs)
+
+    return create
+
+
+@pytest.fixture
+def service_rss_kb(monitor_client):
+    """RSS of the service as reported by system-statistics-collector"""
+    async def get() -> typing.Optional[int]:
+        metrics = await monitor_client.metrics(prefix='process.rss_kb')
+        return metrics.value_at('process.rss_kb', default=None)
+
+    return get
+
+
+def _results_name(service_source_dir) -> str:
+    name = os.environ.get('LOAD_RESULTS_NAME')
+    if name:
+        return name
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=service_source_dir, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+
+@pytest.fixture(scope='session')
+def load_report(pytestconfig, service_source_dir):
+    """
+    Results of load benchmarks by name, stored as <commit>.json in
+    --load-results directory at the end of the session, see compare.py
+    """
+    results = {}
+    yield results
+    if not results:
+        return
+    name = _results_name(service_source_dir)
+    directory = pytestconfig.getoption('--load-results')
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f'{name}.json').write_text(
+        json.dumps(
+            {'name': name, 'results': results}, indent=2, sort_keys=True,
+        ),
+    )
@@ -0,0 +1,48 @@
+import pytest
+
+from tests.load.utils import CACHE_NAME
+from tests.load.utils import timed
+
+
+@pytest.mark.load
+@pytest.mark.parametrize(
+    'services, configs',
+    [
+        pytest.param(10, 1000, id='10k'),
+        pytest.param(100, 1000, id='100k'),
+        pytest.param(1000, 1000, id='1m'),
+    ],
+)
+async def test_load_cache_update(
+        service_client, pgsql, load_dataset, load_report, service_rss_kb,
+        services, configs,
+):
+    dataset = await load_dataset(services, configs)
+
+    full_update_s = await timed(
+        service_client.invalidate_caches(
+            clean_update=True, cache_names=[CACHE_NAME],
+        ),
+    )
+
+    # One config changed in every service
+    cursor = pgsql['uservice_dynconf'].cursor()
+    cursor.execute(
+        'UPDATE uservice_dynconf.configs '
+        'SET config_value = \'-1\'::jsonb, updated_at = NOW() '
+        'WHERE config_name = %s',
+        (dataset.config(1),),
+    )
+    incremental_update_s = await timed(
+        service_client.invalidate_caches(
+            clean_update=False, cache_names=[CACHE_NAME],
+        ),
+    )
+
+    load_report[f'cache-update/{services}x{configs}'] = {
+        'rows': dataset.rows,
+        'changed_rows': services,
+        'full_update_s': full_update_s,
+        'incremental_update_s': incremental_update_s,
+        'rss_kb': await service_rss_kb(),
+    }
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from tests.load.utils import run_load
+
+REQUESTS = 2000
+IDS_PER_REQUEST = 10
+
+# Weights of full service, id list and updated_since requests
+MIXES = {
+    'full': (1, 0, 0),
+    'ids': (0, 1, 0),
+    'updated-since': (0, 0, 1),
+    'mixed': (6, 3, 1),
+}
+
+
+@pytest.mark.load
+@pytest.mark.parametrize('concurrency', [1, 16, 64])
+@pytest.mark.parametrize('mix', list(MIXES))
+@pytest.mark.parametrize(
+    'services, configs',
+    [
+        pytest.param(100, 100, id='100x100'),
+        pytest.param(100, 1000, id='100x1000'),
+    ],
+)
+async def test_load_configs_values(
+        service_client, load_dataset, load_report, service_rss_kb,
+        services, configs, mix, concurrency,
+):
+    dataset = await load_dataset(services, configs)
+    response = await service_client.post(
+        '/configs/values', json={'service': dataset.service(0)},
+    )
+    assert response.status_code == 200
+    revision = response.json()['revision']
+
+    rng = random.Random(0)
+
+    def make_body():
+        service = dataset.service(rng.randrange(services))
+        kind = rng.choices(list(range(3)), MIXES[mix])[0]
+        if kind == 1:
+            return {
+                'service': service,
+                'ids': [
+                    dataset.config(rng.randrange(configs))
+                    for _ in range(IDS_PER_REQUEST)
+                ],
+            }
+        if kind == 2:
+            return {'service': service, 'revision': revision}
+        return {'service': service}
+
+    result = await run_load(
+        lambda _: service_client.post('/configs/values', json=make_body()),
+        concurrency=concurrency, requests=REQUESTS,
+    )
+    result['rss_kb'] = await service_rss_kb()
+    load_report[
+        f'configs-values/{services}x{configs}/{mix}/c{concurrency}'
+    ] = result
+    assert result['errors'] == 0
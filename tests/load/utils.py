@@ -0,0 +1,86 @@
+import asyncio
+import dataclasses
+import time
+import typing
+
+CACHE_NAME = 'configs-cache'
+
+# Values range from scalars to 100KB objects, larger values are rarer
+GENERATE_DATASET_SQL = """
+INSERT INTO uservice_dynconf.configs (service, config_name, config_value)
+SELECT 'load-service-' || s, 'LOAD_CONFIG_' || c,
+CASE
+    WHEN c %% 1000 = 0 THEN jsonb_build_object('blob', repeat('x', 102400))
+    WHEN c %% 100 = 0 THEN jsonb_build_object('blob', repeat('x', 10240))
+    WHEN c %% 10 = 0 THEN jsonb_build_object(
+        'enabled', true, 'items', ARRAY(SELECT generate_series(1, 100)))
+    ELSE to_jsonb(c)
+END
+FROM generate_series(0, %s - 1) AS s, generate_series(0, %s - 1) AS c
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class Dataset:
+    services: int
+    configs: int
+
+    @property
+    def rows(self) -> int:
+        return self.services * self.configs
+
+    @staticmethod
+    def service(index: int) -> str:
+        return f'load-service-{index}'
+
+    @staticmethod
+    def config(index: int) -> str:
+        return f'LOAD_CONFIG_{index}'
+
+
+def percentile(sorted_values: typing.List[float], quantile: float) -> float:
+    index = min(len(sorted_values) - 1, int(quantile * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_load(
+        make_request: typing.Callable[[int], typing.Awaitable],
+        *, concurrency: int, requests: int,
+) -> dict:
+    """
+    Send `requests` requests from `concurrency` concurrent workers and
+    return latency percentiles in milliseconds and RPS
+    """
+    latencies = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in indexes:
+            start = time.perf_counter()
+            response = await make_request(index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in (200, 304):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'rps': requests / duration,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'p999_ms': percentile(latencies, 0.999) * 1000,
+    }
+
+
+async def timed(awaitable: typing.Awaitable) -> float:
+    start = time.perf_counter()
+    await awaitable
+    return time.perf_counter() - start
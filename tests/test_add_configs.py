@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from testsuite.databases import pgsql
@@ -77,7 +79,8 @@ async def test_configs_add_values(
         },
     )
 
-    assert response.status_code == 204
+    assert response.status_code == 200
+    assert response.json() == {'changed': sorted(configs)}
 
     await service_client.invalidate_caches(cache_names=['configs-cache'])
     await check_configs_state(
@@ -114,7 +117,7 @@ async def test_redefinitions_configs(
         '/admin/v1/configs', json={'service': service, 'configs': configs},
     )
 
-    assert response.status_code == 204
+    assert response.status_code == 200
 
     await service_client.invalidate_caches(cache_names=['configs-cache'])
     await check_configs_state(
@@ -166,7 +169,7 @@ async def test_redefinitions_of_config_modes(
         },
     )
 
-    assert response.status_code == 204
+    assert response.status_code == 200
 
     await service_client.invalidate_caches(cache_names=['configs-cache'])
     await check_configs_state(
@@ -261,3 +264,209 @@ async def test_kill_switches_not_from_configs(
             'Fields \'kill_switches_enabled\' and \'kill_switches_disabled\' '
             'must consist of ids from \'configs\' field',
     }
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_default_change_seen_by_services(service_client):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': '__default__',
+            'configs': {
+                'POSTGRES_CONNECTION_SETTINGS': {'changed': True},
+                'NEW_DEFAULT_CONFIG': 1,
+            },
+        },
+    )
+    assert response.status_code == 200
+
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    configs = response.json()['configs']
+    assert configs['POSTGRES_CONNECTION_SETTINGS'] == {'changed': True}
+    assert configs['NEW_DEFAULT_CONFIG'] == 1
+    assert configs['CUSTOM_CONFIG'] == {'config': False}
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_unchanged_configs_not_updated(service_client):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    revision = response.json()['revision']
+
+    request = {
+        'service': service,
+        'configs': {
+            'CUSTOM_CONFIG': {'config': False},
+            'NEW_CONFIG': 1,
+        },
+    }
+    response = await service_client.post('/admin/v1/configs', json=request)
+    assert response.status_code == 200
+    assert response.json() == {'changed': ['NEW_CONFIG']}
+
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'revision': revision},
+    )
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'NEW_CONFIG': 1}
+
+    response = await service_client.post('/admin/v1/configs', json=request)
+    assert response.status_code == 200
+    assert response.json() == {'changed': []}
+
+    request['kill_switches_enabled'] = ['NEW_CONFIG']
+    response = await service_client.post('/admin/v1/configs', json=request)
+    assert response.status_code == 200
+    assert response.json() == {'changed': ['NEW_CONFIG']}
+
+
+COALESCER_PREFIX = 'uservice-dynconf.configs-write-coalescer'
+
+
+async def get_coalescer_metric(monitor_client, name):
+    metric = f'{COALESCER_PREFIX}.{name}'
+    metrics = await monitor_client.metrics(prefix=metric)
+    return metrics.value_at(metric, default=0)
+
+
+@pytest.fixture(name='write_coalescer_enabled')
+def _write_coalescer_enabled(testpoint):
+    """Switch the write coalescer on, it is off in the service config"""
+    @testpoint('configs-write-coalescer-enabled')
+    def enabled(data):
+        return {'enabled': True}
+
+    return enabled
+
+
+async def test_configs_add_values_concurrently(
+        service_client, monitor_client, check_configs_state,
+        write_coalescer_enabled,
+):
+    service = 'my-service'
+    writes = await get_coalescer_metric(monitor_client, 'writes')
+
+    configs = {f'CONFIG_{i}': {'value': i} for i in range(20)}
+    responses = await asyncio.gather(*[
+        service_client.post(
+            '/admin/v1/configs', json={
+                'service': service,
+                'configs': {config_name: value},
+                'kill_switches_enabled': (
+                    [config_name] if value['value'] % 2 else []
+                ),
+            },
+        )
+        for config_name, value in configs.items()
+    ])
+
+    # Each writer gets its own changes, though they may share a commit
+    for config_name, response in zip(configs, responses):
+        assert response.status_code == 200
+        assert response.json() == {'changed': [config_name]}
+
+    assert await get_coalescer_metric(
+        monitor_client, 'writes',
+    ) == writes + len(configs)
+
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await check_configs_state(
+        ids=sorted(configs),
+        service=service,
+        expected_configs=configs,
+        expected_kill_switches_enabled=sorted(
+            config_name for config_name, value in configs.items()
+            if value['value'] % 2
+        ),
+        expected_kill_switches_disabled=[],
+    )
+
+
+async def test_configs_add_values_without_coalescer(
+        service_client, monitor_client, check_configs_state,
+):
+    service = 'my-service'
+    writes = await get_coalescer_metric(monitor_client, 'writes')
+
+    configs = {f'CONFIG_{i}': i for i in range(5)}
+    responses = await asyncio.gather(*[
+        service_client.post(
+            '/admin/v1/configs', json={
+                'service': service, 'configs': {config_name: value},
+            },
+        )
+        for config_name, value in configs.items()
+    ])
+    for config_name, response in zip(configs, responses):
+        assert response.status_code == 200
+        assert response.json() == {'changed': [config_name]}
+
+    # Each request commits on its own
+    assert await get_coalescer_metric(monitor_client, 'writes') == writes
+
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await check_configs_state(
+        ids=sorted(configs),
+        service=service,
+        expected_configs=configs,
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+
+
+async def test_configs_add_values_coalesced_failure(
+        service_client, monitor_client, check_configs_state,
+        write_coalescer_enabled,
+):
+    service = 'my-service'
+    failed_batches = await get_coalescer_metric(
+        monitor_client, 'failed-batches',
+    )
+
+    # jsonb does not allow the NUL character, so the whole batch fails
+    responses = await asyncio.gather(
+        service_client.post(
+            '/admin/v1/configs', json={
+                'service': service, 'configs': {'VALID_CONFIG': 1},
+            },
+        ),
+        service_client.post(
+            '/admin/v1/configs', json={
+                'service': service, 'configs': {'INVALID_CONFIG': '\u0000'},
+            },
+        ),
+    )
+
+    # Every writer of the failed commit gets the error
+    for response in responses:
+        assert response.status_code == 500
+    assert await get_coalescer_metric(
+        monitor_client, 'failed-batches',
+    ) == failed_batches + 1
+
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await check_configs_state(
+        ids=['VALID_CONFIG', 'INVALID_CONFIG'],
+        service=service,
+        expected_configs={},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
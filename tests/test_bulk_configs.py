@@ -0,0 +1,164 @@
+import pytest
+
+from testsuite.databases import pgsql
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_bulk_configs(service_client, check_configs_state):
+    response = await service_client.post(
+        '/admin/v1/configs/bulk', json={
+            'upsert': [
+                {
+                    'service': 'first-service',
+                    'configs': {'CONFIG': 1, 'KILL_SWITCH': 2},
+                    'kill_switches_enabled': ['KILL_SWITCH'],
+                },
+                {
+                    'service': 'second-service',
+                    'configs': {'CONFIG': 3},
+                },
+            ],
+            'delete': [
+                {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'changed': [
+            {'service': 'first-service', 'id': 'CONFIG'},
+            {'service': 'first-service', 'id': 'KILL_SWITCH'},
+            {'service': 'second-service', 'id': 'CONFIG'},
+        ],
+        'deleted': [{'service': 'my-custom-service', 'id': 'CUSTOM_CONFIG'}],
+    }
+
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await check_configs_state(
+        ids=['CONFIG', 'KILL_SWITCH'],
+        service='first-service',
+        expected_configs={'CONFIG': 1, 'KILL_SWITCH': 2},
+        expected_kill_switches_enabled=['KILL_SWITCH'],
+        expected_kill_switches_disabled=[],
+    )
+    await check_configs_state(
+        ids=['CONFIG'],
+        service='second-service',
+        expected_configs={'CONFIG': 3},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+    await check_configs_state(
+        ids=['CUSTOM_CONFIG'],
+        service='my-custom-service',
+        expected_configs={},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_bulk_configs_400(service_client, check_configs_state):
+    response = await service_client.post(
+        '/admin/v1/configs/bulk', json={
+            'upsert': [
+                {'service': 'first-service', 'configs': {'CONFIG': 1}},
+                {'service': 'second-service'},
+                {'service': 'first-service', 'configs': {'CONFIG': 2}},
+            ],
+            'delete': [
+                {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']},
+                {'service': 'first-service', 'ids': ['CONFIG']},
+            ],
+        },
+    )
+    assert response.status_code == 400
+    assert response.json()['errors'] == [
+        {
+            'operation': 'upsert',
+            'index': 1,
+            'message': 'Fields \'configs\' and \'service\' are required',
+        },
+        {
+            'operation': 'upsert',
+            'index': 2,
+            'message': 'Config \'CONFIG\' is updated more than once',
+        },
+        {
+            'operation': 'delete',
+            'index': 1,
+            'message': 'Config \'CONFIG\' is both updated and deleted',
+        },
+    ]
+
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await check_configs_state(
+        ids=['CONFIG'],
+        service='first-service',
+        expected_configs={},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+    await check_configs_state(
+        ids=['CUSTOM_CONFIG'],
+        service='my-custom-service',
+        expected_configs={'CUSTOM_CONFIG': {'config': False}},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_bulk_configs_slash_in_names(
+        service_client, check_configs_state,
+):
+    # Keys of these configs are the same if joined with '/'
+    response = await service_client.post(
+        '/admin/v1/configs/bulk', json={
+            'upsert': [
+                {'service': 'first/service', 'configs': {'CONFIG/A': 1}},
+                {'service': 'first', 'configs': {'service/CONFIG/A': 2}},
+            ],
+            'delete': [
+                {'service': 'first/service/CONFIG', 'ids': ['A']},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'changed': [
+            {'service': 'first', 'id': 'service/CONFIG/A'},
+            {'service': 'first/service', 'id': 'CONFIG/A'},
+        ],
+        'deleted': [],
+    }
+
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await check_configs_state(
+        ids=['CONFIG/A'],
+        service='first/service',
+        expected_configs={'CONFIG/A': 1},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+    await check_configs_state(
+        ids=['service/CONFIG/A'],
+        service='first',
+        expected_configs={'service/CONFIG/A': 2},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+
+
+async def test_bulk_configs_empty(service_client):
+    response = await service_client.post('/admin/v1/configs/bulk', json={})
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def configs_cache_dumps(userver_dumps_root):
+    path = userver_dumps_root / 'configs-cache'
+    yield path
+    # Later tests and restarts of the service must not restore these dumps
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_restored_from_dump(
+        service_client, pgsql, configs_cache_dumps,
+):
+    request = {'service': 'my-custom-service'}
+    response = await service_client.post('/configs/values', json=request)
+    assert response.status_code == 200
+    expected = response.json()
+    assert expected['configs']
+
+    await service_client.write_cache_dumps(['configs-cache'])
+    assert any(configs_cache_dumps.iterdir())
+
+    cursor = pgsql['uservice_dynconf'].cursor()
+    cursor.execute('DELETE FROM uservice_dynconf.configs')
+    await service_client.invalidate_caches(
+        clean_update=True, cache_names=['configs-cache'],
+    )
+    response = await service_client.post('/configs/values', json=request)
+    assert response.status_code == 200
+    assert response.json()['configs'] == {}
+
+    await service_client.read_cache_dumps(['configs-cache'])
+    response = await service_client.post('/configs/values', json=request)
+    assert response.status_code == 200
+    assert response.json()['configs'] == expected['configs']
+    assert response.json()['revision'] == expected['revision']
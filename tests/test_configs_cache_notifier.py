@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from testsuite.databases import pgsql
+
+
+# The cache is updated by the NOTIFY sent by the trigger, so the test does
+# not invalidate caches itself
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_cache_updated_on_notify(service_client, pgsql):
+    request_data = {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']}
+    response = await service_client.post('/configs/values', json=request_data)
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'CUSTOM_CONFIG': {'config': False}}
+    revision = response.json()['revision']
+
+    watch = asyncio.create_task(
+        service_client.post(
+            '/configs/watch',
+            json={**request_data, 'revision': revision, 'timeout_ms': 10000},
+        ),
+    )
+    await asyncio.sleep(0.1)
+    assert not watch.done()
+
+    cursor = pgsql['uservice_dynconf'].cursor()
+    cursor.execute(
+        'UPDATE uservice_dynconf.configs '
+        'SET config_value = \'{"config": true}\', updated_at = NOW() '
+        'WHERE service = \'my-custom-service\' '
+        'AND config_name = \'CUSTOM_CONFIG\'',
+    )
+
+    response = await watch
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'CUSTOM_CONFIG': {'config': True}}
+    assert response.json()['revision'] > revision
@@ -1,3 +1,4 @@
+import msgpack
 import pytest
 
 from testsuite.databases import pgsql
@@ -111,24 +112,11 @@ SETUP_DB_MARK = [
             id='custom config not find for default',
         ),
         pytest.param(
-            [],
-            'my-custom-service',
-            {
-                'USERVER_RPS_CCONTROL_ENABLED': USERVER_RPS_CCONTROL_DISABLED,
-                'POSTGRES_CONNECTION_POOL_SETTINGS': (
-                    POSTGRES_CONNECTION_POOL_SETTINGS_2
-                ),
-                'CUSTOM_CONFIG': CUSTOM_CONFIG,
-            },
-            marks=SETUP_DB_MARK,
-            id='get configs by service',
-        ),
-        pytest.param(
-            [],
+            ['CUSTOM_CONFIG'],
             'custom-service',
             {},
             marks=SETUP_DB_MARK,
-            id='get empty configs by service',
+            id='custom config not found for unknown service',
         ),
     ],
 )
@@ -142,6 +130,69 @@ async def test_configs_values(
     )
 
 
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_by_service_merged_with_default(service_client):
+    response = await service_client.post(
+        '/configs/values', json={'service': '__default__'},
+    )
+    assert response.status_code == 200
+    expected = response.json()['configs']
+    expected.update({
+        'USERVER_RPS_CCONTROL_ENABLED': USERVER_RPS_CCONTROL_DISABLED,
+        'POSTGRES_CONNECTION_POOL_SETTINGS': (
+            POSTGRES_CONNECTION_POOL_SETTINGS_2
+        ),
+        'CUSTOM_CONFIG': CUSTOM_CONFIG,
+    })
+
+    response = await service_client.post(
+        '/configs/values', json={'service': 'my-custom-service'},
+    )
+    assert response.status_code == 200
+    assert response.json()['configs'] == expected
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_unknown_service_gets_default_configs(service_client):
+    async def post(path, request_data):
+        response = await service_client.post(path, json=request_data)
+        assert response.status_code == 200
+        return response.json()
+
+    ids = ['POSTGRES_DEFAULT_COMMAND_CONTROL', 'CUSTOM_CONFIG']
+    queries = [
+        {},
+        {'ids': ids},
+        {'prefixes': ['POSTGRES_']},
+    ]
+    for query in queries:
+        default = await post(
+            '/configs/values', {**query, 'service': '__default__'},
+        )
+        assert default['configs']
+        assert 'CUSTOM_CONFIG' not in default['configs']
+        for service in ['custom-service', '']:
+            assert await post(
+                '/configs/values', {**query, 'service': service},
+            ) == default
+
+        batch = await post(
+            '/configs/values/batch',
+            {'queries': [{**query, 'service': 'custom-service'}]},
+        )
+        assert batch['results'] == [default]
+
+    assert await post(
+        '/kill-switches/values', {'service': 'custom-service'},
+    ) == await post('/kill-switches/values', {'service': '__default__'})
+
+
 @pytest.mark.parametrize(
     'ids, configs, kill_switches_enabled, kill_switches_disabled',
     [
@@ -180,6 +231,13 @@ async def test_configs_values(
             ['SAMPLE_DISABLED_KILL_SWITCH'],
             id='get kill switches by service',
         ),
+        pytest.param(
+            ['SAMPLE_ENABLED_KILL_SWITCH', 'SAMPLE_ENABLED_KILL_SWITCH'],
+            {'SAMPLE_ENABLED_KILL_SWITCH': 1},
+            ['SAMPLE_ENABLED_KILL_SWITCH'],
+            [],
+            id='get repeated kill switch',
+        ),
     ],
 )
 @pytest.mark.pgsql(
@@ -197,3 +255,455 @@ async def test_configs_modes(
         expected_kill_switches_enabled=kill_switches_enabled,
         expected_kill_switches_disabled=kill_switches_disabled
     )
+
+
+@pytest.mark.parametrize(
+    'request_data',
+    [
+        pytest.param({'service': 'my-custom-service'}, id='by service'),
+        pytest.param(
+            {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']},
+            id='by ids',
+        ),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_not_modified(service_client, request_data):
+    response = await service_client.post('/configs/values', json=request_data)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    revision = response.json()['revision']
+
+    response = await service_client.post(
+        '/configs/values', json=request_data,
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': 'my-custom-service',
+            'configs': {'CUSTOM_CONFIG': {'config': True}},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await service_client.post(
+        '/configs/values', json=request_data,
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json()['revision'] > revision
+
+
+@pytest.mark.parametrize(
+    'ids',
+    [
+        pytest.param([], id='by service'),
+        pytest.param(
+            [
+                'CUSTOM_CONFIG',
+                'POSTGRES_CONNECTION_POOL_SETTINGS',
+                'POSTGRES_DEFAULT_COMMAND_CONTROL',
+                'NEW_CONFIG',
+            ],
+            id='by ids',
+        ),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_delta(service_client, ids):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'ids': ids},
+    )
+    assert response.status_code == 200
+    revision = response.json()['revision']
+    assert 'removed' not in response.json()
+
+    response = await service_client.post(
+        '/admin/v1/configs/delete', json={
+            'service': service,
+            'ids': ['CUSTOM_CONFIG', 'POSTGRES_CONNECTION_POOL_SETTINGS'],
+        },
+    )
+    assert response.status_code == 204
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service, 'configs': {'NEW_CONFIG': 1},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+
+    response = await service_client.post(
+        '/configs/values',
+        json={'service': service, 'ids': ids, 'revision': revision},
+    )
+    assert response.status_code == 200
+    json = response.json()
+    assert json['configs'] == {
+        'NEW_CONFIG': 1,
+        'POSTGRES_CONNECTION_POOL_SETTINGS': POSTGRES_CONNECTION_POOL_SETTINGS,
+    }
+    assert json['removed'] == ['CUSTOM_CONFIG']
+    assert json['revision'] > revision
+
+
+@pytest.mark.parametrize(
+    'ids',
+    [
+        pytest.param([], id='by service'),
+        pytest.param(['CUSTOM_CONFIG'], id='by ids'),
+        pytest.param(['MISSING_CONFIG'], id='missing ids'),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_delta_without_changes(service_client, ids):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    revision = response.json()['revision']
+
+    # The client keeps its revision however many times it asks for a delta
+    for _ in range(2):
+        response = await service_client.post(
+            '/configs/values',
+            json={'service': service, 'ids': ids, 'revision': revision},
+        )
+        assert response.status_code == 200
+        json = response.json()
+        assert json['configs'] == {}
+        assert 'removed' not in json
+        assert json['revision'] == revision
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_delta_late_commit(service_client, pgsql):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    revision = response.json()['revision']
+
+    # A write that started before the revision was served and committed
+    # after it, so its updated_at is older than the configs the client has
+    cursor = pgsql['uservice_dynconf'].cursor()
+    cursor.execute(
+        'INSERT INTO uservice_dynconf.configs '
+        '(service, config_name, config_value, updated_at) '
+        'VALUES (%s, \'LATE_CONFIG\', \'42\', '
+        'to_timestamp(%s / 1000000.0))',
+        (service, revision - 500000),
+    )
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'revision': revision},
+    )
+    assert response.status_code == 200
+    json = response.json()
+    assert json['configs'] == {'LATE_CONFIG': 42}
+    assert json['revision'] > revision
+
+
+@pytest.mark.parametrize(
+    'request_data',
+    [
+        pytest.param({'revision': 1}, id='revision'),
+        pytest.param(
+            {'updated_since': '2000-01-01T00:00:00+0000'}, id='updated_since',
+        ),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_resync(service_client, request_data):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/admin/v1/configs/delete',
+        json={'service': service, 'ids': ['CUSTOM_CONFIG']},
+    )
+    assert response.status_code == 204
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    expected = response.json()
+    assert 'resync' not in expected
+
+    # Removals that old may be purged already, so the client gets all the
+    # configs to replace its own with them
+    for _ in range(2):
+        response = await service_client.post(
+            '/configs/values', json={'service': service, **request_data},
+        )
+        assert response.status_code == 200
+        json = response.json()
+        assert json['resync'] is True
+        assert 'removed' not in json
+        assert json['configs'] == expected['configs']
+        assert json['revision'] == expected['revision']
+
+
+LARGE_CONFIG = {f'route-{i}': f'http://backend-{i}.local' for i in range(100)}
+
+
+@pytest.mark.parametrize(
+    'ids',
+    [
+        pytest.param([], id='by service'),
+        pytest.param(['LARGE_CONFIG'], id='by ids'),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_compressed(service_client, ids):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'ids': ['CUSTOM_CONFIG']},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+    assert response.status_code == 200
+    # Small responses are not compressed
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service, 'configs': {'LARGE_CONFIG': LARGE_CONFIG},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    request_data = {'service': service, 'ids': ids}
+    response = await service_client.post('/configs/values', json=request_data)
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    expected = response.json()
+    etag = response.headers['ETag']
+
+    for _ in range(2):
+        response = await service_client.post(
+            '/configs/values', json=request_data,
+            headers={'Accept-Encoding': 'gzip'},
+        )
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['ETag'] == 'W/' + etag
+        assert response.json() == expected
+        assert response.json()['configs']['LARGE_CONFIG'] == LARGE_CONFIG
+
+    response = await service_client.post(
+        '/configs/values', json=request_data,
+        headers={'Accept-Encoding': 'gzip', 'If-None-Match': 'W/' + etag},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize(
+    'accept_encoding',
+    [
+        pytest.param('gzip;q=0', id='gzip refused'),
+        pytest.param('gzip; q=0.000, deflate', id='gzip refused with spaces'),
+        pytest.param('identity, *;q=0', id='any refused'),
+        pytest.param('gzip;q=0, *', id='gzip refused, any allowed'),
+        pytest.param('x-gzip2', id='other encoding'),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_gzip_not_accepted(
+        service_client, accept_encoding,
+):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service, 'configs': {'LARGE_CONFIG': LARGE_CONFIG},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    for request_data in (
+            {'service': service},
+            {'service': service, 'ids': ['LARGE_CONFIG']},
+    ):
+        response = await service_client.post(
+            '/configs/values', json=request_data,
+            headers={'Accept-Encoding': accept_encoding},
+        )
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response.headers
+        assert not response.headers['ETag'].startswith('W/')
+        assert response.json()['configs']['LARGE_CONFIG'] == LARGE_CONFIG
+
+
+@pytest.mark.parametrize(
+    'request_data',
+    [
+        pytest.param({'service': 'my-custom-service'}, id='by service'),
+        pytest.param(
+            {
+                'service': 'my-custom-service',
+                'ids': ['CUSTOM_CONFIG', 'POSTGRES_DEFAULT_COMMAND_CONTROL'],
+            },
+            id='by ids',
+        ),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_msgpack(service_client, request_data):
+    response = await service_client.post('/configs/values', json=request_data)
+    assert response.status_code == 200
+    expected = response.json()
+
+    for _ in range(2):
+        response = await service_client.post(
+            '/configs/values', json=request_data,
+            headers={'Accept': 'application/msgpack'},
+        )
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith(
+            'application/msgpack',
+        )
+        result = msgpack.unpackb(response.content, raw=False)
+        assert result['configs'] == expected['configs']
+        assert result['revision'] == expected['revision']
+        assert result.keys() == expected.keys()
+
+    etag = response.headers['ETag']
+    response = await service_client.post(
+        '/configs/values', json=request_data,
+        headers={'Accept': 'application/msgpack', 'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize(
+    'accept',
+    [
+        pytest.param('application/msgpack;q=0', id='msgpack refused'),
+        pytest.param(
+            'application/json, application/msgpack;q=0.5',
+            id='json preferred',
+        ),
+        pytest.param('*/*', id='any'),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_msgpack_not_accepted(service_client, accept):
+    request_data = {'service': 'my-custom-service'}
+    response = await service_client.post('/configs/values', json=request_data)
+    assert response.status_code == 200
+    expected = response.json()
+
+    response = await service_client.post(
+        '/configs/values', json=request_data, headers={'Accept': accept},
+    )
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('application/json')
+    assert response.json() == expected
+
+
+@pytest.mark.parametrize(
+    'ids, prefixes',
+    [
+        pytest.param([], ['POSTGRES_'], id='prefix'),
+        pytest.param(
+            [], ['POSTGRES_', 'POSTGRES_CONNECTION', 'USERVER_'],
+            id='overlapping prefixes',
+        ),
+        pytest.param(
+            ['CUSTOM_CONFIG', 'POSTGRES_DEFAULT_COMMAND_CONTROL'],
+            ['POSTGRES_'],
+            id='ids and prefix',
+        ),
+        pytest.param([], ['MISSING_'], id='no matches'),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_prefixes(service_client, ids, prefixes):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    all_configs = response.json()['configs']
+    expected = {
+        name: value for name, value in all_configs.items()
+        if name in ids or any(name.startswith(p) for p in prefixes)
+    }
+
+    response = await service_client.post(
+        '/configs/values',
+        json={'service': service, 'ids': ids, 'prefixes': prefixes},
+    )
+    assert response.status_code == 200
+    assert response.json()['configs'] == expected
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_repeated_ids(service_client):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values',
+        json={'service': service, 'ids': ['CUSTOM_CONFIG']},
+    )
+    assert response.status_code == 200
+    expected = response.text
+
+    for ids in (
+            ['CUSTOM_CONFIG', 'CUSTOM_CONFIG'],
+            ['CUSTOM_CONFIG', 'MISSING_CONFIG', 'CUSTOM_CONFIG'],
+    ):
+        response = await service_client.post(
+            '/configs/values', json={'service': service, 'ids': ids},
+        )
+        assert response.status_code == 200
+        assert response.text.count('"CUSTOM_CONFIG"') == 1
+        assert response.text == expected
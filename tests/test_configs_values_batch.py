@@ -0,0 +1,81 @@
+import pytest
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_batch(service_client):
+    queries = [
+        {'service': 'my-custom-service'},
+        {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']},
+        {'service': 'unknown-service', 'ids': ['CUSTOM_CONFIG']},
+        {'ids': ['POSTGRES_DEFAULT_COMMAND_CONTROL']},
+    ]
+    expected = []
+    for query in queries:
+        response = await service_client.post('/configs/values', json=query)
+        assert response.status_code == 200
+        expected.append(response.json())
+
+    response = await service_client.post(
+        '/configs/values/batch', json={'queries': queries},
+    )
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert len(results) == len(queries)
+    for result, single in zip(results, expected):
+        assert result['configs'] == single['configs']
+        assert result['revision'] == single['revision']
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_batch_delta(service_client):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    revision = response.json()['revision']
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service, 'configs': {'NEW_CONFIG': 1},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await service_client.post(
+        '/configs/values/batch', json={
+            'queries': [
+                {'service': service, 'revision': revision},
+                {'service': 'other-service', 'revision': revision},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert results[0]['configs'] == {'NEW_CONFIG': 1}
+    assert results[1]['configs'] == {}
+    assert results[1]['revision'] == revision
+
+
+@pytest.mark.parametrize(
+    'request_data',
+    [
+        pytest.param({}, id='no queries'),
+        pytest.param({'queries': []}, id='empty queries'),
+        pytest.param(
+            {'queries': [{'service': 'my-service'}] * 101}, id='too many',
+        ),
+    ],
+)
+async def test_configs_values_batch_invalid(service_client, request_data):
+    response = await service_client.post(
+        '/configs/values/batch', json=request_data,
+    )
+    assert response.status_code == 400
+    assert response.json()['code'] == '400'
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from testsuite.databases import pgsql
+
+
+SETUP_DB_MARK = pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+
+
+async def get_revision(service_client, request_data):
+    response = await service_client.post('/configs/values', json=request_data)
+    assert response.status_code == 200
+    return response.json()['revision']
+
+
+@SETUP_DB_MARK
+async def test_watch_timeout(service_client):
+    request_data = {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']}
+    revision = await get_revision(service_client, request_data)
+
+    response = await service_client.post(
+        '/configs/watch',
+        json={**request_data, 'revision': revision, 'timeout_ms': 100},
+    )
+    assert response.status_code == 304
+
+
+@SETUP_DB_MARK
+async def test_watch_without_revision(service_client):
+    response = await service_client.post(
+        '/configs/watch',
+        json={'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']},
+    )
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'CUSTOM_CONFIG': {'config': False}}
+
+
+@SETUP_DB_MARK
+async def test_watch_resync(service_client):
+    request_data = {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']}
+    response = await service_client.post(
+        '/configs/watch',
+        json={**request_data, 'revision': 1, 'timeout_ms': 10000},
+    )
+    assert response.status_code == 200
+    json = response.json()
+    assert json['resync'] is True
+    assert json['configs'] == {'CUSTOM_CONFIG': {'config': False}}
+    assert json['revision'] == await get_revision(
+        service_client, request_data,
+    )
+
+
+@SETUP_DB_MARK
+async def test_watch_late_commit(service_client, pgsql):
+    request_data = {'service': 'my-custom-service'}
+    revision = await get_revision(service_client, request_data)
+
+    # Committed after the revision was served with an older updated_at
+    cursor = pgsql['uservice_dynconf'].cursor()
+    cursor.execute(
+        'INSERT INTO uservice_dynconf.configs '
+        '(service, config_name, config_value, updated_at) '
+        'VALUES (\'my-custom-service\', \'LATE_CONFIG\', \'42\', '
+        'to_timestamp(%s / 1000000.0))',
+        (revision - 500000,),
+    )
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+
+    response = await service_client.post(
+        '/configs/watch',
+        json={**request_data, 'revision': revision, 'timeout_ms': 10000},
+    )
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'LATE_CONFIG': 42}
+    assert response.json()['revision'] > revision
+
+
+@SETUP_DB_MARK
+async def test_watch_wakes_on_update(service_client):
+    request_data = {'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']}
+    revision = await get_revision(service_client, request_data)
+
+    watch = asyncio.create_task(
+        service_client.post(
+            '/configs/watch',
+            json={**request_data, 'revision': revision, 'timeout_ms': 10000},
+        ),
+    )
+    await asyncio.sleep(0.1)
+    assert not watch.done()
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': 'my-custom-service',
+            'configs': {'CUSTOM_CONFIG': {'config': True}},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await watch
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'CUSTOM_CONFIG': {'config': True}}
+    assert response.json()['revision'] > revision
+
+
+@SETUP_DB_MARK
+async def test_watch_wakes_on_default_update(service_client):
+    request_data = {'service': 'unknown-service'}
+    revision = await get_revision(service_client, request_data)
+
+    watch = asyncio.create_task(
+        service_client.post(
+            '/configs/watch',
+            json={**request_data, 'revision': revision, 'timeout_ms': 10000},
+        ),
+    )
+
+    # Changes of other services are not reported
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': 'my-custom-service',
+            'configs': {'CUSTOM_CONFIG': {'config': True}},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+    await asyncio.sleep(0.1)
+    assert not watch.done()
+
+    # Unknown services get `__default__` configs, so they see its changes
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': '__default__', 'configs': {'NEW_DEFAULT_CONFIG': 1},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await watch
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'NEW_DEFAULT_CONFIG': 1}
+    assert response.json()['revision'] > revision
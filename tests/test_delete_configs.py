@@ -78,7 +78,7 @@ async def test_configs_delete_values(
         '/admin/v1/configs/delete', json={'service': service, 'ids': ids},
     )
 
-    response.status_code == 204
+    assert response.status_code == 204
 
     await service_client.invalidate_caches(cache_names=['configs-cache'])
     await check_configs_state(
@@ -142,7 +142,7 @@ async def test_remove_kill_switches(
         },
     )
 
-    response.status_code == 204
+    assert response.status_code == 204
 
     await service_client.invalidate_caches(cache_names=['configs-cache'])
     await check_configs_state(
@@ -177,3 +177,57 @@ async def test_remove_configs_400(
         'code': '400',
         'message': 'Fields \'ids\' and \'service\' are required',
     }
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_delete_seen_by_incremental_update(
+        service_client, check_configs_state,
+):
+    service = 'my-custom-service'
+    ids = ['CUSTOM_CONFIG', 'POSTGRES_CONNECTION_POOL_SETTINGS']
+    response = await service_client.post(
+        '/admin/v1/configs/delete', json={'service': service, 'ids': ids},
+    )
+    assert response.status_code == 204
+
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+    await check_configs_state(
+        ids=ids,
+        service=service,
+        expected_configs={
+            'POSTGRES_CONNECTION_POOL_SETTINGS': {
+                '__default__': {
+                    'min_pool_size': 4,
+                    'max_pool_size': 15,
+                    'max_queue_size': 200,
+                },
+            },
+        },
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service, 'configs': {'CUSTOM_CONFIG': 1},
+        },
+    )
+    assert response.status_code == 200
+    # Restoring a deleted config changes it even with the same value
+    assert response.json() == {'changed': ['CUSTOM_CONFIG']}
+
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+    await check_configs_state(
+        ids=['CUSTOM_CONFIG'],
+        service=service,
+        expected_configs={'CUSTOM_CONFIG': 1},
+        expected_kill_switches_enabled=[],
+        expected_kill_switches_disabled=[],
+    )
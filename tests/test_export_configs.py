@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from testsuite.databases import pgsql
+
+
+def parse_ndjson(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.mark.parametrize(
+    'headers',
+    [
+        pytest.param({}, id='identity'),
+        pytest.param({'Accept-Encoding': 'gzip'}, id='gzip'),
+    ],
+)
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_export_service(service_client, headers):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+    expected = response.json()['configs']
+
+    response = await service_client.post(
+        '/admin/v1/configs/export', json={'service': service},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == (
+        headers.get('Accept-Encoding')
+    )
+    lines = parse_ndjson(response.text)
+    assert {line['id']: line['value'] for line in lines} == expected
+    assert {
+        line['service'] for line in lines
+    } == {service, '__default__'}
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_export_all(service_client):
+    response = await service_client.post('/admin/v1/configs/export', json={})
+    assert response.status_code == 200
+    assert response.headers.get('Transfer-Encoding') == 'chunked'
+    lines = parse_ndjson(response.text)
+    custom = {
+        line['id']: line['value']
+        for line in lines
+        if line['service'] == 'my-custom-service'
+    }
+    assert custom['CUSTOM_CONFIG'] == {'config': False}
+    assert len(custom) == 3
+
+    response = await service_client.post(
+        '/admin/v1/configs/delete',
+        json={'service': 'my-custom-service', 'ids': ['CUSTOM_CONFIG']},
+    )
+    assert response.status_code == 204
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+
+    response = await service_client.post('/admin/v1/configs/export', json={})
+    assert response.status_code == 200
+    custom = {
+        line['id'] for line in parse_ndjson(response.text)
+        if line['service'] == 'my-custom-service'
+    }
+    assert len(custom) == 2
+    assert 'CUSTOM_CONFIG' not in custom
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_export_unknown_service(service_client):
+    response = await service_client.post(
+        '/admin/v1/configs/export', json={'service': '__default__'},
+    )
+    assert response.status_code == 200
+    expected = response.text
+    assert {line['service'] for line in parse_ndjson(expected)} == {
+        '__default__',
+    }
+
+    # Unknown services share the cached export of `__default__`
+    for service in ('unknown-service-1', 'unknown-service-2'):
+        response = await service_client.post(
+            '/admin/v1/configs/export', json={'service': service},
+        )
+        assert response.status_code == 200
+        assert response.text == expected
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_export_after_update(service_client):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/admin/v1/configs/export', json={'service': service},
+    )
+    assert response.status_code == 200
+    assert 'NEW_CONFIG' not in {
+        line['id'] for line in parse_ndjson(response.text)
+    }
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service, 'configs': {'NEW_CONFIG': 1},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(
+        clean_update=False, cache_names=['configs-cache'],
+    )
+
+    response = await service_client.post(
+        '/admin/v1/configs/export', json={'service': service},
+    )
+    assert response.status_code == 200
+    lines = {line['id']: line for line in parse_ndjson(response.text)}
+    assert lines['NEW_CONFIG']['value'] == 1
+    assert lines['NEW_CONFIG']['service'] == service
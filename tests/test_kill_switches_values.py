@@ -0,0 +1,93 @@
+import pytest
+
+SERVICE = 'service-with-kill-switches'
+
+
+@pytest.mark.parametrize(
+    'ids, enabled, disabled',
+    [
+        pytest.param(
+            [],
+            ['SAMPLE_ENABLED_KILL_SWITCH'],
+            ['SAMPLE_DISABLED_KILL_SWITCH'],
+            id='all kill switches',
+        ),
+        pytest.param(
+            ['SAMPLE_DISABLED_KILL_SWITCH', 'SAMPLE_DYNAMIC_CONFIG'],
+            [],
+            ['SAMPLE_DISABLED_KILL_SWITCH'],
+            id='by ids',
+        ),
+        pytest.param(['MISSING_CONFIG'], [], [], id='missing ids'),
+    ],
+)
+@pytest.mark.pgsql('uservice_dynconf', files=['kill_switches.sql'])
+async def test_kill_switches_values(service_client, ids, enabled, disabled):
+    response = await service_client.post(
+        '/kill-switches/values', json={'service': SERVICE, 'ids': ids},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'kill_switches_enabled': enabled,
+        'kill_switches_disabled': disabled,
+    }
+
+
+@pytest.mark.pgsql('uservice_dynconf', files=['kill_switches.sql'])
+async def test_kill_switches_unknown_service(service_client):
+    response = await service_client.post(
+        '/kill-switches/values', json={'service': 'unknown-service'},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'kill_switches_enabled': [],
+        'kill_switches_disabled': [],
+    }
+
+
+@pytest.mark.pgsql('uservice_dynconf', files=['kill_switches.sql'])
+async def test_kill_switches_not_modified(service_client):
+    request_data = {'service': SERVICE}
+    response = await service_client.post(
+        '/kill-switches/values', json=request_data,
+    )
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    # Changes of dynamic configs do not change kill switches
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': SERVICE, 'configs': {'SAMPLE_DYNAMIC_CONFIG': 10},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await service_client.post(
+        '/kill-switches/values', json=request_data,
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': SERVICE,
+            'configs': {'SAMPLE_DYNAMIC_CONFIG': 10},
+            'kill_switches_disabled': ['SAMPLE_DYNAMIC_CONFIG'],
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    response = await service_client.post(
+        '/kill-switches/values', json=request_data,
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json() == {
+        'kill_switches_enabled': ['SAMPLE_ENABLED_KILL_SWITCH'],
+        'kill_switches_disabled': [
+            'SAMPLE_DISABLED_KILL_SWITCH', 'SAMPLE_DYNAMIC_CONFIG',
+        ],
+    }
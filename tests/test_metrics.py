@@ -0,0 +1,112 @@
+import pytest
+
+PREFIX = 'uservice-dynconf.configs-values'
+
+
+async def get_metric(monitor_client, name, labels=None):
+    metrics = await monitor_client.metrics(prefix=f'{PREFIX}.{name}')
+    return metrics.value_at(f'{PREFIX}.{name}', labels, default=0)
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_metrics(service_client, monitor_client):
+    service = 'my-custom-service'
+    response = await service_client.post(
+        '/configs/values', json={'service': service},
+    )
+    assert response.status_code == 200
+
+    requests = await get_metric(monitor_client, 'requests')
+    by_service = await get_metric(
+        monitor_client, 'requests-by-service', {'service': service},
+    )
+    missing_ids = await get_metric(monitor_client, 'missing-ids')
+    fallbacks = await get_metric(monitor_client, 'default-fallbacks')
+
+    response = await service_client.post(
+        '/configs/values', json={
+            'service': service,
+            'ids': ['CUSTOM_CONFIG', 'BAGGAGE_SETTINGS', 'UNKNOWN_CONFIG'],
+        },
+    )
+    assert response.status_code == 200
+
+    assert await get_metric(monitor_client, 'requests') == requests + 1
+    assert await get_metric(
+        monitor_client, 'requests-by-service', {'service': service},
+    ) == by_service + 1
+    assert await get_metric(monitor_client, 'missing-ids') == missing_ids + 1
+    assert await get_metric(
+        monitor_client, 'default-fallbacks',
+    ) == fallbacks + 1
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_metrics_repeated_ids(
+        service_client, monitor_client,
+):
+    missing_ids = await get_metric(monitor_client, 'missing-ids')
+
+    # Each id is counted once however many times it is requested
+    response = await service_client.post(
+        '/configs/values', json={
+            'service': 'my-custom-service',
+            'ids': [
+                'CUSTOM_CONFIG', 'CUSTOM_CONFIG',
+                'UNKNOWN_CONFIG', 'UNKNOWN_CONFIG', 'UNKNOWN_CONFIG',
+            ],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()['configs'] == {'CUSTOM_CONFIG': {'config': False}}
+
+    assert await get_metric(monitor_client, 'missing-ids') == missing_ids + 1
+
+
+@pytest.mark.pgsql(
+    'uservice_dynconf',
+    files=['default_configs.sql', 'custom_configs.sql'],
+)
+async def test_configs_values_memo(service_client, monitor_client):
+    service = 'my-custom-service'
+    ids = ['CUSTOM_CONFIG', 'BAGGAGE_SETTINGS']
+    hits = await get_metric(monitor_client, 'memo.hits')
+    misses = await get_metric(monitor_client, 'memo.misses')
+
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'ids': ids},
+    )
+    assert response.status_code == 200
+    expected = response.json()
+
+    # Same ids in another order
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'ids': ids[::-1]},
+    )
+    assert response.status_code == 200
+    assert response.json() == expected
+    assert await get_metric(monitor_client, 'memo.hits') == hits + 1
+    assert await get_metric(monitor_client, 'memo.misses') == misses + 1
+
+    response = await service_client.post(
+        '/admin/v1/configs', json={
+            'service': service,
+            'configs': {'CUSTOM_CONFIG': {'config': True}},
+        },
+    )
+    assert response.status_code == 200
+    await service_client.invalidate_caches(cache_names=['configs-cache'])
+
+    # Memoized responses are dropped with the cache snapshot
+    response = await service_client.post(
+        '/configs/values', json={'service': service, 'ids': ids},
+    )
+    assert response.status_code == 200
+    assert response.json()['configs']['CUSTOM_CONFIG'] == {'config': True}
+    assert await get_metric(monitor_client, 'memo.misses') == misses + 2